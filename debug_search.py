@@ -6,8 +6,11 @@ from sentence_transformers import SentenceTransformer
 from pathlib import Path
 
 def main():
-    base_dir = Path("d:/AURA v01")
-    data_dir = base_dir / "data"
+    base_dir = Path(__file__).resolve().parent
+    sys.path.insert(0, str(base_dir))
+    from services.artifacts import resolve_generation
+
+    _, data_dir, _ = resolve_generation(base_dir / "data")
     index_path = data_dir / "snippets.index"
     meta_path = data_dir / "snippets_meta.json"
     
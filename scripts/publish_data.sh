@@ -16,7 +16,12 @@ run_step() {
 cd "$ROOT_DIR"
 
 echo "[publish_data] Writing logs to $LOG_FILE"
-run_step "Extracting snippets" npx tsx tools/extract_snippets.ts
+if [[ "${EXTRACTOR:-ts}" == "py" ]]; then
+  # Incremental via data/ingest_manifest.json; FULL=1 re-extracts every file.
+  run_step "Extracting snippets (Python, incremental)" python tools/extract_snippets_py.py ${FULL:+--full}
+else
+  run_step "Extracting snippets" npx tsx tools/extract_snippets.ts
+fi
 run_step "Validating snippets" npx tsx tools/validate_snippets.ts
 run_step "Building vector index" python tools/build_index.py
 
@@ -20,21 +20,23 @@ source "$VENV_DIR/bin/activate" 2>/dev/null || source "$VENV_DIR/Scripts/activat
 pip install --upgrade pip >/dev/null
 pip install -r "$ROOT_DIR/requirements.txt"
 
-START_CMD=(uvicorn services.vector_server:app --host 0.0.0.0 --port "$PORT")
+# VECTOR_WORKERS>1 pre-forks that many workers sharing one loaded model and index.
+WORKERS="${VECTOR_WORKERS:-1}"
+START_CMD=(python "$ROOT_DIR/services/vector_server.py" --host 0.0.0.0 --port "$PORT" --workers "$WORKERS")
 
 if [ "$DAEMON_MODE" = "--daemon" ]; then
-  echo "[vector_server] Starting in daemon mode on port $PORT"
+  echo "[vector_server] Starting in daemon mode on port $PORT ($WORKERS worker(s))"
   nohup "${START_CMD[@]}" >>"$LOG_FILE" 2>&1 &
   SERVER_PID=$!
   echo "$SERVER_PID" > "$ROOT_DIR/data/vector_server.pid"
-    for attempt in {1..10}; do
-    if curl -fsS "http://127.0.0.1:${PORT}/health" >/dev/null 2>&1; then
+    for attempt in {1..30}; do
+    if curl -fsS "http://127.0.0.1:${PORT}/readyz" >/dev/null 2>&1; then
       echo "[vector_server] Ready (pid $SERVER_PID)"
       exit 0
     fi
     sleep 1
     done
-  echo "[vector_server] Failed to pass health check" >&2
+  echo "[vector_server] Failed to pass readiness check" >&2
   exit 1
 else
   echo "[vector_server] Starting foreground server on port $PORT"
@@ -20,6 +20,7 @@ export interface SnippetResult {
   sourcePath: string;
   tags?: string[];
   metadata?: Record<string, unknown>;
+  fullText?: string | null;
 }
 
 export type EnrichedSnippet = SnippetResult & { fullText: string };
@@ -38,10 +39,17 @@ export class RagIndexMissingError extends Error {
 
 let sqlite: Database.Database | null = null;
 
+// Databases written by extract_snippets_py.py carry an indexed snippet_tags table;
+// older ones only have the JSON `tags` column.
+let hasTagTable = false;
+
 function ensureDatabase(): Database.Database {
   if (sqlite) return sqlite;
   if (!fs.existsSync(SNIPPET_DB_PATH)) throw new RagIndexMissingError();
   sqlite = new Database(SNIPPET_DB_PATH, { readonly: true });
+  hasTagTable = Boolean(
+    sqlite.prepare("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'snippet_tags'").get()
+  );
   return sqlite;
 }
 
@@ -65,6 +73,7 @@ async function retrieveContext(query: string, intent?: QueryIntent, k = 5): Prom
   const url = new URL(`${VECTOR_SERVER_URL}/search`);
   url.searchParams.set('q', query);
   url.searchParams.set('k', String(k));
+  url.searchParams.set('include_text', 'true');
   if (section) url.searchParams.set('section', section);
   const response = await fetch(url.toString());
   if (!response.ok) throw new Error(`Vector server error: ${response.status}`);
@@ -82,7 +91,7 @@ async function retrieveWithFilters(
 ): Promise<SnippetResult[]> {
   const ids = filterSnippetIds(filters);
   if (!ids.length) return [];
-  const url = `${VECTOR_SERVER_URL}/search?q=${encodeURIComponent(query)}&k=${k}&ids=${ids.join(',')}`;
+  const url = `${VECTOR_SERVER_URL}/search?q=${encodeURIComponent(query)}&k=${k}&ids=${ids.join(',')}&include_text=true`;
   const response = await fetch(url);
   if (!response.ok) throw new Error(`Vector server error: ${response.status}`);
   const data = await response.json();
@@ -102,8 +111,14 @@ function filterSnippetIds(filters: { section?: string; tags?: string[] }): strin
     params.section = filters.section;
   }
   if (filters.tags?.length) {
-    conditions.push(filters.tags.map((tag, i) => `tags LIKE @tag${i}`).join(' OR '));
-    filters.tags.forEach((tag, i) => (params[`tag${i}`] = `%${tag}%`));
+    if (hasTagTable) {
+      const names = filters.tags.map((_, i) => `@tag${i}`).join(', ');
+      conditions.push(`id IN (SELECT id FROM snippet_tags WHERE tag IN (${names}))`);
+      filters.tags.forEach((tag, i) => (params[`tag${i}`] = tag.trim().toLowerCase()));
+    } else {
+      conditions.push(filters.tags.map((tag, i) => `tags LIKE @tag${i}`).join(' OR '));
+      filters.tags.forEach((tag, i) => (params[`tag${i}`] = `%${tag}%`));
+    }
   }
 
   const where = conditions.length ? `WHERE ${conditions.join(' AND ')}` : '';
@@ -113,7 +128,8 @@ function filterSnippetIds(filters: { section?: string; tags?: string[] }): strin
 }
 
 /* -------------------------------------------------
-   Load full text from the snippet file
+   Load full text from the snippet file (fallback when the
+   vector server returned no packed fullText)
    ------------------------------------------------- */
 async function loadFullText(snippetId: string, fullTextPath: string): Promise<string> {
   try {
@@ -150,7 +166,7 @@ export async function ragQuery(query: string, intent = QueryIntent.GENERAL, k =
   // -----------------------------------------------------------------
   const enriched = await Promise.all(
     filtered.slice(0, 3).map(async r => {
-      const fullText = await loadFullText(r.id, r.fullTextPath);
+      const fullText = r.fullText ?? (await loadFullText(r.id, r.fullTextPath));
       return { ...r, fullText } satisfies EnrichedSnippet;
     })
   );
@@ -0,0 +1,122 @@
+"""Versioned index artifact generations shared by build_index.py and the vector server.
+
+Each build writes its files into ``data/generations/<generation>/`` and then
+atomically replaces ``data/manifest.json`` to point at it. The server polls
+the manifest, loads the new generation in the background and swaps it in,
+so publishing never needs a restart. Trees without a manifest fall back to
+the legacy flat layout directly under ``data/``.
+
+A sharded build (``build_index.py --shards N``) gives every shard its own
+data directory ``data/shards/<name>/`` with the same manifest/generation
+layout, so each shard is served by an ordinary vector server, and lists
+the shards in ``data/shards.json`` for the coordinator.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+MANIFEST_NAME = "manifest.json"
+GENERATIONS_DIR = "generations"
+LEGACY_GENERATION = "legacy"
+
+INDEX_FILE = "snippets.index"
+INDEX_PARAMS_FILE = "snippets_index.json"
+EMB_FILE = "snippets_embs.npy"
+META_JSON_FILE = "snippets_meta.json"
+META_COLS_FILE = "snippets_meta.cols"
+LEXICAL_FILE = "snippets_lexical.npz"
+PASSAGES_FILE = "snippets_passages.npy"
+BLOB_PACK_FILE = "blobs.pack"
+SHARDS_DIR = "shards"
+SHARD_MAP_FILE = "shards.json"
+
+
+def new_generation_id() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def generation_dir(data_dir: Path, generation: str) -> Path:
+    return data_dir / GENERATIONS_DIR / generation
+
+
+def read_manifest(data_dir: Path) -> Optional[Dict[str, Any]]:
+    path = data_dir / MANIFEST_NAME
+    if not path.exists():
+        return None
+    with path.open("r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def resolve_generation(data_dir: Path) -> Tuple[str, Path, Optional[Dict[str, Any]]]:
+    """Return ``(generation, artifact_dir, manifest)`` for the published index."""
+    manifest = read_manifest(data_dir)
+    if manifest is None:
+        return LEGACY_GENERATION, data_dir, None
+    return manifest["generation"], data_dir / manifest["path"], manifest
+
+
+def publish_generation(data_dir: Path, generation: str, info: Dict[str, Any]) -> Path:
+    """Point ``manifest.json`` at ``generation``; readers see old or new, never partial."""
+    manifest = {
+        "generation": generation,
+        "path": f"{GENERATIONS_DIR}/{generation}",
+        "publishedAt": datetime.now(timezone.utc).isoformat(),
+        **info,
+    }
+    path = data_dir / MANIFEST_NAME
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2)
+        fh.flush()
+        os.fsync(fh.fileno())
+    tmp_path.replace(path)
+    return path
+
+
+def prune_generations(data_dir: Path, keep: int) -> None:
+    """Delete all but the newest ``keep`` generations (the published one is always kept)."""
+    root = data_dir / GENERATIONS_DIR
+    if not root.exists():
+        return
+    manifest = read_manifest(data_dir)
+    current = manifest["generation"] if manifest else None
+    generations = sorted((p for p in root.iterdir() if p.is_dir()), key=lambda p: p.name, reverse=True)
+    for stale in generations[max(keep, 1):]:
+        if stale.name == current:
+            continue
+        # Servers may still map files from an old generation; on platforms that
+        # refuse to delete open files, leave it for the next publish.
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def shard_dir(data_dir: Path, name: str) -> Path:
+    return data_dir / SHARDS_DIR / name
+
+
+def read_shard_map(data_dir: Path) -> Optional[Dict[str, Any]]:
+    path = data_dir / SHARD_MAP_FILE
+    if not path.exists():
+        return None
+    with path.open("r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def write_shard_map(data_dir: Path, shard_by: str, shards: List[Dict[str, Any]]) -> Path:
+    """Replace ``shards.json`` with the shards of the build that just published."""
+    shard_map = {
+        "shardBy": shard_by,
+        "publishedAt": datetime.now(timezone.utc).isoformat(),
+        "shards": shards,
+    }
+    path = data_dir / SHARD_MAP_FILE
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as fh:
+        json.dump(shard_map, fh, indent=2)
+    tmp_path.replace(path)
+    return path
@@ -0,0 +1,123 @@
+"""Dynamic micro-batching for the vector server.
+
+Concurrent requests are queued and drained by a single worker task that
+waits up to ``max_wait_ms`` (or until ``max_batch_size`` items are queued),
+then hands the whole batch to one blocking ``process`` call in a thread.
+One encode + one search per batch replaces N threads fighting over torch
+and OpenMP threads.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class QueueFullError(RuntimeError):
+    """Raised by ``submit`` when ``max_queue_depth`` requests are already waiting."""
+
+
+class MicroBatcher(Generic[T, R]):
+    def __init__(
+        self,
+        process: Callable[[List[T]], List[R]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+        max_queue_depth: int = 1024,
+        on_batch: Optional[Callable[[List[float]], None]] = None,
+    ) -> None:
+        self.process = process
+        self.on_batch = on_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue_depth = max_queue_depth
+        self._queue: Optional["asyncio.Queue[Tuple[float, T, asyncio.Future]]"] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.rejected = 0
+        self.queue_delay_total = 0.0
+        self.queue_delay_max = 0.0
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_queue_depth)
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def submit(self, item: T) -> R:
+        assert self._queue is not None, "MicroBatcher.start() was not called"
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((time.perf_counter(), item, future))
+        except asyncio.QueueFull:
+            with self._lock:
+                self.rejected += 1
+            raise QueueFullError("Search queue is full") from None
+        return await future
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            started = time.perf_counter()
+            delays = [started - enqueued for enqueued, _, _ in batch]
+            self._record(delays)
+            try:
+                results = await loop.run_in_executor(None, self.process, [item for _, item, _ in batch])
+            except Exception as exc:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for (_, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def _record(self, delays: List[float]) -> None:
+        with self._lock:
+            self.batches += 1
+            self.items += len(delays)
+            self.queue_delay_total += sum(delays)
+            self.queue_delay_max = max(self.queue_delay_max, max(delays))
+        if self.on_batch is not None:
+            self.on_batch(delays)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "maxBatchSize": self.max_batch_size,
+                "maxWaitMs": self.max_wait * 1000.0,
+                "maxQueueDepth": self.max_queue_depth,
+                "queued": self._queue.qsize() if self._queue is not None else 0,
+                "batches": self.batches,
+                "items": self.items,
+                "rejected": self.rejected,
+                "meanBatchSize": self.items / self.batches if self.batches else 0.0,
+                "meanQueueDelayMs": 1000.0 * self.queue_delay_total / self.items if self.items else 0.0,
+                "maxQueueDelayMs": 1000.0 * self.queue_delay_max,
+            }
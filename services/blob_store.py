@@ -0,0 +1,126 @@
+"""Packed snippet full-text store.
+
+The extractors write every snippet's full text into one data file,
+``blobs.pack``, plus a JSON index ``blobs.pack.json`` listing each record's
+snippet id, byte offset, stored length and whether it is zlib-compressed.
+``build_index.py`` links the pair into each index generation and the vector
+server maps the data file read-only, so ``/search?include_text=true``
+returns full text without opening one file per result.
+
+Both files are written under temporary names and renamed into place, data
+file first; a reader that already mapped the old pair keeps it (the rename
+does not touch the open inode).
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import shutil
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+FORMAT_VERSION = 1
+PACK_FILE = "blobs.pack"
+# Records shorter than this are stored raw; zlib rarely pays off below it.
+MIN_COMPRESS_BYTES = 256
+
+
+def index_path(pack_path: Path) -> Path:
+    return pack_path.with_name(pack_path.name + ".json")
+
+
+def write_blob_pack(pack_path: Path, records: Iterable[Tuple[str, str]], compress: bool = True) -> Dict[str, int]:
+    """Write ``(snippet_id, text)`` records to ``pack_path`` and its index."""
+    ids: List[str] = []
+    offsets: List[int] = []
+    lengths: List[int] = []
+    compressed: List[int] = []
+    position = raw_bytes = 0
+    tmp_pack = pack_path.with_name(pack_path.name + ".tmp")
+    with tmp_pack.open("wb") as fh:
+        for snippet_id, text in records:
+            payload = text.encode("utf-8")
+            raw_bytes += len(payload)
+            packed = 0
+            if compress and len(payload) >= MIN_COMPRESS_BYTES:
+                deflated = zlib.compress(payload, 6)
+                if len(deflated) < len(payload):
+                    payload, packed = deflated, 1
+            fh.write(payload)
+            ids.append(snippet_id)
+            offsets.append(position)
+            lengths.append(len(payload))
+            compressed.append(packed)
+            position += len(payload)
+        fh.flush()
+        os.fsync(fh.fileno())
+
+    tmp_index = index_path(pack_path).with_name(index_path(pack_path).name + ".tmp")
+    with tmp_index.open("w", encoding="utf-8") as fh:
+        json.dump(
+            {
+                "version": FORMAT_VERSION,
+                "ids": ids,
+                "offsets": offsets,
+                "lengths": lengths,
+                "compressed": compressed,
+            },
+            fh,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+    tmp_pack.replace(pack_path)
+    tmp_index.replace(index_path(pack_path))
+    return {"records": len(ids), "rawBytes": raw_bytes, "packedBytes": position}
+
+
+def link_blob_pack(source: Path, target: Path) -> None:
+    """Hard-link (or copy) a pack and its index to ``target``."""
+    for src, dst in ((source, target), (index_path(source), index_path(target))):
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copyfile(src, dst)
+
+
+class BlobStore:
+    """Read side of ``write_blob_pack``: id -> full text via one mmap."""
+
+    def __init__(self, pack_path: Path) -> None:
+        with index_path(pack_path).open("r", encoding="utf-8") as fh:
+            header = json.load(fh)
+        if header.get("version") != FORMAT_VERSION:
+            raise RuntimeError(f"Unsupported blob pack version {header.get('version')}")
+        self._entries: Dict[str, Tuple[int, int, int]] = {
+            snippet_id: (offset, length, packed)
+            for snippet_id, offset, length, packed in zip(
+                header["ids"], header["offsets"], header["lengths"], header["compressed"]
+            )
+        }
+        self._fh = pack_path.open("rb")
+        size = os.fstat(self._fh.fileno()).st_size
+        self._mm: Optional[mmap.mmap] = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, snippet_id: object) -> bool:
+        return snippet_id in self._entries
+
+    def get(self, snippet_id: str) -> Optional[str]:
+        entry = self._entries.get(snippet_id)
+        if entry is None:
+            return None
+        offset, length, packed = entry
+        payload = self._mm[offset : offset + length] if self._mm is not None else b""
+        if packed:
+            payload = zlib.decompress(payload)
+        return payload.decode("utf-8")
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+        self._fh.close()
@@ -0,0 +1,192 @@
+"""Pluggable sentence encoders shared by the vector server and build_index.py.
+
+``torch`` is the reference sentence-transformers model. ``onnx`` and
+``onnx-int8`` run an exported copy of the same model (optionally with
+dynamically quantized int8 weights) through onnxruntime, with the HF
+``tokenizers`` package doing tokenization, so a CPU kiosk never has to
+import torch. ``tools/export_encoder.py`` produces the export directory and
+checks parity against torch on the snippet corpus.
+
+Every backend exposes the subset of the ``SentenceTransformer`` interface
+the callers use: ``encode(...)`` and ``get_sentence_embedding_dimension()``.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+ENCODER_BACKENDS = ("torch", "onnx", "onnx-int8")
+DEFAULT_BACKEND = "torch"
+
+ENCODERS_DIR = "encoders"
+ONNX_FILE = "model.onnx"
+ONNX_INT8_FILE = "model-int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+ENCODER_CONFIG_FILE = "encoder.json"
+
+
+def default_export_dir(data_dir: Path, model_name: str) -> Path:
+    return data_dir / ENCODERS_DIR / model_name.replace("/", "__")
+
+
+def encoder_id(backend: str, model_name: str) -> str:
+    """Identity of the vectors an encoder produces (embedding cache key, manifest field).
+
+    torch keeps the bare model name so existing embedding caches stay valid.
+    """
+    return model_name if backend == "torch" else f"{model_name}+{backend}"
+
+
+class OnnxEncoder:
+    """Mean-pooled transformer encoder running on onnxruntime's CPU provider."""
+
+    def __init__(self, export_dir: Path, quantized: bool = False, threads: Optional[int] = None) -> None:
+        import onnxruntime as ort  # type: ignore
+        from tokenizers import Tokenizer  # type: ignore
+
+        config_path = export_dir / ENCODER_CONFIG_FILE
+        if not config_path.exists():
+            raise RuntimeError(
+                f"No exported encoder in {export_dir}. Run tools/export_encoder.py first."
+            )
+        with config_path.open("r", encoding="utf-8") as fh:
+            self.config: Dict[str, Any] = json.load(fh)
+        model_path = export_dir / (ONNX_INT8_FILE if quantized else ONNX_FILE)
+        if not model_path.exists():
+            raise RuntimeError(f"Missing {model_path}; re-run tools/export_encoder.py without --no-quantize")
+
+        self.model_name: str = self.config["model"]
+        self.max_seq_length: int = self.config["maxSeqLength"]
+        self.normalize: bool = self.config.get("normalize", True)
+        self.tokenizer = Tokenizer.from_file(str(export_dir / TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        self.tokenizer.enable_padding(pad_id=self.config["padId"], pad_token=self.config["padToken"])
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = [node.name for node in self.session.get_inputs()]
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return int(self.config["dim"])
+
+    def encode(
+        self,
+        sentences: Union[str, Sequence[str]],
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+        convert_to_numpy: bool = True,
+        show_progress_bar: bool = False,
+        **_: Any,
+    ) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts: List[str] = [sentences] if single else list(sentences)  # type: ignore[list-item]
+        out = np.empty((len(texts), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        # Longest first so each batch pads to similar lengths.
+        order = sorted(range(len(texts)), key=lambda row: -len(texts[row]))
+        for start in range(0, len(order), batch_size):
+            rows = order[start : start + batch_size]
+            encodings = self.tokenizer.encode_batch([texts[row] for row in rows])
+            ids = np.asarray([encoding.ids for encoding in encodings], dtype=np.int64)
+            mask = np.asarray([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+            feeds = {"input_ids": ids, "attention_mask": mask}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.zeros_like(ids)
+            hidden = self.session.run(None, {name: feeds[name] for name in self.input_names})[0]
+            weights = mask[..., None].astype(np.float32)
+            out[rows] = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        if normalize_embeddings or self.normalize:
+            out /= np.clip(np.linalg.norm(out, axis=1, keepdims=True), 1e-12, None)
+        return out[0] if single else out
+
+
+def load_encoder(
+    backend: str, model_name: str, export_dir: Optional[Path] = None, threads: Optional[int] = None
+) -> Any:
+    """Instantiate ``backend``. torch is imported only when the torch backend is chosen."""
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(model_name, device="cpu")
+    if backend in ("onnx", "onnx-int8"):
+        if export_dir is None:
+            raise ValueError(f"Encoder backend {backend!r} needs an export directory")
+        encoder = OnnxEncoder(export_dir, quantized=backend == "onnx-int8", threads=threads)
+        if encoder.model_name != model_name:
+            raise RuntimeError(
+                f"{export_dir} holds an export of {encoder.model_name}, expected {model_name}"
+            )
+        return encoder
+    raise ValueError(f"Unknown encoder backend {backend!r}; expected one of {', '.join(ENCODER_BACKENDS)}")
+
+
+def export_onnx(model_name: str, out_dir: Path, quantize: bool = True, opset: int = 14) -> Dict[str, Any]:
+    """Export ``model_name`` to ``out_dir`` (fp32 graph, optional int8 graph, tokenizer, config).
+
+    Needs torch, sentence-transformers and onnx; only the build machine runs this.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer, pooling = model[0], model[1]
+    if not getattr(pooling, "pooling_mode_mean_tokens", False):
+        raise RuntimeError(f"{model_name} does not use mean pooling; the ONNX encoder only supports mean pooling")
+    hf_model = transformer.auto_model.eval()
+    hf_tokenizer = transformer.tokenizer
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    hf_tokenizer.backend_tokenizer.save(str(out_dir / TOKENIZER_FILE))
+
+    sample = hf_tokenizer(["export sample", "a second, longer export sample"], padding=True, return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+    class HiddenStates(torch.nn.Module):
+        def __init__(self, inner: Any) -> None:
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, *inputs: Any) -> Any:
+            return self.inner(**dict(zip(input_names, inputs))).last_hidden_state
+
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in [*input_names, "last_hidden_state"]}
+    onnx_path = out_dir / ONNX_FILE
+    with torch.no_grad():
+        torch.onnx.export(
+            HiddenStates(hf_model),
+            tuple(sample[name] for name in input_names),
+            str(onnx_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic  # type: ignore
+
+        quantize_dynamic(str(onnx_path), str(out_dir / ONNX_INT8_FILE), weight_type=QuantType.QInt8)
+
+    config = {
+        "model": model_name,
+        "dim": model.get_sentence_embedding_dimension(),
+        "maxSeqLength": model.max_seq_length,
+        "pooling": "mean",
+        "normalize": any(type(module).__name__ == "Normalize" for module in model),
+        "padId": hf_tokenizer.pad_token_id,
+        "padToken": hf_tokenizer.pad_token,
+        "inputs": input_names,
+        "quantized": quantize,
+        "opset": opset,
+    }
+    tmp_path = out_dir / (ENCODER_CONFIG_FILE + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as fh:
+        json.dump(config, fh, indent=2)
+    tmp_path.replace(out_dir / ENCODER_CONFIG_FILE)
+    return config
@@ -0,0 +1,77 @@
+"""Pre-serialized ``/search`` result fragments.
+
+The first time a snippet is returned, its ``SearchResult`` JSON is rendered
+by pydantic with a placeholder score and kept, split around the score, for
+the rest of the generation's lifetime. A response is then the selected
+fragments with the real scores spliced in, joined inside
+``{"results":[...]}``; scores are formatted by pydantic in one call per
+response. The output is byte-identical to
+``SearchResponse(...).model_dump_json()`` without building a model per hit
+once a row is warm. Rows are never rendered up front, so loading a
+generation costs nothing per snippet.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from pydantic import TypeAdapter
+
+# Must be the first field after ``id`` so no earlier value can contain it.
+SCORE_MARKER = b',"score":0.0,'
+RESULTS_OPEN = b'{"results":['
+RESULTS_CLOSE = b"]}"
+
+_scores = TypeAdapter(List[float])
+
+
+class FragmentStore:
+    """``head`` + score + ``tail`` is the JSON of a row, rendered on first use."""
+
+    def __init__(self, count: int, render_row: Callable[[int], bytes]) -> None:
+        """``render_row(r)`` must return the JSON of row ``r`` with score ``0.0``."""
+        self._render_row = render_row
+        # Racing first hits render the same bytes; the last assignment wins.
+        self._parts: List[Optional[Tuple[bytes, bytes]]] = [None] * count
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._parts)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def parts(self, row: int) -> Tuple[bytes, bytes]:
+        """``(head, tail)`` of row ``row``, rendering it on the first call."""
+        parts = self._parts[row]
+        if parts is None:
+            fragment = self._render_row(row)
+            marker = fragment.find(SCORE_MARKER)
+            if marker < 0:
+                raise ValueError(f"Row {row} JSON has no score placeholder")
+            score_at = marker + len(SCORE_MARKER) - len(b"0.0,")
+            parts = (fragment[:score_at], fragment[score_at + len(b"0.0") :])
+            self._parts[row] = parts
+            self._bytes += len(fragment)
+        return parts
+
+    def render(
+        self, rows: Sequence[int], scores: Sequence[float], tails: Optional[Sequence[bytes]] = None
+    ) -> bytes:
+        """JSON body of a ``SearchResponse`` holding ``rows`` with ``scores``.
+
+        ``tails[i]`` (e.g. ``b',"fullText":"..."'``) is spliced in before the
+        closing brace of result ``i``, matching a subclass that appends fields."""
+        if not len(rows):
+            return RESULTS_OPEN + RESULTS_CLOSE
+        formatted = _scores.dump_json([float(score) for score in scores])[1:-1].split(b",")
+        pieces: List[bytes] = []
+        for pos, (row, score) in enumerate(zip(rows, formatted)):
+            head, tail = self.parts(row)
+            if tails is None:
+                pieces.append(head + score + tail)
+            else:
+                # Drop the closing brace, re-added after the extra fields.
+                pieces.append(head + score + tail[:-1] + tails[pos] + b"}")
+        return RESULTS_OPEN + b",".join(pieces) + RESULTS_CLOSE
@@ -0,0 +1,70 @@
+"""Loading serving indexes so pre-forked workers share their pages.
+
+FAISS can memory-map only some index types: with faiss-cpu 1.7.4
+(``requirements.txt``) ``IO_FLAG_MMAP`` maps the inverted lists of IVF
+indexes, while flat and HNSW indexes are read onto every worker's heap.
+Flat generations, the default, hold nothing ``snippets_embs.npy`` does not,
+so they are served by ``MappedFlatIndex``: exact inner-product search over
+the read-only mapped embedding file, whose pages live in the page cache and
+are shared by every worker.
+"""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import faiss  # type: ignore
+import numpy as np
+
+logger = logging.getLogger("vector-server")
+
+# Embedding rows scored per matrix product; bounds the temporary score matrix
+# to queries x SEARCH_BLOCK floats however large the corpus is.
+SEARCH_BLOCK = 65536
+
+
+class MappedFlatIndex:
+    """The part of the ``faiss.IndexFlatIP`` interface the server uses, over
+    a (memory-mapped) ``(ntotal, d)`` float32 matrix of unit vectors."""
+
+    metric_type = faiss.METRIC_INNER_PRODUCT
+
+    def __init__(self, vectors: np.ndarray) -> None:
+        self.vectors = vectors
+        self.ntotal, self.d = vectors.shape
+
+    def search(self, queries: np.ndarray, k: int, params: Optional[Any] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-``k`` scores and rows per query, padded with ``-1`` like FAISS."""
+        count = len(queries)
+        best_scores = np.full((count, k), -np.inf, dtype=np.float32)
+        best_ids = np.full((count, k), -1, dtype=np.int64)
+        for start in range(0, self.ntotal, SEARCH_BLOCK):
+            scores = queries @ self.vectors[start : start + SEARCH_BLOCK].T
+            ids = np.broadcast_to(np.arange(start, start + scores.shape[1], dtype=np.int64), scores.shape)
+            scores = np.concatenate([best_scores, scores], axis=1)
+            ids = np.concatenate([best_ids, ids], axis=1)
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            best_scores = np.take_along_axis(scores, top, axis=1)
+            best_ids = np.take_along_axis(ids, top, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        return np.take_along_axis(best_scores, order, axis=1), np.take_along_axis(best_ids, order, axis=1)
+
+
+def read_index(path: Path) -> faiss.Index:
+    """Read a FAISS index, mapping it read-only when the index type allows."""
+    flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+    try:
+        return faiss.read_index(str(path), flags)
+    except RuntimeError:
+        logger.info("Index type cannot be memory-mapped, reading into memory")
+        return faiss.read_index(str(path))
+
+
+def apply_search_params(index: faiss.Index, params: Dict[str, Any]) -> None:
+    """Set the build-time ``nprobe``/``efSearch`` recorded in the index spec."""
+    space = faiss.ParameterSpace()
+    for name in ("nprobe", "efSearch"):
+        if params.get(name):
+            space.set_index_parameter(index, name, params[name])
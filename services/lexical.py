@@ -0,0 +1,149 @@
+"""BM25 inverted index built by build_index.py and queried by the vector server.
+
+Postings are stored CSR-style: ``offsets[t]:offsets[t + 1]`` slices
+``docs`` (int32 row numbers, ascending) and ``weights`` (float32 BM25 term
+weight ``tf * (k1 + 1) / (tf + k1 * (1 - b + b * len / avglen))``, already
+multiplied by the term's idf). A query is therefore a dictionary lookup per
+token, one concatenation of the matching slices and a ``bincount`` — no
+Python loop over postings, so exact-term queries (course codes, surnames,
+"ICDCA 2026") cost tens of microseconds on the kiosk corpus.
+
+The vocabulary is stored like a ``meta_store`` column: the UTF-8 terms in
+term-id order concatenated in ``vocab_data``, with ``vocab_offsets[t]:
+vocab_offsets[t + 1]`` the bytes of term ``t``. A fixed-width string array
+would pad every term to the longest token in the corpus.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+FORMAT_VERSION = 2
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+def build_lexical_index(path: Path, documents: Iterable[str], k1: float = 1.2, b: float = 0.75) -> Dict[str, int]:
+    """Write the BM25 index for ``documents`` (row order == index order) to ``path``."""
+    vocab: Dict[str, int] = {}
+    term_ids: List[int] = []
+    doc_ids: List[int] = []
+    freqs: List[int] = []
+    lengths: List[int] = []
+    for row, text in enumerate(documents):
+        tokens = tokenize(text)
+        lengths.append(len(tokens))
+        for term, count in Counter(tokens).items():
+            term_ids.append(vocab.setdefault(term, len(vocab)))
+            doc_ids.append(row)
+            freqs.append(count)
+
+    count = len(lengths)
+    terms = np.asarray(term_ids, dtype=np.int64)
+    docs = np.asarray(doc_ids, dtype=np.int32)
+    tf = np.asarray(freqs, dtype=np.float32)
+    doc_len = np.asarray(lengths, dtype=np.float32)
+    avg_len = float(doc_len.mean()) if count and doc_len.sum() else 1.0
+
+    order = np.lexsort((docs, terms))
+    terms, docs, tf = terms[order], docs[order], tf[order]
+    postings_per_term = np.bincount(terms, minlength=len(vocab))
+    offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(postings_per_term)
+    df = postings_per_term.astype(np.float32)
+    idf = np.log1p((count - df + 0.5) / (df + 0.5)).astype(np.float32)
+    norm = k1 * (1.0 - b + b * doc_len[docs] / avg_len)
+    weights = (idf[terms] * tf * (k1 + 1.0) / (tf + norm)).astype(np.float32)
+
+    # Vocabulary in term-id order; the reader rebuilds the dict once at load.
+    encoded: List[bytes] = [b""] * len(vocab)
+    for term, term_id in vocab.items():
+        encoded[term_id] = term.encode("utf-8")
+    vocab_offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    vocab_offsets[1:] = np.cumsum([len(term) for term in encoded])
+    tmp_path = path.with_name(path.name + ".tmp.npz")
+    np.savez(
+        tmp_path,
+        version=np.asarray(FORMAT_VERSION),
+        count=np.asarray(count),
+        vocab_data=np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        vocab_offsets=vocab_offsets,
+        offsets=offsets,
+        docs=docs,
+        weights=weights,
+    )
+    tmp_path.replace(path)
+    return {"documents": count, "terms": len(vocab), "postings": int(docs.size)}
+
+
+class LexicalIndex:
+    """Read side of ``build_lexical_index``."""
+
+    def __init__(self, path: Path) -> None:
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data["version"])
+            if version not in (1, FORMAT_VERSION):
+                raise RuntimeError(f"Unsupported lexical index version {version}")
+            self.count = int(data["count"])
+            self.offsets = data["offsets"]
+            self.docs = data["docs"]
+            self.weights = data["weights"]
+            if version == 1:
+                vocabulary: List[str] = data["vocabulary"].tolist()
+            else:
+                raw = data["vocab_data"].tobytes()
+                bounds = data["vocab_offsets"].tolist()
+                vocabulary = [raw[start:end].decode("utf-8") for start, end in zip(bounds[:-1], bounds[1:])]
+            self.terms: Dict[str, int] = {term: term_id for term_id, term in enumerate(vocabulary)}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def search(self, query: str, k: int, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-``k`` ``(scores, rows)`` by BM25, optionally restricted to sorted ``rows``."""
+        slices = []
+        for term in set(tokenize(query)):
+            term_id = self.terms.get(term)
+            if term_id is not None:
+                slices.append((self.offsets[term_id], self.offsets[term_id + 1]))
+        if not slices:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        docs = np.concatenate([self.docs[start:end] for start, end in slices])
+        weights = np.concatenate([self.weights[start:end] for start, end in slices])
+        candidates, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights).astype(np.float32)
+        if rows is not None:
+            keep = np.isin(candidates, rows, assume_unique=True)
+            candidates, scores = candidates[keep], scores[keep]
+        if k < candidates.size:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(candidates.size)
+        order = top[np.argsort(-scores[top], kind="stable")]
+        return scores[order], candidates[order].astype(np.int64)
+
+
+def reciprocal_rank_fusion(
+    rankings: List[Tuple[np.ndarray, float]], k: int, rrf_k: float = 60.0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Fuse ``(rows, weight)`` rankings: score = sum(weight / (rrf_k + rank)), rank from 1."""
+    fused: Dict[int, float] = {}
+    for rows, weight in rankings:
+        if weight <= 0:
+            continue
+        for rank, row in enumerate(rows.tolist(), start=1):
+            if row >= 0:
+                fused[row] = fused.get(row, 0.0) + weight / (rrf_k + rank)
+    best = sorted(fused.items(), key=lambda item: (-item[1], item[0]))[:k]
+    return (
+        np.asarray([score for _, score in best], dtype=np.float32),
+        np.asarray([row for row, _ in best], dtype=np.int64),
+    )
@@ -0,0 +1,292 @@
+"""Columnar, memory-mapped snippet metadata store.
+
+``tools/build_index.py`` writes ``snippets_meta.cols`` next to the FAISS
+index and ``services/vector_server.py`` maps it read-only, so several
+uvicorn workers share the same pages through the OS page cache and a field
+is only decoded when a result actually needs it.
+
+File layout (all integers little-endian)::
+
+    b"KSMETA01"              magic
+    uint64                   header length in bytes
+    header JSON              count, column table, section labels, aliases
+    padding to 8 bytes
+    data blocks              each 8-byte aligned, offsets relative to here
+
+Every column is an ``int64[count + 1]`` offset table plus a UTF-8 data
+block. ``str`` columns hold raw text and a ``uint8`` null mask, ``json``
+columns hold compact JSON with an empty slice meaning null. Two derived
+blocks speed up filtering without decoding strings: ``section_codes``
+(``int32[count]`` indexes into ``header["sections"]``) and ``id_order``
+(``int64[count]`` rows sorted by snippet id, for binary search). The
+header's ``aliases`` maps the ids of near-duplicate snippets collapsed by
+``build_index.py`` (``metadata.aliasIds``) to their canonical row, so id
+filters built from ``snippets.db`` still match.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+MAGIC = b"KSMETA01"
+FORMAT_VERSION = 1
+
+
+def _align(value: int) -> int:
+    return (value + 7) & ~7
+
+
+def alias_rows(snippets: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    """Row of the canonical snippet for every id listed in ``metadata.aliasIds``."""
+    aliases: Dict[str, int] = {}
+    for row, snippet in enumerate(snippets):
+        metadata = snippet.get("metadata")
+        if isinstance(metadata, dict):
+            for alias in metadata.get("aliasIds") or []:
+                aliases[str(alias)] = row
+    return aliases
+
+
+def write_meta_store(path: Path, snippets: List[Dict[str, Any]]) -> None:
+    """Serialize ``snippets`` (row order == index order) to ``path``."""
+    count = len(snippets)
+    fields: List[str] = []
+    for snippet in snippets:
+        for key in snippet:
+            if key not in fields:
+                fields.append(key)
+
+    blocks: List[bytes] = []
+    position = 0
+
+    def add_block(payload: bytes) -> int:
+        nonlocal position
+        start = position
+        blocks.append(payload)
+        padded = _align(len(payload))
+        if padded != len(payload):
+            blocks.append(b"\0" * (padded - len(payload)))
+        position += padded
+        return start
+
+    columns: Dict[str, Dict[str, Any]] = {}
+    for field in fields:
+        values = [snippet.get(field) for snippet in snippets]
+        kind = "str" if all(value is None or isinstance(value, str) for value in values) else "json"
+        offsets = np.zeros(count + 1, dtype="<i8")
+        chunks: List[bytes] = []
+        nulls = np.zeros(count, dtype=np.uint8)
+        total = 0
+        for row, value in enumerate(values):
+            if value is None:
+                nulls[row] = 1
+                encoded = b""
+            elif kind == "str":
+                encoded = value.encode("utf-8")
+            else:
+                encoded = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            chunks.append(encoded)
+            total += len(encoded)
+            offsets[row + 1] = total
+        column: Dict[str, Any] = {
+            "kind": kind,
+            "offsets": add_block(offsets.tobytes()),
+            "data": add_block(b"".join(chunks)),
+        }
+        if kind == "str":
+            column["nulls"] = add_block(nulls.tobytes())
+        columns[field] = column
+
+    sections: List[str] = []
+    section_index: Dict[str, int] = {}
+    codes = np.zeros(count, dtype="<i4")
+    for row, snippet in enumerate(snippets):
+        label = snippet.get("section") or ""
+        if label not in section_index:
+            section_index[label] = len(sections)
+            sections.append(label)
+        codes[row] = section_index[label]
+    section_block = add_block(codes.tobytes())
+
+    id_order = np.asarray(
+        sorted(range(count), key=lambda row: str(snippets[row].get("id") or "")), dtype="<i8"
+    )
+    id_order_block = add_block(id_order.tobytes())
+
+    header = json.dumps(
+        {
+            "version": FORMAT_VERSION,
+            "count": count,
+            "columns": columns,
+            "sections": sections,
+            "section_codes": section_block,
+            "id_order": id_order_block,
+            "aliases": alias_rows(snippets),
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+    prefix = MAGIC + struct.pack("<Q", len(header)) + header
+    prefix += b"\0" * (_align(len(prefix)) - len(prefix))
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("wb") as fh:
+        fh.write(prefix)
+        for block in blocks:
+            fh.write(block)
+    tmp_path.replace(path)
+
+
+class MetaStore:
+    """Read-only view over a ``snippets_meta.cols`` file."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with path.open("rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:8] != MAGIC:
+            raise RuntimeError(f"{path} is not a snippet metadata store")
+        (header_len,) = struct.unpack_from("<Q", self._mm, 8)
+        header = json.loads(self._mm[16 : 16 + header_len])
+        if header.get("version") != FORMAT_VERSION:
+            raise RuntimeError(f"Unsupported metadata store version {header.get('version')}")
+        self._base = _align(16 + header_len)
+        self._count: int = header["count"]
+        self._columns: Dict[str, Dict[str, Any]] = header["columns"]
+        self._offsets = {
+            name: self._array(column["offsets"], "<i8", self._count + 1)
+            for name, column in self._columns.items()
+        }
+        self._nulls = {
+            name: self._array(column["nulls"], np.uint8, self._count)
+            for name, column in self._columns.items()
+            if "nulls" in column
+        }
+        self.sections: List[str] = header["sections"]
+        self._section_codes = self._array(header["section_codes"], "<i4", self._count)
+        self._id_order = self._array(header["id_order"], "<i8", self._count)
+        self._aliases: Dict[str, int] = header.get("aliases", {})
+        self._section_rows: Dict[str, np.ndarray] = {}
+
+    def _array(self, offset: int, dtype: Any, count: int) -> np.ndarray:
+        return np.frombuffer(self._mm, dtype=dtype, count=count, offset=self._base + offset)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self._columns)
+
+    def value(self, row: int, field: str) -> Any:
+        column = self._columns.get(field)
+        if column is None:
+            return None
+        nulls = self._nulls.get(field)
+        if nulls is not None and nulls[row]:
+            return None
+        offsets = self._offsets[field]
+        start = self._base + column["data"] + int(offsets[row])
+        end = self._base + column["data"] + int(offsets[row + 1])
+        raw = self._mm[start:end]
+        if column["kind"] == "str":
+            return raw.decode("utf-8")
+        return json.loads(raw) if raw else None
+
+    def record(self, row: int) -> Dict[str, Any]:
+        record: Dict[str, Any] = {}
+        for field in self._columns:
+            value = self.value(row, field)
+            if value is not None:
+                record[field] = value
+        return record
+
+    def __iter__(self):
+        for row in range(self._count):
+            yield self.record(row)
+
+    def section_rows(self, section: str) -> np.ndarray:
+        rows = self._section_rows.get(section)
+        if rows is None:
+            try:
+                code = self.sections.index(section)
+            except ValueError:
+                return np.empty(0, dtype=np.int64)
+            rows = np.flatnonzero(self._section_codes == code).astype(np.int64)
+            self._section_rows[section] = rows
+        return rows
+
+    def row_for_id(self, snippet_id: str) -> Optional[int]:
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            row = int(self._id_order[mid])
+            current = self.value(row, "id") or ""
+            if current < snippet_id:
+                lo = mid + 1
+            elif current > snippet_id:
+                hi = mid
+            else:
+                return row
+        return self._aliases.get(snippet_id)
+
+    def rows_for_ids(self, snippet_ids: Iterable[str]) -> np.ndarray:
+        rows = [self.row_for_id(snippet_id) for snippet_id in snippet_ids]
+        return np.unique(np.asarray([row for row in rows if row is not None], dtype=np.int64))
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+class ListMetaStore:
+    """Same interface over the legacy ``snippets_meta.json`` list of dicts."""
+
+    def __init__(self, records: List[Dict[str, Any]]) -> None:
+        self._records = records
+        self._id_to_row: Dict[str, int] = {}
+        section_lists: Dict[str, List[int]] = {}
+        for row, record in enumerate(records):
+            if record.get("id") is not None:
+                self._id_to_row[record["id"]] = row
+            section_lists.setdefault(record.get("section") or "", []).append(row)
+        for alias, row in alias_rows(records).items():
+            self._id_to_row.setdefault(alias, row)
+        self.sections = list(section_lists)
+        self._section_rows = {
+            section: np.asarray(rows, dtype=np.int64) for section, rows in section_lists.items()
+        }
+
+    @classmethod
+    def from_json(cls, path: Path) -> "ListMetaStore":
+        with path.open("r", encoding="utf-8") as fh:
+            return cls(json.load(fh))
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def value(self, row: int, field: str) -> Any:
+        return self._records[row].get(field)
+
+    def record(self, row: int) -> Dict[str, Any]:
+        return self._records[row]
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def section_rows(self, section: str) -> np.ndarray:
+        return self._section_rows.get(section, np.empty(0, dtype=np.int64))
+
+    def row_for_id(self, snippet_id: str) -> Optional[int]:
+        return self._id_to_row.get(snippet_id)
+
+    def rows_for_ids(self, snippet_ids: Iterable[str]) -> np.ndarray:
+        rows = [self._id_to_row[value] for value in snippet_ids if value in self._id_to_row]
+        return np.unique(np.asarray(rows, dtype=np.int64))
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,146 @@
+"""Passage-level vectors for long snippets.
+
+A snippet is embedded as its head text (title, summary, aliases, tags) plus,
+when the blob full text is longer than that, overlapping passages of at most
+``max_tokens`` encoder tokens, each prefixed with the snippet title. Every
+vector row records its parent snippet row in ``snippets_passages.npy``;
+passages of one snippet are contiguous and parents ascend, so
+``parent_offsets`` gives a CSR view from snippet rows to vector rows.
+
+Token counts come from the encoder's own tokenizer, applied per
+whitespace-separated word (WordPiece never merges across whitespace, so the
+per-word counts add up to the count for the whole text).
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+TokenCounter = Callable[[str], int]
+
+# [CLS] and [SEP] are added around every encoder input.
+SPECIAL_TOKENS = 2
+PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def token_counter(model: Any) -> TokenCounter:
+    """Per-word token counter backed by ``model``'s tokenizer, memoized.
+
+    Falls back to counting word and punctuation pieces when the encoder
+    exposes no tokenizer."""
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is not None and hasattr(tokenizer, "tokenize"):  # transformers tokenizer (torch backend)
+        raw = lambda word: len(tokenizer.tokenize(word))  # noqa: E731
+    elif tokenizer is not None and hasattr(tokenizer, "encode"):  # tokenizers.Tokenizer (ONNX backends)
+        raw = lambda word: len(tokenizer.encode(word, add_special_tokens=False).ids)  # noqa: E731
+    else:
+        raw = lambda word: len(PIECE_RE.findall(word))  # noqa: E731
+    counts: Dict[str, int] = {}
+
+    def count(word: str) -> int:
+        value = counts.get(word)
+        if value is None:
+            value = counts[word] = max(1, raw(word))
+        return value
+
+    return count
+
+
+def text_tokens(text: str, count: TokenCounter) -> int:
+    return sum(count(word) for word in text.split()) + SPECIAL_TOKENS
+
+
+def split_passages(text: str, count: TokenCounter, max_tokens: int, overlap: int) -> Iterator[str]:
+    """Yield word windows of at most ``max_tokens`` tokens, each starting with
+    roughly ``overlap`` tokens from the end of the previous window."""
+    words = text.split()
+    costs = [count(word) for word in words]
+    start = 0
+    while start < len(words):
+        end, used = start, 0
+        while end < len(words) and (used + costs[end] <= max_tokens or end == start):
+            used += costs[end]
+            end += 1
+        yield " ".join(words[start:end])
+        if end >= len(words):
+            return
+        back, carried = end, 0
+        while back > start + 1 and carried + costs[back - 1] <= overlap:
+            back -= 1
+            carried += costs[back]
+        start = back
+
+
+def build_passages(
+    titles: List[str],
+    heads: List[str],
+    bodies: List[str],
+    count: TokenCounter,
+    max_tokens: int,
+    overlap: int,
+) -> Tuple[List[str], np.ndarray]:
+    """Return ``(texts, parents)``: each snippet's head text, followed by body
+    passages when the body is not already contained in the head."""
+    texts: List[str] = []
+    parents: List[int] = []
+    for row, (title, head, body) in enumerate(zip(titles, heads, bodies)):
+        texts.append(head)
+        parents.append(row)
+        body = " ".join(body.split())
+        if not body or body in " ".join(head.split()):
+            continue
+        prefix = f"{title}\n" if title else ""
+        budget = max(16, max_tokens - SPECIAL_TOKENS - (text_tokens(title, count) - SPECIAL_TOKENS if title else 0))
+        for passage in split_passages(body, count, budget, min(overlap, budget // 2)):
+            texts.append(prefix + passage)
+            parents.append(row)
+    return texts, np.asarray(parents, dtype=np.int32)
+
+
+def length_buckets(lengths: List[int], bounds: Tuple[int, ...]) -> List[Tuple[int, List[int]]]:
+    """Group positions by the smallest bound holding their token length.
+
+    Returns ``(bound, positions)`` pairs, shortest bucket first; lengths above
+    the last bound land in the last bucket (the encoder truncates them)."""
+    buckets: Dict[int, List[int]] = {}
+    for pos, length in enumerate(lengths):
+        bound = next((limit for limit in bounds if length <= limit), bounds[-1])
+        buckets.setdefault(bound, []).append(pos)
+    return sorted(buckets.items())
+
+
+def parent_offsets(parents: np.ndarray, count: int) -> np.ndarray:
+    """``offsets[r]:offsets[r + 1]`` are the vector rows of snippet row ``r``."""
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(parents, minlength=count))
+    return offsets
+
+
+def expand_rows(offsets: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Vector rows (ascending) belonging to the sorted snippet ``rows``."""
+    starts = offsets[rows]
+    sizes = offsets[rows + 1] - starts
+    if not sizes.sum():
+        return np.empty(0, dtype=np.int64)
+    # Per-row ranges without a Python loop: repeat each start, add 0..size-1.
+    within = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    return np.repeat(starts, sizes) + within
+
+
+def collapse_to_parents(
+    scores: np.ndarray, vector_rows: np.ndarray, parents: Optional[np.ndarray], k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Best-scoring passage per snippet, top ``k`` snippets. ``scores`` must be
+    sorted descending; ``-1`` rows (FAISS padding) are dropped."""
+    valid = vector_rows >= 0
+    scores, vector_rows = scores[valid], vector_rows[valid]
+    if parents is None:
+        return scores[:k], vector_rows[:k].astype(np.int64)
+    owners = parents[vector_rows]
+    _, first = np.unique(owners, return_index=True)
+    first.sort()
+    first = first[:k]
+    return scores[first], owners[first].astype(np.int64)
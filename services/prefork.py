@@ -0,0 +1,123 @@
+"""Pre-fork supervisor for running the vector server on several cores.
+
+The parent process loads everything expensive once (``preload``), binds the
+listening socket, freezes the garbage collector's view of the loaded objects
+and then forks ``workers`` children that each run their own uvicorn event
+loop on the inherited socket. Model weights and the FAISS index are
+therefore shared copy-on-write (or through the page cache for memory-mapped
+artifacts) instead of being loaded once per worker. The parent never serves requests; it restarts workers that exit and
+forwards SIGTERM/SIGINT to them on shutdown.
+
+POSIX only (``os.fork``). Nothing in the parent may start threads or run
+OpenMP/torch work before forking: thread pools do not survive ``fork``.
+"""
+
+from __future__ import annotations
+
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger("vector-server")
+
+# A worker that dies sooner than this after being forked is restarted only
+# after a pause, so a crash at startup does not turn into a fork loop.
+MIN_WORKER_UPTIME = 5.0
+RESTART_DELAY = 1.0
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def serve(
+    app: Any,
+    host: str,
+    port: int,
+    workers: int,
+    preload: Callable[[], None],
+    init_worker: Callable[[int], None],
+    log_level: str = "info",
+) -> None:
+    """Load shared state with ``preload``, then fork and supervise ``workers`` uvicorn processes.
+
+    ``init_worker(slot)`` runs in each child right after the fork, before the
+    app's startup handlers."""
+    import uvicorn
+
+    if not hasattr(os, "fork"):
+        raise RuntimeError("Pre-fork serving needs os.fork; run a single uvicorn process on this platform")
+
+    preload()
+    sock = bind_socket(host, port)
+    # Objects loaded so far are never collected; keep the collector from
+    # touching (and so un-sharing) their pages in every worker.
+    gc.collect()
+    gc.freeze()
+
+    children: Dict[int, int] = {}
+    started_at: Dict[int, float] = {}
+    stopping = False
+
+    def spawn(slot: int) -> None:
+        pid = os.fork()
+        if pid:
+            children[pid] = slot
+            started_at[slot] = time.monotonic()
+            return
+        # Child: uvicorn installs its own graceful-shutdown handlers.
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        code = 0
+        try:
+            init_worker(slot)
+            config = uvicorn.Config(app, log_level=log_level, lifespan="on")
+            uvicorn.Server(config).run(sockets=[sock])
+        except BaseException:
+            logger.exception("Worker %d crashed", slot)
+            code = 1
+        finally:
+            os._exit(code)
+
+    def stop(signum: int, _frame: Any) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    logger.info("Pre-forking %d workers on %s:%d", workers, host, port)
+    for slot in range(workers):
+        spawn(slot)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        slot = children.pop(pid, None)
+        if slot is None or stopping:
+            continue
+        logger.warning(
+            "Worker %d (pid %d) exited with code %d; restarting", slot, pid, os.waitstatus_to_exitcode(status)
+        )
+        if time.monotonic() - started_at[slot] < MIN_WORKER_UPTIME:
+            time.sleep(RESTART_DELAY)
+        if not stopping:
+            spawn(slot)
+    sock.close()
+    logger.info("All workers stopped")
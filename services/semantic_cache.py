@@ -0,0 +1,142 @@
+"""Semantic result cache for the vector server.
+
+The exact result cache only matches identical (normalized) query text.
+Paraphrases such as "where is the hostel" / "hostel location?" embed to
+nearly the same vector and usually return the same top-k, so this cache
+keeps the embeddings of recent queries in a small exact inner-product FAISS
+index next to their responses. A lookup searches that index with the new
+query's normalized embedding and returns the stored response of the closest
+entry whose cosine similarity is at least ``threshold`` and whose filter key
+(generation, k, filters, mode, ...) is identical.
+
+Entries are evicted least-recently-used once either ``maxsize`` entries or
+``max_bytes`` of stored responses are held. The whole cache is cleared when
+a new index generation is swapped in.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional
+
+import faiss  # type: ignore
+import numpy as np
+
+# Nearest stored queries checked per lookup; a closer entry with other
+# filters must not hide a slightly less similar one that matches.
+PROBE_DEPTH = 8
+
+
+class _Entry(NamedTuple):
+    key: Hashable
+    value: Any
+    nbytes: int
+    stored_at: float
+
+
+class SemanticCache:
+    """Thread-safe embedding-similarity cache bounded by entry count and bytes."""
+
+    def __init__(
+        self,
+        maxsize: int,
+        max_bytes: int,
+        threshold: float,
+        ttl: float = 0.0,
+        sizeof: Callable[[Any], int] = len,
+    ) -> None:
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.threshold = threshold
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._index: Optional[faiss.IndexIDMap2] = None
+        self._next_id = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.max_bytes > 0
+
+    def get(self, key: Hashable, vector: np.ndarray) -> Any:
+        """Response cached for a query within ``threshold`` of ``vector`` under ``key``."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            if self._index is None or not self._entries or self._index.d != vector.shape[-1]:
+                self.misses += 1
+                return None
+            probe = np.ascontiguousarray(vector.reshape(1, -1), dtype=np.float32)
+            scores, ids = self._index.search(probe, min(PROBE_DEPTH, len(self._entries)))
+            now = time.monotonic()
+            for score, entry_id in zip(scores[0], ids[0]):
+                if entry_id < 0 or score < self.threshold:
+                    break
+                entry = self._entries.get(int(entry_id))
+                if entry is None or entry.key != key:
+                    continue
+                if self.ttl and now - entry.stored_at > self.ttl:
+                    self._remove(int(entry_id))
+                    self.evictions += 1
+                    continue
+                self._entries.move_to_end(int(entry_id))
+                self.hits += 1
+                return entry.value
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, vector: np.ndarray, value: Any) -> None:
+        if not self.enabled:
+            return
+        nbytes = self.sizeof(value)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if self._index is None or self._index.d != vector.shape[-1]:
+                self._reset(vector.shape[-1])
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(  # type: ignore[union-attr]
+                np.ascontiguousarray(vector.reshape(1, -1), dtype=np.float32), np.array([entry_id], dtype=np.int64)
+            )
+            self._entries[entry_id] = _Entry(key, value, nbytes, time.monotonic())
+            self._bytes += nbytes
+            while len(self._entries) > self.maxsize or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset(self._index.d if self._index is not None else None)
+
+    def _reset(self, dim: Optional[int]) -> None:
+        self._entries.clear()
+        self._bytes = 0
+        self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim)) if dim else None
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        self._bytes -= entry.nbytes
+        self._index.remove_ids(np.array([entry_id], dtype=np.int64))  # type: ignore[union-attr]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "bytes": self._bytes,
+                "maxBytes": self.max_bytes,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitRate": self.hits / lookups if lookups else 0.0,
+            }
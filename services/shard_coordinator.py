@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""Scatter-gather coordinator for a sharded vector index.
+
+``build_index.py --shards N`` publishes every shard as its own data
+directory (``data/shards/<name>/``) and lists them in ``data/shards.json``.
+Each shard is served by an ordinary ``vector_server.py`` (a local process or
+another node); this app exposes the same ``/search`` and ``/search/batch``
+API, forwards each request to the shards in parallel, and merges their
+top-k lists by score. A shard that does not answer within
+``VECTOR_SHARD_TIMEOUT_MS`` (or fails) is left out and listed under
+``failedShards`` with ``partial: true``.
+
+Vector scores are cosine similarities and merge exactly. BM25 (``lexical``)
+scores use per-shard document statistics and ``hybrid`` scores are per-shard
+RRF scores, so merging those modes is approximate.
+
+Run shards on other nodes and point the coordinator at them:
+
+    VECTOR_SHARD_URLS=http://10.0.0.5:8101,http://10.0.0.6:8101 python services/shard_coordinator.py
+
+or start one local vector server per shard in ``shards.json`` as well:
+
+    python services/shard_coordinator.py --launch
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:  # allow `python services/shard_coordinator.py`
+    sys.path.insert(0, str(BASE_DIR))
+
+from services.artifacts import read_shard_map, shard_dir  # noqa: E402
+from services.metrics import MetricsMiddleware, Registry  # noqa: E402
+
+DATA_DIR = Path(os.environ.get("VECTOR_DATA_DIR", BASE_DIR / "data"))
+# Comma-separated shard base URLs, in shards.json order.
+SHARD_URLS = [url.strip() for url in os.environ.get("VECTOR_SHARD_URLS", "").split(",") if url.strip()]
+SHARD_TIMEOUT = float(os.environ.get("VECTOR_SHARD_TIMEOUT_MS", "500")) / 1000.0
+
+logger = logging.getLogger("shard-coordinator")
+logging.basicConfig(level=logging.INFO, format="[shard-coordinator] %(message)s")
+
+metrics = Registry()
+REQUESTS = metrics.counter("vector_requests_total", "HTTP requests by path and status code.", ("path", "status"))
+REQUEST_SECONDS = metrics.histogram("vector_request_seconds", "End-to-end HTTP request latency.", ("path",))
+SHARD_SECONDS = metrics.histogram("vector_shard_seconds", "Shard response time (answered requests).", ("shard",))
+SHARD_FAILURES = metrics.counter(
+    "vector_shard_failures_total", "Shard requests left out of a response.", ("shard", "reason")
+)
+
+app = FastAPI(title="KSSEM Vector Shard Coordinator", version="1.0.0")
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+app.add_middleware(
+    MetricsMiddleware,
+    requests=REQUESTS,
+    latency=REQUEST_SECONDS,
+    paths=("/search", "/search/batch", "/health", "/livez", "/readyz", "/metrics"),
+)
+
+
+class Shard(NamedTuple):
+    name: str
+    url: str
+    # Sections held by the shard; None when unknown (route every query to it).
+    sections: Optional[FrozenSet[str]]
+
+
+_shards: List[Shard] = []
+_pool: Optional[ThreadPoolExecutor] = None
+
+
+def load_shards(data_dir: Path, urls: List[str]) -> List[Shard]:
+    shard_map = read_shard_map(data_dir)
+    entries: List[Dict[str, Any]] = shard_map["shards"] if shard_map else []
+    if not urls:
+        raise RuntimeError("No shards configured. Set VECTOR_SHARD_URLS or run with --launch.")
+    if entries and len(entries) != len(urls):
+        raise RuntimeError(f"{data_dir / 'shards.json'} lists {len(entries)} shards but {len(urls)} URLs are set")
+    shards: List[Shard] = []
+    for pos, url in enumerate(urls):
+        entry = entries[pos] if entries else {}
+        sections = entry.get("sections")
+        shards.append(
+            Shard(entry.get("name", f"shard-{pos:02d}"), url.rstrip("/"), frozenset(sections) if sections else None)
+        )
+    return shards
+
+
+def fetch_json(url: str, body: Optional[bytes], timeout: float) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    request = urllib.request.Request(
+        url, data=body, headers={"Content-Type": "application/json"} if body is not None else {}
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        payload = json.loads(response.read())
+    return payload, time.perf_counter() - started
+
+
+def failure_reason(exc: BaseException) -> str:
+    if isinstance(exc, urllib.error.HTTPError):
+        return f"HTTP {exc.code}"
+    if isinstance(exc, (TimeoutError, urllib.error.URLError)) and "timed out" in str(exc):
+        return "timeout"
+    return type(exc).__name__
+
+
+def scatter(
+    shards: List[Shard], path: str, body: Optional[bytes] = None
+) -> Tuple[List[Tuple[Shard, Any]], List[Dict[str, str]]]:
+    """Send one request to every shard in parallel and wait at most ``SHARD_TIMEOUT``.
+
+    Returns the shards that answered with their JSON, and the ones left out."""
+    assert _pool is not None
+    futures: Dict["Future[Tuple[Any, float]]", Shard] = {
+        _pool.submit(fetch_json, shard.url + path, body, SHARD_TIMEOUT): shard for shard in shards
+    }
+    _, pending = wait(futures, timeout=SHARD_TIMEOUT)
+    answered: List[Tuple[Shard, Any]] = []
+    failed: List[Dict[str, str]] = []
+    for future, shard in futures.items():
+        if future in pending:
+            future.cancel()
+            reason = "timeout"
+        elif future.exception() is not None:
+            reason = failure_reason(future.exception())  # type: ignore[arg-type]
+        else:
+            payload, elapsed = future.result()
+            SHARD_SECONDS.observe(elapsed, shard.name)
+            answered.append((shard, payload))
+            continue
+        SHARD_FAILURES.inc(1.0, shard.name, reason)
+        failed.append({"shard": shard.name, "error": reason})
+    return answered, failed
+
+
+def merge_results(responses: List[Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
+    """Global top-``k`` of per-shard top-``k`` lists (each already sorted by score)."""
+    results = (result for response in responses for result in response.get("results", []))
+    return heapq.nlargest(k, results, key=lambda result: result["score"])
+
+
+def shards_for(section: Optional[str]) -> List[Shard]:
+    if not section:
+        return _shards
+    return [shard for shard in _shards if shard.sections is None or section in shard.sections]
+
+
+@app.on_event("startup")
+async def startup_event() -> None:
+    global _shards, _pool
+    if not _shards:
+        _shards = load_shards(DATA_DIR, SHARD_URLS)
+    _pool = ThreadPoolExecutor(max_workers=max(8, 4 * len(_shards)), thread_name_prefix="shard")
+    logger.info("Coordinating %d shards: %s", len(_shards), ", ".join(f"{s.name}={s.url}" for s in _shards))
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+
+
+@app.get("/search")
+def search(
+    request: Request,
+    q: str = Query(..., description="Query text"),
+    k: int = Query(5, ge=1, le=50, description="Number of results"),
+    section: Optional[str] = Query(None, description="Restrict results to one section"),
+) -> dict:
+    """Same parameters as the vector server's ``/search``; the query string is forwarded unchanged."""
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query parameter 'q' cannot be empty")
+    answered, failed = scatter(shards_for(section), f"/search?{request.url.query}")
+    return {
+        "results": merge_results([payload for _, payload in answered], k),
+        "partial": bool(failed),
+        "failedShards": failed,
+    }
+
+
+@app.post("/search/batch")
+async def search_batch(request: Request) -> dict:
+    """Forward the batch to every shard and merge each query's results."""
+    body = await request.body()
+    try:
+        queries = json.loads(body)["queries"]
+    except (ValueError, KeyError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail="Expected {\"queries\": [...]}") from exc
+    answered, failed = await run_in_threadpool(scatter, _shards, "/search/batch", body)
+    return {
+        "responses": [
+            {"results": merge_results([payload["responses"][pos] for _, payload in answered], query.get("k", 5))}
+            for pos, query in enumerate(queries)
+        ],
+        "partial": bool(failed),
+        "failedShards": failed,
+    }
+
+
+@app.get("/health")
+def health() -> dict:
+    answered, failed = scatter(_shards, "/health")
+    return {
+        "status": "ok" if not failed else "degraded",
+        "shards": [
+            {
+                "name": shard.name,
+                "url": shard.url,
+                "generation": payload.get("generation"),
+                "vectors": payload.get("vectors"),
+                "snippets": payload.get("snippets"),
+            }
+            for shard, payload in answered
+        ],
+        "failedShards": failed,
+    }
+
+
+@app.get("/livez")
+async def livez() -> dict:
+    return {"status": "alive", "pid": os.getpid()}
+
+
+@app.get("/readyz")
+def readyz() -> dict:
+    """Ready while at least one shard is; missing shards only make results partial."""
+    answered, failed = scatter(_shards, "/readyz")
+    if not answered:
+        raise HTTPException(status_code=503, detail="No shard is ready")
+    return {"status": "ready", "shards": len(answered), "failedShards": failed}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+def launch_local_shards(data_dir: Path, port_base: int) -> List[subprocess.Popen]:
+    """Start one ``vector_server.py`` per shard in ``shards.json`` on consecutive ports."""
+    global _shards
+    shard_map = read_shard_map(data_dir)
+    if not shard_map or not shard_map.get("shards"):
+        raise RuntimeError(f"No {data_dir / 'shards.json'}; run tools/build_index.py --shards N first")
+    processes: List[subprocess.Popen] = []
+    urls: List[str] = []
+    for pos, entry in enumerate(shard_map["shards"]):
+        port = port_base + pos
+        env = {**os.environ, "VECTOR_DATA_DIR": str(shard_dir(data_dir, entry["name"]))}
+        command = [
+            sys.executable,
+            str(BASE_DIR / "services" / "vector_server.py"),
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+        ]
+        logger.info("Starting %s on port %d", entry["name"], port)
+        processes.append(subprocess.Popen(command, env=env))
+        urls.append(f"http://127.0.0.1:{port}")
+    _shards = load_shards(data_dir, urls)
+    return processes
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Scatter-gather coordinator for sharded vector servers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--launch", action="store_true", help="Start a local vector server for every shard")
+    parser.add_argument("--shard-port-base", type=int, default=8101, help="Port of the first --launch shard")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    args = parse_args()
+    children = launch_local_shards(DATA_DIR, args.shard_port_base) if args.launch else []
+    try:
+        uvicorn.run(app, host=args.host, port=args.port, reload=False)
+    finally:
+        for child in children:
+            child.terminate()
+        for child in children:
+            child.wait()
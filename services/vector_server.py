@@ -3,28 +3,124 @@
 
 from __future__ import annotations
 
+import argparse
 import json
 import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, Hashable, List, Literal, NamedTuple, Optional, Set, Tuple, Union
 
 import faiss  # type: ignore
 import numpy as np
 from fastapi import FastAPI, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from sentence_transformers import SentenceTransformer
+from fastapi.responses import PlainTextResponse, Response
+from pydantic import BaseModel, Field, TypeAdapter
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-DATA_DIR = BASE_DIR / "data"
-INDEX_PATH = DATA_DIR / "snippets.index"
-EMB_PATH = DATA_DIR / "snippets_embs.npy"
-META_PATH = DATA_DIR / "snippets_meta.json"
+if str(BASE_DIR) not in sys.path:  # allow `python services/vector_server.py`
+    sys.path.insert(0, str(BASE_DIR))
+
+from services.artifacts import (  # noqa: E402
+    BLOB_PACK_FILE,
+    EMB_FILE,
+    INDEX_FILE,
+    INDEX_PARAMS_FILE,
+    LEXICAL_FILE,
+    META_COLS_FILE,
+    META_JSON_FILE,
+    PASSAGES_FILE,
+    resolve_generation,
+)
+from services.blob_store import BlobStore  # noqa: E402
+from services.batching import MicroBatcher, QueueFullError  # noqa: E402
+from services.encoders import default_export_dir, encoder_id, load_encoder  # noqa: E402
+from services.fragments import FragmentStore  # noqa: E402
+from services.index_io import MappedFlatIndex, apply_search_params, read_index  # noqa: E402
+from services.lexical import LexicalIndex, reciprocal_rank_fusion  # noqa: E402
+from services.meta_store import ListMetaStore, MetaStore  # noqa: E402
+from services.metrics import MetricsMiddleware, Registry  # noqa: E402
+from services.passages import collapse_to_parents, expand_rows, parent_offsets  # noqa: E402
+from services.prefork import serve as prefork_serve  # noqa: E402
+from services.semantic_cache import SemanticCache  # noqa: E402
+
+DATA_DIR = Path(os.environ.get("VECTOR_DATA_DIR", BASE_DIR / "data"))
 MODEL_NAME = "all-MiniLM-L6-v2"
+# torch | onnx | onnx-int8. Pin per deployment; the ONNX backends never import torch.
+ENCODER_BACKEND = os.environ.get("VECTOR_ENCODER", "torch")
+ENCODER_DIR = Path(os.environ.get("VECTOR_ENCODER_DIR", default_export_dir(DATA_DIR, MODEL_NAME)))
+ENCODER_ID = encoder_id(ENCODER_BACKEND, MODEL_NAME)
+CACHE_SIZE = int(os.environ.get("VECTOR_CACHE_SIZE", "1024"))
+CACHE_TTL = float(os.environ.get("VECTOR_CACHE_TTL", "900"))
+# Paraphrase cache: reuse a vector-mode response when a recent query with the same
+# filters embeds within this cosine similarity. Opt-in (e.g. 512); a hit returns
+# results computed for a different query text. Size 0 disables it.
+SEMANTIC_CACHE_SIZE = int(os.environ.get("VECTOR_SEMANTIC_CACHE_SIZE", "0"))
+SEMANTIC_CACHE_MB = float(os.environ.get("VECTOR_SEMANTIC_CACHE_MB", "32"))
+SEMANTIC_CACHE_THRESHOLD = float(os.environ.get("VECTOR_SEMANTIC_CACHE_THRESHOLD", "0.95"))
+RELOAD_INTERVAL = float(os.environ.get("VECTOR_RELOAD_INTERVAL", "5"))
+# Micro-batching of concurrent /search calls; a max batch size of 1 disables it.
+BATCH_MAX_SIZE = int(os.environ.get("VECTOR_BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("VECTOR_BATCH_MAX_WAIT_MS", "2"))
+BATCH_QUEUE_DEPTH = int(os.environ.get("VECTOR_BATCH_QUEUE_DEPTH", "1024"))
+# vector | lexical | hybrid. Hybrid fuses both rankings with reciprocal rank fusion.
+SEARCH_MODE = os.environ.get("VECTOR_SEARCH_MODE", "vector")
+# Candidates taken from each retriever before fusion.
+HYBRID_DEPTH = int(os.environ.get("VECTOR_HYBRID_DEPTH", "50"))
+RRF_K = float(os.environ.get("VECTOR_RRF_K", "60"))
+# Keep each snippet's result JSON after its first hit and splice responses from
+# those fragments instead of building pydantic models per hit (same bytes as
+# model_dump_json; nothing is rendered at load).
+FAST_RESPONSES = os.environ.get("VECTOR_FAST_RESPONSES", "1") != "0"
+# Passage hits fetched per requested snippet before collapsing to parents.
+PASSAGE_OVERFETCH = int(os.environ.get("VECTOR_PASSAGE_OVERFETCH", "4"))
+# Upper bound for the per-request HNSW `ef` (efSearch); larger values are clamped.
+MAX_EF_SEARCH = int(os.environ.get("VECTOR_MAX_EF_SEARCH", "512"))
+# Exact re-scoring: re-rank RESCORE_FACTOR times more ANN candidates by their dot
+# product with snippets_embs.npy. VECTOR_RESCORE=1 turns it on for requests that
+# do not pass `rescore`.
+RESCORE_DEFAULT = os.environ.get("VECTOR_RESCORE", "0") != "0"
+RESCORE_FACTOR = int(os.environ.get("VECTOR_RESCORE_FACTOR", "4"))
+
+# Pre-forked worker processes for `python services/vector_server.py`; 1 runs a
+# single uvicorn process. Threads per worker default to cores // workers.
+WORKERS = int(os.environ.get("VECTOR_WORKERS", "1"))
+WORKER_THREADS = int(os.environ.get("VECTOR_WORKER_THREADS", "0"))
+
+SearchMode = Literal["vector", "lexical", "hybrid"]
 
 logger = logging.getLogger("vector-server")
 logging.basicConfig(level=logging.INFO, format="[vector-server] %(message)s")
 
+metrics = Registry()
+REQUESTS = metrics.counter("vector_requests_total", "HTTP requests by path and status code.", ("path", "status"))
+REQUEST_SECONDS = metrics.histogram("vector_request_seconds", "End-to-end HTTP request latency.", ("path",))
+STAGE_SECONDS = metrics.histogram(
+    "vector_stage_seconds",
+    "Time per search pipeline stage "
+    "(encode/semantic/filter/search/lexical/collect per batch call; cache/serialize per request).",
+    ("stage",),
+)
+QUEUE_SECONDS = metrics.histogram("vector_batch_queue_seconds", "Time a /search request waited for its micro-batch.")
+BATCH_SIZE = metrics.histogram(
+    "vector_batch_size", "Queries per search pipeline call.", buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+RESULT_COUNT = metrics.histogram(
+    "vector_search_results", "Results returned per query.", buckets=(0, 1, 2, 3, 5, 10, 20, 50)
+)
+FILTER_SELECTIVITY = metrics.histogram(
+    "vector_filter_selectivity",
+    "Fraction of the index left after id/section filters (filtered queries only).",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0),
+)
+MODEL_LOAD_SECONDS = metrics.gauge("vector_model_load_seconds", "Time taken to load the embedding model.")
+INDEX_LOAD_SECONDS = metrics.gauge("vector_index_load_seconds", "Time taken to load the serving index generation.")
+
 app = FastAPI(title="KSSEM Vector Server", version="1.0.0")
 app.add_middleware(
     CORSMiddleware,
@@ -32,6 +128,12 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    MetricsMiddleware,
+    requests=REQUESTS,
+    latency=REQUEST_SECONDS,
+    paths=("/search", "/search/batch", "/health", "/livez", "/readyz", "/metrics"),
+)
 
 
 class SearchResult(BaseModel):
@@ -47,108 +149,914 @@ class SearchResult(BaseModel):
     metadata: Optional[dict] = None
 
 
+class SearchResultWithText(SearchResult):
+    fullText: Optional[str] = None
+
+
 class SearchResponse(BaseModel):
     results: List[SearchResult]
 
 
-_model: Optional[SentenceTransformer] = None
-_index: Optional[faiss.Index] = None
-_meta: List[dict] = []
+class SearchResponseWithText(BaseModel):
+    results: List[SearchResultWithText]
 
 
-def ensure_resources() -> None:
-    global _model, _index, _meta
+class BatchQuery(BaseModel):
+    q: str
+    k: int = Field(5, ge=1, le=50)
+    ids: Optional[List[str]] = None
+    section: Optional[str] = None
+    mode: SearchMode = SEARCH_MODE  # type: ignore[assignment]
+    vectorWeight: float = Field(1.0, ge=0)
+    lexicalWeight: float = Field(1.0, ge=0)
+    include_text: bool = False
+    ef: Optional[int] = Field(None, ge=1)
+    rescore: Optional[bool] = None
 
-    if not META_PATH.exists() or not INDEX_PATH.exists():
-        raise RuntimeError(
-            "Missing index artifacts. Run scripts/publish_data.sh to generate snippets.index and snippets_meta.json."
-        )
 
-    if _model is None:
-        logger.info("Loading sentence-transformer model %s", MODEL_NAME)
-        _model = SentenceTransformer(MODEL_NAME)
-
-    if _index is None:
-        logger.info("Loading FAISS index from %s", INDEX_PATH)
-        _index = faiss.read_index(str(INDEX_PATH))
-
-    if not _meta:
-        logger.info("Loading snippet metadata %s", META_PATH)
-        with META_PATH.open("r", encoding="utf-8") as fh:
-            _meta = json.load(fh)
-        if _index.ntotal != len(_meta):
+class BatchSearchRequest(BaseModel):
+    queries: List[BatchQuery] = Field(..., min_length=1, max_length=256)
+
+
+class BatchSearchResponse(BaseModel):
+    responses: List[SearchResponse]
+
+
+# A search response as a model or, on the fast path, its serialized JSON.
+SearchBody = Union[SearchResponse, SearchResponseWithText, bytes]
+
+
+class SearchJob(NamedTuple):
+    query: str
+    k: int
+    id_filter: Optional[Set[str]]
+    section: Optional[str]
+    mode: str = "vector"
+    vector_weight: float = 1.0
+    lexical_weight: float = 1.0
+    include_text: bool = False
+    # HNSW efSearch for this query (None keeps the generation's default).
+    ef: Optional[int] = None
+    rescore: bool = False
+
+
+class LRUCache:
+    """Thread-safe LRU cache with an optional per-entry TTL (seconds, 0 disables)."""
+
+    def __init__(self, maxsize: int, ttl: float = 0.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if self.ttl and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class IndexGeneration:
+    """One published set of index artifacts. Never mutated after loading, so a
+    request that grabbed it keeps a consistent view while a newer generation
+    is swapped in."""
+
+    def __init__(self, generation: str, artifact_dir: Path, manifest: Optional[dict]) -> None:
+        index_path = artifact_dir / INDEX_FILE
+        cols_path = artifact_dir / META_COLS_FILE
+        json_path = artifact_dir / META_JSON_FILE
+        if not (cols_path.exists() or json_path.exists()) or not index_path.exists():
+            raise RuntimeError(
+                "Missing index artifacts. Run scripts/publish_data.sh to generate snippets.index and snippets_meta.json."
+            )
+        self.generation = generation
+        self.artifact_dir = artifact_dir
+        started = time.perf_counter()
+
+        self.params = load_index_params(artifact_dir / INDEX_PARAMS_FILE)
+        emb_path = artifact_dir / EMB_FILE
+        if self.params.get("type", "flat") == "flat" and emb_path.exists():
+            # A flat index is a heap copy of snippets_embs.npy; search the mapped file instead.
+            logger.info("Serving exact search from mapped embeddings %s", emb_path)
+            self.index = MappedFlatIndex(load_embeddings(emb_path, None))
+        else:
+            logger.info("Loading FAISS index from %s", index_path)
+            self.index = read_index(index_path)
+            apply_search_params(self.index, self.params)
+        # HNSW generations built before the inner-product fix use L2; their
+        # squared distances are turned back into cosine scores at search time.
+        self.l2_metric = self.index.metric_type == faiss.METRIC_L2
+        if self.l2_metric:
+            logger.warning("Generation %s uses an L2 index; rebuild it to search by inner product", generation)
+        self.meta = load_meta(cols_path, json_path)
+        self.parents = load_parents(artifact_dir / PASSAGES_FILE, self.index.ntotal, len(self.meta))
+        self.offsets = parent_offsets(self.parents, len(self.meta)) if self.parents is not None else None
+        if self.parents is None and self.index.ntotal != len(self.meta):
             raise RuntimeError(
-                f"Index vector count {_index.ntotal} does not match metadata entries {len(_meta)}"
+                f"Index vector count {self.index.ntotal} does not match metadata entries {len(self.meta)}"
+            )
+        if manifest and manifest.get("vectors") not in (None, self.index.ntotal):
+            raise RuntimeError(
+                f"Manifest lists {manifest['vectors']} vectors but the index holds {self.index.ntotal}"
+            )
+        self.encoder = (manifest or {}).get("encoder") or (manifest or {}).get("model")
+        if self.encoder and self.encoder != ENCODER_ID:
+            logger.warning(
+                "Generation %s was embedded with %s but queries use %s; run tools/export_encoder.py to check parity",
+                generation,
+                self.encoder,
+                ENCODER_ID,
+            )
+        self.embeddings = (
+            self.index.vectors if isinstance(self.index, MappedFlatIndex) else load_embeddings(emb_path, self.index)
+        )
+        self.lexical = load_lexical(artifact_dir / LEXICAL_FILE, len(self.meta))
+        self.blobs = load_blobs(artifact_dir / BLOB_PACK_FILE)
+        self.fragments: Optional[FragmentStore] = None
+        if FAST_RESPONSES:
+            self.fragments = FragmentStore(
+                len(self.meta), lambda row: search_result(self.meta.record(row), 0.0).model_dump_json().encode()
             )
+        self.load_seconds = time.perf_counter() - started
+        self.size_bytes = sum(
+            path.stat().st_size
+            for path in (
+                index_path,
+                cols_path,
+                json_path,
+                artifact_dir / EMB_FILE,
+                artifact_dir / LEXICAL_FILE,
+                artifact_dir / PASSAGES_FILE,
+                artifact_dir / BLOB_PACK_FILE,
+            )
+            if path.exists()
+        )
+
+    def warm_up(self) -> None:
+        """Touch the index pages so the first real query after a swap is not cold."""
+        probe = np.zeros((1, self.index.d), dtype=np.float32)
+        self.index.search(probe, 1)
+
+
+_model: Optional[Any] = None
+_current: Optional[IndexGeneration] = None
+_reload_lock = threading.Lock()
+_stop_watching = threading.Event()
+_embedding_cache = LRUCache(CACHE_SIZE, CACHE_TTL)
+_result_cache = LRUCache(CACHE_SIZE, CACHE_TTL)
+_semantic_cache = SemanticCache(
+    SEMANTIC_CACHE_SIZE,
+    int(SEMANTIC_CACHE_MB * 1024 * 1024),
+    SEMANTIC_CACHE_THRESHOLD,
+    CACHE_TTL,
+    sizeof=lambda response: len(response_json(response)),
+)
+_batcher: Optional["MicroBatcher[SearchJob, SearchBody]"] = None
+# Set once this process has run a warm-up encode and search; cleared on shutdown.
+_ready = threading.Event()
+# Encoder threads for a pre-forked worker (None keeps the library default).
+_encoder_threads: Optional[int] = None
+_optional_str = TypeAdapter(Optional[str])
+
+
+def ensure_resources() -> IndexGeneration:
+    global _model, _current
+
+    if _model is None:
+        logger.info("Loading %s encoder for %s", ENCODER_BACKEND, MODEL_NAME)
+        started = time.perf_counter()
+        _model = load_encoder(ENCODER_BACKEND, MODEL_NAME, ENCODER_DIR, threads=_encoder_threads)
+        MODEL_LOAD_SECONDS.set(time.perf_counter() - started)
+
+    if _current is None:
+        with _reload_lock:
+            if _current is None:
+                _current = IndexGeneration(*resolve_generation(DATA_DIR))
+                INDEX_LOAD_SECONDS.set(_current.load_seconds)
+    return _current
+
+
+def load_index_params(path: Path) -> Dict[str, Any]:
+    """Build-time index description (type, nlist, nprobe, ...) written by build_index.py."""
+    if not path.exists():
+        return {"type": "flat"}
+    with path.open("r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def load_meta(cols_path: Path, json_path: Path) -> Union[MetaStore, ListMetaStore]:
+    if cols_path.exists():
+        logger.info("Mapping columnar snippet metadata %s", cols_path)
+        return MetaStore(cols_path)
+    logger.info("Loading snippet metadata %s", json_path)
+    return ListMetaStore.from_json(json_path)
+
+
+def load_embeddings(path: Path, index: Optional[faiss.Index]) -> np.ndarray:
+    """Map the raw vectors used for exact search over filtered subsets (and,
+    without ``index``, for every search of a flat generation)."""
+    if path.exists():
+        logger.info("Mapping snippet embeddings %s", path)
+        vectors = np.load(path, mmap_mode="r")
+    else:
+        assert index is not None
+        logger.info("%s missing, reconstructing vectors from the index", path)
+        vectors = index.reconstruct_n(0, index.ntotal)
+    if index is not None and vectors.shape[0] != index.ntotal:
+        raise RuntimeError(
+            f"Embedding rows {vectors.shape[0]} do not match index vector count {index.ntotal}"
+        )
+    if vectors.dtype != np.float32:
+        vectors = vectors.astype(np.float32)
+    return vectors
+
+
+def load_parents(path: Path, vectors: int, count: int) -> Optional[np.ndarray]:
+    """Parent snippet row of every vector, or None when each snippet has exactly one vector."""
+    if not path.exists():
+        return None
+    logger.info("Mapping passage parents %s", path)
+    parents = np.load(path, mmap_mode="r")
+    if parents.shape[0] != vectors:
+        raise RuntimeError(f"Passage parents cover {parents.shape[0]} vectors but the index holds {vectors}")
+    if vectors and (parents[-1] >= count or np.any(np.diff(parents) < 0)):
+        raise RuntimeError("Passage parents must ascend and reference existing metadata rows")
+    return parents
+
+
+def load_blobs(path: Path) -> Optional[BlobStore]:
+    """Packed full text for ``include_text``; older generations have none."""
+    if not path.exists():
+        logger.info("%s missing, include_text will read fullTextPath files", path)
+        return None
+    logger.info("Mapping packed blob text %s", path)
+    return BlobStore(path)
+
+
+def load_lexical(path: Path, count: int) -> Optional[LexicalIndex]:
+    """BM25 postings for lexical/hybrid search; generations built before it have none."""
+    if not path.exists():
+        logger.info("%s missing, lexical and hybrid search disabled for this generation", path)
+        return None
+    logger.info("Loading BM25 inverted index %s", path)
+    lexical = LexicalIndex(path)
+    if len(lexical) != count:
+        raise RuntimeError(f"Lexical index covers {len(lexical)} documents but metadata has {count}")
+    return lexical
+
+
+def reload_if_published() -> bool:
+    """Load a newly published generation off the request path and swap it in."""
+    global _current
+    generation, artifact_dir, manifest = resolve_generation(DATA_DIR)
+    if _current is not None and generation == _current.generation:
+        return False
+    with _reload_lock:
+        if _current is not None and generation == _current.generation:
+            return False
+        candidate = IndexGeneration(generation, artifact_dir, manifest)
+        candidate.warm_up()
+        previous = _current.generation if _current else None
+        # Plain reference assignment is atomic; in-flight requests keep the
+        # generation they already hold until they return.
+        _current = candidate
+        INDEX_LOAD_SECONDS.set(candidate.load_seconds)
+    _result_cache.clear()
+    _semantic_cache.clear()
+    logger.info("Swapped index generation %s -> %s (%d vectors)", previous, generation, candidate.index.ntotal)
+    return True
+
+
+def watch_generations() -> None:
+    while not _stop_watching.wait(RELOAD_INTERVAL):
+        try:
+            reload_if_published()
+        except Exception:  # pragma: no cover
+            logger.exception("Failed to load new index generation; still serving the previous one")
+
+
+def warm_up() -> None:
+    """One real encode and search so the first request does not pay for lazy
+    initialization (thread pools, page faults in the model and index)."""
+    gen = ensure_resources()
+    assert _model is not None
+    _model.encode(["warm up"], normalize_embeddings=True, convert_to_numpy=True)
+    gen.warm_up()
 
 
 @app.on_event("startup")
 async def startup_event() -> None:
-    ensure_resources()
+    global _batcher
+    await run_in_threadpool(warm_up)
+    if RELOAD_INTERVAL > 0:
+        threading.Thread(target=watch_generations, name="index-reloader", daemon=True).start()
+    if BATCH_MAX_SIZE > 1:
+        _batcher = MicroBatcher(
+            run_search_jobs, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, BATCH_QUEUE_DEPTH, on_batch=observe_queue_delays
+        )
+        _batcher.start()
+    _ready.set()
+    logger.info("Worker %d ready", os.getpid())
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    global _batcher
+    _ready.clear()
+    _stop_watching.set()
+    if _batcher is not None:
+        await _batcher.stop()
+        _batcher = None
 
 
 @app.get("/health")
 async def health() -> dict:
-    ensure_resources()
-    return {"status": "ok", "vectors": _index.ntotal if _index else 0}
+    gen = ensure_resources()
+    return {
+        "status": "ok",
+        "vectors": gen.index.ntotal,
+        "snippets": len(gen.meta),
+        "generation": gen.generation,
+        "encoder": ENCODER_ID,
+        "index": gen.params,
+        "lexical": gen.lexical is not None,
+        "searchMode": SEARCH_MODE,
+        "cache": {
+            "embeddings": _embedding_cache.stats(),
+            "results": _result_cache.stats(),
+            "semantic": _semantic_cache.stats(),
+        },
+        "batching": _batcher.stats() if _batcher is not None else None,
+    }
+
+
+@app.get("/livez")
+async def livez() -> dict:
+    """Liveness: the event loop of this worker is answering."""
+    return {"status": "alive", "pid": os.getpid()}
+
+
+@app.get("/readyz")
+async def readyz() -> dict:
+    """Readiness: model and index loaded and warmed up, not shutting down."""
+    gen = _current
+    if not _ready.is_set() or gen is None:
+        raise HTTPException(status_code=503, detail="Vector server is not ready")
+    return {"status": "ready", "pid": os.getpid(), "generation": gen.generation}
+
+
+def observe_queue_delays(delays: List[float]) -> None:
+    for delay in delays:
+        QUEUE_SECONDS.observe(delay)
+
+
+def cache_samples() -> List[Tuple[Dict[str, str], float]]:
+    samples: List[Tuple[Dict[str, str], float]] = []
+    for name, cache in (("embeddings", _embedding_cache), ("results", _result_cache), ("semantic", _semantic_cache)):
+        stats = cache.stats()
+        for outcome in ("hits", "misses", "evictions"):
+            samples.append(({"cache": name, "outcome": outcome}, stats[outcome]))
+    return samples
+
+
+def cache_size_samples() -> List[Tuple[Dict[str, str], float]]:
+    return [
+        ({"cache": name}, cache.stats()["size"])
+        for name, cache in (("embeddings", _embedding_cache), ("results", _result_cache), ("semantic", _semantic_cache))
+    ]
+
+
+def index_samples() -> List[Tuple[Dict[str, str], float]]:
+    gen = _current
+    if gen is None:
+        return []
+    labels = {"generation": gen.generation, "type": str(gen.params.get("type", "flat"))}
+    return [({**labels, "unit": "vectors"}, gen.index.ntotal), ({**labels, "unit": "bytes"}, gen.size_bytes)]
+
+
+metrics.collector("vector_cache_events_total", "Query embedding and result cache lookups.", "counter", cache_samples)
+metrics.collector("vector_cache_entries", "Entries held by each cache.", "gauge", cache_size_samples)
+metrics.collector(
+    "vector_semantic_cache_hit_ratio",
+    "Fraction of semantic cache lookups answered by a near-duplicate query.",
+    "gauge",
+    lambda: [({}, _semantic_cache.stats()["hitRate"])],
+)
+metrics.collector("vector_index_size", "Size of the serving index generation.", "gauge", index_samples)
+metrics.collector(
+    "vector_batch_rejected_total",
+    "Requests rejected because the micro-batch queue was full.",
+    "counter",
+    lambda: [({}, _batcher.stats()["rejected"])] if _batcher is not None else [],
+)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+def normalize_query(query: str) -> str:
+    # MiniLM is uncased, so case and whitespace do not change the embedding.
+    return " ".join(query.lower().split())
+
+
+def result_cache_key(gen: IndexGeneration, job: SearchJob) -> Hashable:
+    return (
+        gen.generation,
+        normalize_query(job.query),
+        job.k,
+        frozenset(job.id_filter) if job.id_filter else None,
+        job.section,
+        job.mode,
+        job.vector_weight,
+        job.lexical_weight,
+        job.include_text,
+        job.ef,
+        job.rescore,
+    )
+
+
+def semantic_cache_key(gen: IndexGeneration, job: SearchJob) -> Hashable:
+    """Everything in ``result_cache_key`` except the query text."""
+    key = result_cache_key(gen, job)
+    return key[:1] + key[2:]  # type: ignore[index]
+
+
+def search_ef(ef: Optional[int]) -> Optional[int]:
+    return min(ef, MAX_EF_SEARCH) if ef else None
+
+
+def encode_queries(queries: List[str]) -> np.ndarray:
+    """Return normalized embeddings, encoding only the queries missing from the cache."""
+    assert _model is not None
+    keys = [normalize_query(query) for query in queries]
+    cached = [_embedding_cache.get(key) for key in keys]
+    missing = [pos for pos, vector in enumerate(cached) if vector is None]
+    if missing:
+        try:
+            fresh = _model.encode(
+                [queries[pos] for pos in missing], normalize_embeddings=True, convert_to_numpy=True
+            )
+        except Exception as exc:  # pragma: no cover
+            logger.exception("Failed to encode query")
+            raise HTTPException(status_code=500, detail=f"Embedding failure: {exc}") from exc
+        for pos, vector in zip(missing, fresh):
+            cached[pos] = vector
+            _embedding_cache.put(keys[pos], vector)
+    return np.vstack(cached).astype(np.float32, copy=False)
+
+
+def allowed_rows(
+    gen: IndexGeneration, id_filter: Optional[Set[str]], section: Optional[str]
+) -> Optional[np.ndarray]:
+    """Sorted row numbers permitted by the filters, or None when unfiltered."""
+    if not id_filter and not section:
+        return None
+    rows: Optional[np.ndarray] = None
+    if id_filter:
+        rows = gen.meta.rows_for_ids(id_filter)
+    if section:
+        section_rows = gen.meta.section_rows(section)
+        rows = section_rows if rows is None else np.intersect1d(rows, section_rows, assume_unique=True)
+    return rows
+
+
+def exact_subset_search(
+    gen: IndexGeneration, vector: np.ndarray, rows: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Exact inner-product top-k snippets restricted to snippet ``rows``; cost
+    is O(vectors of those snippets)."""
+    if gen.offsets is not None:
+        # Keep every passage score so each snippet is ranked by its best passage.
+        rows = expand_rows(gen.offsets, rows)
+        k = rows.size
+    if rows.size == 0:
+        return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+    scores = gen.embeddings[rows] @ vector
+    if k < rows.size:
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(rows.size)
+    order = top[np.argsort(-scores[top], kind="stable")]
+    return scores[order], rows[order]
+
+
+def ann_search(
+    gen: IndexGeneration, vectors: np.ndarray, depth: int, ef: Optional[int]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """One FAISS call; ``ef`` overrides efSearch on HNSW generations and is
+    ignored by the other index types."""
+    params = faiss.SearchParametersHNSW(efSearch=ef) if ef and gen.params.get("type") == "hnsw" else None
+    scores, idxs = gen.index.search(vectors, depth, params=params)
+    if gen.l2_metric:
+        # Unit vectors: |a - b|^2 = 2 - 2 * cos(a, b).
+        scores = 1.0 - scores / 2.0
+    return scores, idxs
+
+
+def rescore_exact(gen: IndexGeneration, vectors: np.ndarray, idxs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Re-rank ANN candidate rows (one row of ``idxs`` per query) by their exact
+    inner product with the stored embeddings. Padding ids (-1) sort last."""
+    valid = idxs >= 0
+    candidates = gen.embeddings[np.where(valid, idxs, 0)]
+    scores = np.einsum("qcd,qd->qc", candidates, vectors)
+    scores[~valid] = -np.inf
+    order = np.argsort(-scores, axis=1, kind="stable")
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(idxs, order, axis=1)
+
+
+def search_vectors(
+    gen: IndexGeneration,
+    embeddings: np.ndarray,
+    jobs: List[SearchJob],
+    ks: List[int],
+    row_filters: List[Optional[np.ndarray]],
+) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Top-k snippet rows per query row. Unfiltered rows share one FAISS call
+    per distinct ``ef`` (repeated with a deeper passage window when too few
+    distinct snippets came back) and, when asked, have their candidates
+    re-scored exactly; filtered rows are scored exactly against their allowed subset so
+    they always get k hits when the subset holds at least k snippets. Passage
+    hits are collapsed to their best-scoring passage per snippet."""
+    hits: List[Tuple[np.ndarray, np.ndarray]] = [None] * len(ks)  # type: ignore[list-item]
+    overfetch = PASSAGE_OVERFETCH if gen.parents is not None else 1
+    depths = [ks[row] * overfetch * (RESCORE_FACTOR if job.rescore else 1) for row, job in enumerate(jobs)]
+    groups: Dict[Optional[int], List[int]] = {}
+    for row, rows in enumerate(row_filters):
+        if rows is None:
+            groups.setdefault(jobs[row].ef, []).append(row)
+    total = gen.index.ntotal
+    for ef, pending in groups.items():
+        while pending:
+            max_depth = min(max(depths[row] for row in pending), total)
+            scores, idxs = ann_search(gen, embeddings[pending], max_depth, ef)
+            rescored = [pos for pos, row in enumerate(pending) if jobs[row].rescore]
+            if rescored:
+                scores[rescored], idxs[rescored] = rescore_exact(gen, embeddings[pending][rescored], idxs[rescored])
+            retry: List[int] = []
+            for pos, row in enumerate(pending):
+                depth = depths[row]
+                hits[row] = collapse_to_parents(scores[pos][:depth], idxs[pos][:depth], gen.parents, ks[row])
+                # A few long snippets can fill the whole passage window; widen it
+                # until k distinct snippets are found or every vector was seen.
+                if gen.parents is not None and len(hits[row][1]) < ks[row] and depth < total:
+                    depths[row] = min(depth * max(PASSAGE_OVERFETCH, 2), total)
+                    retry.append(row)
+            pending = retry
+    for row, rows in enumerate(row_filters):
+        if rows is not None:
+            scores, idxs = exact_subset_search(gen, embeddings[row], rows, ks[row])
+            hits[row] = collapse_to_parents(scores, idxs, gen.parents, ks[row])
+    return hits
+
+
+def search_lexical(
+    gen: IndexGeneration,
+    jobs: List[SearchJob],
+    row_filters: List[Optional[np.ndarray]],
+    hits: List[Optional[Tuple[np.ndarray, np.ndarray]]],
+) -> None:
+    """Fill in lexical-only hits and fuse hybrid ones in place. A generation
+    without a lexical index contributes an empty BM25 ranking."""
+    for pos, job in enumerate(jobs):
+        if job.mode == "vector":
+            continue
+        if gen.lexical is not None:
+            depth = job.k if job.mode == "lexical" else max(job.k, HYBRID_DEPTH)
+            lexical_hits = gen.lexical.search(job.query, depth, row_filters[pos])
+        else:
+            lexical_hits = (np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64))
+        if job.mode == "lexical":
+            hits[pos] = lexical_hits
+        else:
+            vector_hits = hits[pos]
+            assert vector_hits is not None
+            hits[pos] = reciprocal_rank_fusion(
+                [(vector_hits[1], job.vector_weight), (lexical_hits[1], job.lexical_weight)], job.k, RRF_K
+            )
+
+
+def search_result(meta: Dict[str, Any], score: float) -> SearchResult:
+    return SearchResult(
+        id=meta.get("id"),
+        score=score,
+        shortSummary=meta.get("shortSummary"),
+        section=meta.get("section"),
+        fullTextPath=meta.get("fullTextPath"),
+        updatedAt=meta.get("updatedAt"),
+        sourcePath=meta.get("sourcePath"),
+        title=meta.get("title"),
+        tags=meta.get("tags"),
+        metadata=meta.get("metadata"),
+    )
+
+
+def full_text(gen: IndexGeneration, row: int) -> Optional[str]:
+    """Blob text for ``row`` from the mapped pack; generations built before the
+    pack fall back to reading ``fullTextPath``."""
+    snippet_id = gen.meta.value(row, "id")
+    if gen.blobs is not None:
+        return gen.blobs.get(snippet_id)
+    path = gen.meta.value(row, "fullTextPath")
+    if not path or gen.meta.value(row, "blobType") == "media":
+        return None
+    try:
+        return (BASE_DIR / path).read_text(encoding="utf-8")
+    except OSError:
+        return None
+
+
+def collect_results(
+    gen: IndexGeneration, scores: np.ndarray, idxs: np.ndarray, include_text: bool = False
+) -> SearchBody:
+    keep = (idxs >= 0) & (idxs < len(gen.meta))
+    scores, idxs = scores[keep], idxs[keep]
+    RESULT_COUNT.observe(len(idxs))
+    rows = idxs.tolist()
+    texts = [full_text(gen, row) for row in rows] if include_text else None
+    if gen.fragments is not None:
+        tails = [b',"fullText":' + _optional_str.dump_json(text) for text in texts] if texts is not None else None
+        return gen.fragments.render(rows, scores.tolist(), tails)
+    if texts is not None:
+        return SearchResponseWithText(
+            results=[
+                SearchResultWithText(**search_result(gen.meta.record(row), float(score)).model_dump(), fullText=text)
+                for score, row, text in zip(scores, rows, texts)
+            ]
+        )
+    return SearchResponse(
+        results=[search_result(gen.meta.record(row), float(score)) for score, row in zip(scores, rows)]
+    )
+
+
+def run_search_jobs(jobs: List[SearchJob]) -> List[SearchBody]:
+    """Encode all jobs in one model call and search them together."""
+    gen = ensure_resources()
+    BATCH_SIZE.observe(len(jobs))
+    started = time.perf_counter()
+    vector_jobs = [pos for pos, job in enumerate(jobs) if job.mode != "lexical"]
+    embeddings = encode_queries([jobs[pos].query for pos in vector_jobs]) if vector_jobs else None
+    encoded = time.perf_counter()
+    STAGE_SECONDS.observe(encoded - started, "encode")
+
+    # Paraphrases of a recent vector-mode query reuse its response. Hybrid and
+    # lexical rankings depend on the exact terms, so they always search.
+    query_vectors = dict(zip(vector_jobs, embeddings)) if embeddings is not None else {}
+    semantic_hits: Dict[int, SearchBody] = {}
+    if _semantic_cache.enabled:
+        for pos in vector_jobs:
+            if jobs[pos].mode == "vector":
+                cached = _semantic_cache.get(semantic_cache_key(gen, jobs[pos]), query_vectors[pos])
+                if cached is not None:
+                    semantic_hits[pos] = cached
+        if semantic_hits:
+            keep = [row for row, pos in enumerate(vector_jobs) if pos not in semantic_hits]
+            vector_jobs = [vector_jobs[row] for row in keep]
+            embeddings = embeddings[keep] if keep else None  # type: ignore[index]
+        STAGE_SECONDS.observe(time.perf_counter() - encoded, "semantic")
+    encoded = time.perf_counter()
+
+    row_filters = [
+        None if pos in semantic_hits else allowed_rows(gen, job.id_filter, job.section) for pos, job in enumerate(jobs)
+    ]
+    filtered = time.perf_counter()
+    STAGE_SECONDS.observe(filtered - encoded, "filter")
+    # allowed_rows returns snippet rows; the index may hold several passages per snippet.
+    total = max(len(gen.meta), 1)
+    for rows in row_filters:
+        if rows is not None:
+            FILTER_SELECTIVITY.observe(rows.size / total)
+
+    hits: List[Optional[Tuple[np.ndarray, np.ndarray]]] = [None] * len(jobs)
+    if embeddings is not None:
+        # Hybrid jobs take a deeper vector ranking so fusion can promote lexical matches.
+        ks = [jobs[pos].k if jobs[pos].mode == "vector" else max(jobs[pos].k, HYBRID_DEPTH) for pos in vector_jobs]
+        vector_hits = search_vectors(
+            gen, embeddings, [jobs[pos] for pos in vector_jobs], ks, [row_filters[pos] for pos in vector_jobs]
+        )
+        for pos, hit in zip(vector_jobs, vector_hits):
+            hits[pos] = hit
+    searched = time.perf_counter()
+    STAGE_SECONDS.observe(searched - filtered, "search")
+
+    search_lexical(gen, jobs, row_filters, hits)
+    fused = time.perf_counter()
+    STAGE_SECONDS.observe(fused - searched, "lexical")
+
+    responses: List[SearchBody] = []
+    for pos, (job, hit) in enumerate(zip(jobs, hits)):
+        if pos in semantic_hits:
+            response = semantic_hits[pos]
+        else:
+            assert hit is not None
+            response = collect_results(gen, *hit, job.include_text)
+            if job.mode == "vector":
+                _semantic_cache.put(semantic_cache_key(gen, job), query_vectors[pos], response)
+        _result_cache.put(result_cache_key(gen, job), response)
+        responses.append(response)
+    STAGE_SECONDS.observe(time.perf_counter() - fused, "collect")
+    return responses
+
+
+def response_json(response: Union[BaseModel, bytes]) -> bytes:
+    return response if isinstance(response, bytes) else response.model_dump_json().encode()
+
+
+def batch_json(responses: List[SearchBody]) -> bytes:
+    """Same bytes as ``BatchSearchResponse(responses=responses).model_dump_json()``."""
+    return b'{"responses":[' + b",".join(response_json(response) for response in responses) + b"]}"
+
+
+def render_response(response: Union[BaseModel, bytes, List[SearchBody]]) -> Response:
+    """Serialize explicitly so the time shows up as its own stage; fast-path
+    bodies are already serialized. A list renders as a ``BatchSearchResponse``.
+
+    The JSON is pydantic's (``model_dump_json``), not the ``json.dumps`` output
+    of FastAPI's default ``JSONResponse``. The two format some floats
+    differently; e.g. ``json.dumps`` writes a NaN or infinite score as
+    ``NaN``/``Infinity`` where pydantic writes ``null``."""
+    started = time.perf_counter()
+    body = batch_json(response) if isinstance(response, list) else response_json(response)
+    rendered = Response(body, media_type="application/json")
+    STAGE_SECONDS.observe(time.perf_counter() - started, "serialize")
+    return rendered
 
 
 @app.get("/search", response_model=SearchResponse)
-def search(
+async def search(
     q: str = Query(..., description="Query text"),
     k: int = Query(5, ge=1, le=50, description="Number of results"),
     ids: Optional[str] = Query(None, description="Comma separated snippet IDs to filter within"),
+    section: Optional[str] = Query(None, description="Restrict results to one section"),
+    mode: SearchMode = Query(SEARCH_MODE, description="vector, lexical (BM25) or hybrid (reciprocal rank fusion)"),
+    vector_weight: float = Query(1.0, ge=0, alias="vectorWeight", description="Hybrid weight of the vector ranking"),
+    lexical_weight: float = Query(1.0, ge=0, alias="lexicalWeight", description="Hybrid weight of the BM25 ranking"),
+    include_text: bool = Query(False, description="Add each result's full blob text as fullText"),
+    ef: Optional[int] = Query(None, ge=1, description=f"HNSW efSearch for this query (capped at {MAX_EF_SEARCH})"),
+    rescore: Optional[bool] = Query(None, description="Re-rank ANN candidates by exact inner product"),
 ):
-    ensure_resources()
-    assert _model is not None and _index is not None
+    gen = ensure_resources()
 
     query = q.strip()
     if not query:
         raise HTTPException(status_code=400, detail="Query parameter 'q' cannot be empty")
 
-    try:
-        embeddings = _model.encode([query], normalize_embeddings=True, convert_to_numpy=True)
-    except Exception as exc:  # pragma: no cover
-        logger.exception("Failed to encode query")
-        raise HTTPException(status_code=500, detail=f"Embedding failure: {exc}") from exc
-
-    scores, idxs = _index.search(embeddings, min(k, _index.ntotal))
     id_filter = None
     if ids:
         id_filter = {value.strip() for value in ids.split(',') if value.strip()}
 
-    results: List[SearchResult] = []
-    for score, idx in zip(scores[0], idxs[0]):
-        if idx < 0 or idx >= len(_meta):
-            continue
-        meta = _meta[idx]
-        if id_filter and meta.get("id") not in id_filter:
-            continue
-        results.append(
-            SearchResult(
-                id=meta.get("id"),
-                score=float(score),
-                shortSummary=meta.get("shortSummary"),
-                section=meta.get("section"),
-                fullTextPath=meta.get("fullTextPath"),
-                updatedAt=meta.get("updatedAt"),
-                sourcePath=meta.get("sourcePath"),
-                title=meta.get("title"),
-                tags=meta.get("tags"),
-                metadata=meta.get("metadata"),
+    job = SearchJob(
+        query,
+        k,
+        id_filter,
+        section,
+        mode,
+        vector_weight,
+        lexical_weight,
+        include_text,
+        search_ef(ef),
+        RESCORE_DEFAULT if rescore is None else rescore,
+    )
+    started = time.perf_counter()
+    cached = _result_cache.get(result_cache_key(gen, job))
+    STAGE_SECONDS.observe(time.perf_counter() - started, "cache")
+    if cached is not None:
+        return render_response(cached)
+
+    if _batcher is None:
+        [response] = await run_in_threadpool(run_search_jobs, [job])
+        return render_response(response)
+    try:
+        return render_response(await _batcher.submit(job))
+    except QueueFullError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+
+@app.post("/search/batch", response_model=BatchSearchResponse)
+def search_batch(request: BatchSearchRequest):
+    """Encode every query in one forward pass and run a single FAISS search."""
+    gen = ensure_resources()
+
+    jobs: List[SearchJob] = []
+    for position, item in enumerate(request.queries):
+        query = item.q.strip()
+        if not query:
+            raise HTTPException(status_code=400, detail=f"Query {position} cannot be empty")
+        id_filter = {value.strip() for value in item.ids if value.strip()} if item.ids else None
+        jobs.append(
+            SearchJob(
+                query,
+                item.k,
+                id_filter,
+                item.section,
+                item.mode,
+                item.vectorWeight,
+                item.lexicalWeight,
+                item.include_text,
+                search_ef(item.ef),
+                RESCORE_DEFAULT if item.rescore is None else item.rescore,
             )
         )
-        if len(results) >= k:
-            break
 
-    return SearchResponse(results=results)
+    started = time.perf_counter()
+    responses: List[Optional[SearchBody]] = [
+        _result_cache.get(result_cache_key(gen, job)) for job in jobs
+    ]
+    STAGE_SECONDS.observe(time.perf_counter() - started, "cache")
+    pending = [row for row, response in enumerate(responses) if response is None]
+    if pending:
+        for row, response in zip(pending, run_search_jobs([jobs[row] for row in pending])):
+            responses[row] = response
+    return render_response(responses)  # type: ignore[arg-type]
+
+
+def preload_shared() -> None:
+    """Pre-fork parent: load what the workers share. ONNX Runtime sessions own
+    thread pools that do not survive fork, so ONNX encoders load per worker."""
+    global _current
+    if ENCODER_BACKEND == "torch":
+        ensure_resources()
+    else:
+        _current = IndexGeneration(*resolve_generation(DATA_DIR))
+        INDEX_LOAD_SECONDS.set(_current.load_seconds)
+
+
+def init_worker(slot: int, workers: int) -> None:
+    """Per-worker thread budget so N workers do not oversubscribe the cores."""
+    global _encoder_threads
+    threads = WORKER_THREADS or max(1, (os.cpu_count() or 1) // workers)
+    _encoder_threads = threads
+    faiss.omp_set_num_threads(threads)
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(threads)
+    logger.info("Worker %d (pid %d) using %d threads", slot, os.getpid(), threads)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve the KSSEM vector index")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument(
+        "--workers", type=int, default=WORKERS, help="Pre-forked worker processes (default VECTOR_WORKERS)"
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app,
-        host="0.0.0.0",
-        port=8001,
-        reload=False,
-    )
+    args = parse_args()
+    if args.workers > 1:
+        prefork_serve(
+            app,
+            args.host,
+            args.port,
+            args.workers,
+            preload=preload_shared,
+            init_worker=lambda slot: init_worker(slot, args.workers),
+        )
+    else:
+        uvicorn.run(app,
+            host=args.host,
+            port=args.port,
+            reload=False,
+        )
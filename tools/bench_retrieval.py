@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""Reproducible retrieval benchmark for the KSSEM vector stack.
+
+For each corpus size this generates a synthetic corpus in the
+``snippets.json`` schema, builds it with every requested
+``build_index.py`` index type and records build time, index size, load
+time (through the vector server's own loader), single-query latency
+percentiles and recall@k against exact search. With ``--server`` it also
+boots ``services/vector_server.py`` on each build and measures end-to-end
+``/search`` QPS at several concurrency levels. Results are written as JSON
+so runs from different releases can be diffed.
+
+Example::
+
+    python tools/bench_retrieval.py --sizes 1000,10000,100000 --server
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+import faiss  # type: ignore
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from services.artifacts import INDEX_FILE, resolve_generation  # noqa: E402
+from tools.build_index import INDEX_TYPES, build_index, index_spec, write_generation  # noqa: E402
+
+SECTIONS = ["about", "admissions", "departments", "placements", "sports", "cultural", "hostel", "leadership"]
+VOCABULARY = (
+    "admission eligibility hostel fees mess placement recruiter package department laboratory faculty "
+    "professor hod principal committee sports cricket football library canteen transport bus scholarship "
+    "syllabus semester examination result calendar holiday conference workshop seminar research project "
+    "internship alumni club cultural fest computer science electronics mechanical civil artificial "
+    "intelligence data business systems campus block floor room contact email phone"
+).split()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark vector index build and search")
+    parser.add_argument("--sizes", default="1000,10000", help="Comma separated corpus sizes (up to 1000000)")
+    parser.add_argument(
+        "--index-types",
+        default=",".join(INDEX_TYPES),
+        help=f"Comma separated index types from: {', '.join(INDEX_TYPES)}",
+    )
+    parser.add_argument(
+        "--dim",
+        type=int,
+        default=384,
+        help="Vector dimension for synthetic embeddings (must match the server model for --server)",
+    )
+    parser.add_argument("--k", type=int, default=10, help="k for latency and recall@k")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per latency/recall measurement")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for corpus and queries")
+    parser.add_argument(
+        "--encode",
+        action="store_true",
+        help="Embed the synthetic text with the real model instead of generating clustered vectors",
+    )
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="Model used with --encode")
+    parser.add_argument("--server", action="store_true", help="Also measure /search QPS against vector_server.py")
+    parser.add_argument("--concurrency", default="1,4,16", help="Client concurrency levels for --server")
+    parser.add_argument("--server-requests", type=int, default=200, help="Requests per concurrency level")
+    parser.add_argument("--port", type=int, default=8011, help="Port for the benchmark vector server")
+    parser.add_argument("--work-dir", default=None, help="Where corpora are built (default: a temp dir)")
+    parser.add_argument("--output", default=None, help="JSON results path (default: data/bench/bench_<ts>.json)")
+    # Index tuning knobs forwarded to build_index.index_spec.
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--nprobe", type=int, default=None)
+    parser.add_argument("--pq-m", type=int, default=None)
+    parser.add_argument("--pq-bits", type=int, default=8)
+    parser.add_argument("--pca-dim", type=int, default=None)
+    parser.add_argument("--ef-search", type=int, default=64)
+    return parser.parse_args()
+
+
+def synthetic_snippets(count: int, rng: np.random.Generator) -> List[Dict[str, Any]]:
+    snippets: List[Dict[str, Any]] = []
+    words = np.asarray(VOCABULARY)
+    for row in range(count):
+        section = SECTIONS[row % len(SECTIONS)]
+        text = " ".join(rng.choice(words, size=int(rng.integers(12, 40))))
+        snippets.append(
+            {
+                "id": f"{section}-bench-{row}",
+                "section": section,
+                "title": f"{section.title()} note {row}",
+                "shortSummary": text,
+                "fullTextPath": f"data/blobs/{section}-bench-{row}.txt",
+                "updatedAt": "2026-01-01T00:00:00",
+                "sourcePath": f"bench/{section}/{row}",
+                "tags": [section, str(words[row % len(words)])],
+                "metadata": {"row": row},
+            }
+        )
+    return snippets
+
+
+def synthetic_vectors(count: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    """Unit vectors drawn around ~sqrt(N) cluster centres, like topical text embeddings."""
+    clusters = max(8, int(np.sqrt(count)))
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = np.empty((count, dim), dtype=np.float32)
+    for start in range(0, count, 65536):
+        stop = min(count, start + 65536)
+        assignment = rng.integers(0, clusters, size=stop - start)
+        block = centres[assignment] + 0.6 * rng.standard_normal((stop - start, dim)).astype(np.float32)
+        vectors[start:stop] = block / np.linalg.norm(block, axis=1, keepdims=True)
+    return vectors
+
+
+def percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    values = np.asarray(samples_ms, dtype=np.float64)
+    return {
+        "mean": round(float(values.mean()), 4),
+        "p50": round(float(np.percentile(values, 50)), 4),
+        "p95": round(float(np.percentile(values, 95)), 4),
+        "p99": round(float(np.percentile(values, 99)), 4),
+    }
+
+
+def measure_search(index: faiss.Index, queries: np.ndarray, truth: np.ndarray) -> Dict[str, Any]:
+    k = truth.shape[1]
+    latencies: List[float] = []
+    hits = 0
+    for row in range(len(queries)):
+        started = time.perf_counter()
+        _, found = index.search(queries[row : row + 1], k)
+        latencies.append(1000.0 * (time.perf_counter() - started))
+        hits += len(set(found[0]) & set(truth[row]))
+    return {"recallAtK": round(hits / truth.size, 4), "latencyMs": percentiles(latencies)}
+
+
+def measure_load(data_dir: Path) -> float:
+    from services.vector_server import IndexGeneration
+
+    started = time.perf_counter()
+    IndexGeneration(*resolve_generation(data_dir))
+    return time.perf_counter() - started
+
+
+def http_get(url: str) -> float:
+    started = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=60) as response:
+        response.read()
+    return 1000.0 * (time.perf_counter() - started)
+
+
+def measure_server(data_dir: Path, args: argparse.Namespace, rng: np.random.Generator) -> List[Dict[str, Any]]:
+    env = {
+        **os.environ,
+        "VECTOR_DATA_DIR": str(data_dir),
+        "VECTOR_RELOAD_INTERVAL": "0",
+        "VECTOR_CACHE_SIZE": "0",
+    }
+    base_url = f"http://127.0.0.1:{args.port}"
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "services.vector_server:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+    try:
+        deadline = time.monotonic() + 300
+        while True:
+            try:
+                http_get(f"{base_url}/health")
+                break
+            except OSError:
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("Vector server did not become healthy")
+                time.sleep(0.5)
+
+        words = np.asarray(VOCABULARY)
+        levels: List[Dict[str, Any]] = []
+        for concurrency in [int(value) for value in args.concurrency.split(",") if value]:
+            urls = [
+                f"{base_url}/search?"
+                + urllib.parse.urlencode({"q": " ".join(rng.choice(words, size=6)), "k": args.k})
+                for _ in range(args.server_requests)
+            ]
+            errors = 0
+            latencies: List[float] = []
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                for future in [pool.submit(http_get, url) for url in urls]:
+                    try:
+                        latencies.append(future.result())
+                    except OSError:
+                        errors += 1
+            elapsed = time.perf_counter() - started
+            levels.append(
+                {
+                    "concurrency": concurrency,
+                    "requests": len(urls),
+                    "errors": errors,
+                    "qps": round(len(latencies) / elapsed, 2),
+                    "latencyMs": percentiles(latencies) if latencies else None,
+                }
+            )
+            logging.info("  server c=%d qps=%.1f", concurrency, levels[-1]["qps"])
+        return levels
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "faiss": getattr(faiss, "__version__", "unknown"),
+        "numpy": np.__version__,
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="[bench] %(message)s")
+    sizes = [int(value) for value in args.sizes.split(",") if value]
+    index_types = [value for value in args.index_types.split(",") if value]
+    unknown = set(index_types) - set(INDEX_TYPES)
+    if unknown:
+        raise ValueError(f"Unknown index types: {', '.join(sorted(unknown))}")
+
+    work_dir = Path(args.work_dir) if args.work_dir else Path(tempfile.mkdtemp(prefix="kssem-bench-"))
+    output = Path(args.output) if args.output else ROOT / "data" / "bench" / (
+        f"bench_{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    model = None
+    if args.encode:
+        from services.encoders import default_export_dir, load_encoder
+
+        # Same backend the server will use when --server inherits this environment.
+        backend = os.environ.get("VECTOR_ENCODER", "torch")
+        model = load_encoder(backend, args.model, default_export_dir(ROOT / "data", args.model))
+
+    results: List[Dict[str, Any]] = []
+    for size in sizes:
+        rng = np.random.default_rng(args.seed)
+        logging.info("Generating %d synthetic snippets", size)
+        snippets = synthetic_snippets(size, rng)
+        if model is not None:
+            from tools.build_index import build_corpus
+
+            vectors = model.encode(
+                build_corpus(snippets), batch_size=64, convert_to_numpy=True, normalize_embeddings=True
+            ).astype(np.float32)
+        else:
+            vectors = synthetic_vectors(size, args.dim, rng)
+
+        query_rows = rng.choice(size, size=min(args.queries, size), replace=False)
+        queries = vectors[query_rows] + 0.05 * rng.standard_normal((len(query_rows), vectors.shape[1])).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        k = min(args.k, size)
+        exact = faiss.IndexFlatIP(vectors.shape[1])
+        exact.add(vectors)
+        _, truth = exact.search(queries, k)
+
+        for index_type in index_types:
+            spec = index_spec(index_type, size, vectors.shape[1], args)
+            logging.info("Size %d: building %s (%s)", size, index_type, spec["factory"])
+            started = time.perf_counter()
+            try:
+                index = build_index(vectors, spec)
+            except (RuntimeError, ValueError) as exc:
+                logging.warning("  skipped %s: %s", index_type, exc)
+                results.append({"size": size, "indexType": index_type, "error": str(exc)})
+                continue
+            build_seconds = time.perf_counter() - started
+
+            data_dir = work_dir / f"{size}-{index_type}"
+            write_generation(data_dir, snippets, vectors, index, spec, {"model": args.model if model else "synthetic"})
+            _, artifact_dir, _ = resolve_generation(data_dir)
+
+            entry: Dict[str, Any] = {
+                "size": size,
+                "dim": int(vectors.shape[1]),
+                "indexType": index_type,
+                "factory": spec["factory"],
+                "k": k,
+                "buildSeconds": round(build_seconds, 4),
+                "indexBytes": (artifact_dir / INDEX_FILE).stat().st_size,
+                "loadSeconds": round(measure_load(data_dir), 4),
+                **measure_search(index, queries, truth),
+            }
+            if args.server:
+                entry["server"] = measure_server(data_dir, args, rng)
+            logging.info(
+                "  build=%.2fs bytes=%d load=%.3fs recall@%d=%.3f p50=%.3fms p99=%.3fms",
+                entry["buildSeconds"],
+                entry["indexBytes"],
+                entry["loadSeconds"],
+                k,
+                entry["recallAtK"],
+                entry["latencyMs"]["p50"],
+                entry["latencyMs"]["p99"],
+            )
+            results.append(entry)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "createdAt": datetime.now(timezone.utc).isoformat(),
+        "environment": environment(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "work_dir")},
+        "results": results,
+    }
+    with output.open("w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    logging.info("Wrote %s", output)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,14 +4,65 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
 import logging
+import math
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import faiss  # type: ignore
 import numpy as np
-from sentence_transformers import SentenceTransformer
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from services.artifacts import (  # noqa: E402
+    EMB_FILE,
+    INDEX_FILE,
+    INDEX_PARAMS_FILE,
+    LEXICAL_FILE,
+    BLOB_PACK_FILE,
+    META_COLS_FILE,
+    META_JSON_FILE,
+    PASSAGES_FILE,
+    SHARDS_DIR,
+    generation_dir,
+    new_generation_id,
+    prune_generations,
+    publish_generation,
+    shard_dir,
+    write_shard_map,
+)
+from services.encoders import ENCODER_BACKENDS, default_export_dir, encoder_id, load_encoder  # noqa: E402
+from services.blob_store import PACK_FILE, BlobStore, link_blob_pack, write_blob_pack  # noqa: E402
+from services.index_io import apply_search_params  # noqa: E402
+from services.lexical import build_lexical_index  # noqa: E402
+from services.meta_store import write_meta_store  # noqa: E402
+from services.passages import (  # noqa: E402
+    TokenCounter,
+    build_passages,
+    expand_rows,
+    length_buckets,
+    parent_offsets,
+    text_tokens,
+    token_counter,
+)
+from tools.dedup import find_duplicates  # noqa: E402
+
+# Token-length buckets for corpus encoding; each bucket pads only to its bound.
+LENGTH_BUCKETS = (32, 64, 128, 256, 512)
+# Clusters of near-duplicate snippets collapsed by the last non-stream build.
+DEDUP_REPORT = "dedup_report.json"
 
 
 def parse_args() -> argparse.Namespace:
@@ -31,21 +82,181 @@ def parse_args() -> argparse.Namespace:
         default="all-MiniLM-L6-v2",
         help="Sentence-Transformers model name",
     )
+    parser.add_argument(
+        "--encoder",
+        choices=ENCODER_BACKENDS,
+        default=os.environ.get("VECTOR_ENCODER", "torch"),
+        help="Encoder backend (default: $VECTOR_ENCODER or torch); must match the vector server's",
+    )
+    parser.add_argument(
+        "--encoder-dir",
+        default=None,
+        help="ONNX export from tools/export_encoder.py (default: <out>/encoders/<model>)",
+    )
     parser.add_argument(
         "--hnsw",
         action="store_true",
-        help="Use IndexHNSWFlat (recommended for >10k vectors)",
+        help="Use IndexHNSWFlat (recommended for >10k vectors); same as --index-type hnsw",
+    )
+    parser.add_argument(
+        "--ef-search",
+        type=int,
+        default=64,
+        help="Default HNSW efSearch applied by the vector server (requests may override it with ef)",
+    )
+    parser.add_argument(
+        "--index-type",
+        choices=INDEX_TYPES,
+        default="flat",
+        help="FAISS index type to build (ignored when --target-recall is set)",
+    )
+    parser.add_argument("--nlist", type=int, default=None, help="IVF lists (default ~4*sqrt(N))")
+    parser.add_argument("--nprobe", type=int, default=None, help="IVF lists probed per query")
+    parser.add_argument("--pq-m", type=int, default=None, help="IVF-PQ sub-quantizers (default dim/8)")
+    parser.add_argument("--pq-bits", type=int, default=8, help="Bits per IVF-PQ sub-quantizer code")
+    parser.add_argument("--pca-dim", type=int, default=None, help="Output dimension for --index-type pca")
+    parser.add_argument(
+        "--target-recall",
+        type=float,
+        default=None,
+        help="Benchmark candidate index types and keep the smallest one reaching this recall@k vs exact search",
+    )
+    parser.add_argument("--recall-k", type=int, default=10, help="k used for --target-recall")
+    parser.add_argument(
+        "--embedding-cache",
+        default=None,
+        help="SQLite embedding cache path (default: <out>/embedding_cache.db)",
+    )
+    parser.add_argument(
+        "--no-embedding-cache",
+        action="store_true",
+        help="Re-encode every snippet instead of reusing cached vectors",
+    )
+    parser.add_argument(
+        "--no-passages",
+        action="store_true",
+        help="Embed one vector per snippet (head text only) instead of head + full-text passages",
+    )
+    parser.add_argument(
+        "--passage-tokens",
+        type=int,
+        default=None,
+        help="Max encoder tokens per passage (default: the model's max sequence length)",
+    )
+    parser.add_argument("--passage-overlap", type=int, default=32, help="Tokens shared by consecutive passages")
+    parser.add_argument(
+        "--batch-tokens",
+        type=int,
+        default=16384,
+        help="Padded tokens per encode batch; short length buckets get proportionally larger batches",
+    )
+    parser.add_argument(
+        "--no-lexical",
+        action="store_true",
+        help="Skip the BM25 inverted index used by hybrid/lexical search",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Bounded-memory build from a JSONL snippets file: encode chunks on a process pool "
+        "and write embeddings/index incrementally",
+    )
+    parser.add_argument("--chunk-size", type=int, default=2048, help="Snippets per --stream chunk")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Encoder processes for --stream, each pinned to one core (default: available cores)",
+    )
+    parser.add_argument(
+        "--train-size",
+        type=int,
+        default=100_000,
+        help="Vectors sampled to train IVF/PQ/SQ/PCA indexes in --stream mode",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="Split the corpus into this many independently served shards under <out>/shards",
+    )
+    parser.add_argument(
+        "--shard-by",
+        choices=("hash", "section"),
+        default="hash",
+        help="Shard by a stable hash of the snippet id, or keep each section whole on one shard",
+    )
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Index near-duplicate snippets (same text in several formats or folders) separately",
+    )
+    parser.add_argument(
+        "--dedup-jaccard",
+        type=float,
+        default=0.85,
+        help="Estimated Jaccard similarity of word 5-gram shingles above which snippets are duplicates",
+    )
+    parser.add_argument(
+        "--dedup-cosine",
+        type=float,
+        default=0.97,
+        help="Embedding cosine similarity a duplicate pair must also reach",
+    )
+    parser.add_argument(
+        "--dedup-min-words",
+        type=int,
+        default=20,
+        help="Shorter snippets are never collapsed",
+    )
+    parser.add_argument(
+        "--keep-generations",
+        type=int,
+        default=3,
+        help="Number of published index generations to keep under <out>/generations",
     )
     return parser.parse_args()
 
 
+def open_blob_pack(pack_path: Path) -> Optional[BlobStore]:
+    if not pack_path.exists():
+        return None
+    logging.info("Reading blob text from %s", pack_path)
+    return BlobStore(pack_path)
+
+
+def generation_blobs(
+    snippets: List[dict[str, Any]], blobs: Optional[BlobStore], pack_path: Path, bodies: Iterable[str]
+) -> Union[Path, Iterable[Tuple[str, str]]]:
+    """The extractor's pack when it covers every snippet, else ``(id, text)`` records to repack."""
+    if blobs is not None and all(snippet.get("id") in blobs for snippet in snippets):
+        return pack_path
+    return zip((snippet.get("id") for snippet in snippets), bodies)
+
+
 def load_snippets(snippets_path: Path) -> List[dict[str, Any]]:
     if not snippets_path.exists():
         raise FileNotFoundError(f"Missing snippets file: {snippets_path}")
+    if snippets_path.suffix == ".jsonl":
+        return [snippet for chunk in iter_snippet_chunks(snippets_path, 4096) for snippet in chunk]
     with snippets_path.open("r", encoding="utf-8") as fh:
         return json.load(fh)
 
 
+def iter_snippet_chunks(snippets_path: Path, size: int) -> Iterator[List[dict[str, Any]]]:
+    """Read a JSONL snippets file ``size`` records at a time."""
+    chunk: List[dict[str, Any]] = []
+    with snippets_path.open("r", encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                chunk.append(json.loads(line))
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
 def build_corpus(snippets: List[dict[str, Any]]) -> List[str]:
     corpus: List[str] = []
     for snippet in snippets:
@@ -58,17 +269,704 @@ def build_corpus(snippets: List[dict[str, Any]]) -> List[str]:
     return corpus
 
 
-def build_index(vectors: np.ndarray, use_hnsw: bool = False) -> faiss.Index:
-    dim = vectors.shape[1]
-    if use_hnsw:
-        index = faiss.IndexHNSWFlat(dim, 32)
-        index.hnsw.efConstruction = 200
+def read_blob_text(snippet: dict[str, Any], blobs: Optional[BlobStore] = None) -> str:
+    """Full text of a snippet's text blob, or "" for media and missing blobs.
+
+    Reads from the extractor's packed store when it holds the snippet."""
+    if snippet.get("blobType") == "media":
+        return ""
+    if blobs is not None and snippet.get("id") in blobs:
+        return blobs.get(snippet["id"]) or ""
+    if not snippet.get("fullTextPath"):
+        return ""
+    path = Path(snippet["fullTextPath"])
+    if not path.is_absolute():
+        path = ROOT / path
+    try:
+        return path.read_text(encoding="utf-8")
+    except OSError:
+        logging.warning("Blob %s unreadable; indexing %s without full text", path, snippet.get("id"))
+        return ""
+
+
+def build_lexical_corpus(corpus: List[str], bodies: List[str]) -> List[str]:
+    """Embedding corpus text plus blob full text, so exact terms that only
+    appear in the body (course codes, surnames, dates) are still matched."""
+    return [f"{text}\n{body}" for text, body in zip(corpus, bodies)]
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Persistent (model, sha256(corpus text)) -> normalized float32 vector store."""
+
+    def __init__(self, path: Path, model_name: str) -> None:
+        self.model_name = model_name
+        # Streaming builds open one connection per encoder process; WAL plus a
+        # generous busy timeout lets their small write transactions interleave.
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+              model TEXT NOT NULL,
+              text_hash TEXT NOT NULL,
+              dim INTEGER NOT NULL,
+              vector BLOB NOT NULL,
+              PRIMARY KEY (model, text_hash)
+            )
+            """
+        )
+
+    def lookup(self, hashes: List[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        unique = list(dict.fromkeys(hashes))
+        for start in range(0, len(unique), 500):
+            chunk = unique[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                [self.model_name, *chunk],
+            )
+            for digest, blob in rows:
+                found[digest] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def store(self, hashes: List[str], vectors: np.ndarray) -> None:
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, dim, vector) VALUES (?, ?, ?, ?)",
+                [
+                    (self.model_name, digest, int(vector.shape[0]), np.asarray(vector, dtype=np.float32).tobytes())
+                    for digest, vector in zip(hashes, vectors)
+                ],
+            )
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def encode_bucketed(model: Any, texts: List[str], count: TokenCounter, batch_tokens: int) -> np.ndarray:
+    """Encode ``texts`` grouped into token-length buckets so a batch of short
+    passages is not padded to the longest passage in the corpus, and short
+    buckets run with proportionally larger batches."""
+    lengths = [text_tokens(text, count) for text in texts]
+    dim = model.get_sentence_embedding_dimension()
+    out = np.empty((len(texts), dim), dtype=np.float32)
+    for bound, positions in length_buckets(lengths, LENGTH_BUCKETS):
+        batch_size = max(1, batch_tokens // bound)
+        logging.info("Encoding %d texts of <=%d tokens (batch size %d)", len(positions), bound, batch_size)
+        out[positions] = model.encode(
+            [texts[pos] for pos in positions],
+            batch_size=batch_size,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        )
+    return out
+
+
+def encode_corpus(
+    model: Any,
+    corpus: List[str],
+    cache: Optional[EmbeddingCache],
+    count: Optional[TokenCounter] = None,
+    batch_tokens: int = 16384,
+) -> Tuple[np.ndarray, int, int]:
+    """Return (embeddings, reused, encoded), encoding only texts missing from ``cache``."""
+    hashes = [text_hash(text) for text in corpus]
+    cached = cache.lookup(hashes) if cache else {}
+    missing = [pos for pos, digest in enumerate(hashes) if digest not in cached]
+    # Identical texts inside one build are encoded once.
+    to_encode = list(dict.fromkeys(hashes[pos] for pos in missing))
+    if to_encode:
+        first_pos = {}
+        for pos in missing:
+            first_pos.setdefault(hashes[pos], pos)
+        fresh = encode_bucketed(
+            model, [corpus[first_pos[digest]] for digest in to_encode], count or token_counter(model), batch_tokens
+        )
+        cached.update(zip(to_encode, fresh))
+        if cache:
+            cache.store(to_encode, fresh)
+    embeddings = np.vstack([cached[digest] for digest in hashes]).astype(np.float32, copy=False)
+    return embeddings, len(corpus) - len(missing), len(to_encode)
+
+
+INDEX_TYPES = ("flat", "hnsw", "ivf-flat", "ivf-pq", "sq8", "fp16", "pca")
+# Smallest PQ codebook (16 centroids per sub-quantizer) --pq-bits is lowered to.
+MIN_PQ_BITS = 4
+
+
+def default_nlist(count: int) -> int:
+    # ~4*sqrt(N) lists, but keep at least 39 training points per centroid.
+    return max(1, min(int(4 * math.sqrt(count)), count // 39))
+
+
+def min_training_vectors(nlist: int, pq_bits: int = 0) -> int:
+    # k-means in FAISS refuses fewer training points than centroids: nlist
+    # coarse centroids, and 2**pq_bits per PQ sub-quantizer.
+    return max(nlist, 2**pq_bits)
+
+
+def index_spec(
+    index_type: str, count: int, dim: int, args: argparse.Namespace, train_count: Optional[int] = None
+) -> Dict[str, Any]:
+    """Describe an index as a FAISS factory string plus its search-time parameters.
+
+    IVF sizes are checked against the ``train_count`` (default ``count``)
+    training vectors: ``nlist`` and ``--pq-bits`` are lowered, with a warning,
+    when FAISS could not train them, and a corpus too small for even
+    ``MIN_PQ_BITS`` is rejected."""
+    train_count = count if train_count is None else train_count
+    spec: Dict[str, Any] = {"type": index_type}
+    if index_type == "flat":
+        spec["factory"] = "Flat"
+    elif index_type == "hnsw":
+        spec.update(factory="HNSW32", M=32, efConstruction=200, efSearch=args.ef_search)
+    elif index_type == "sq8":
+        spec["factory"] = "SQ8"
+    elif index_type == "fp16":
+        spec["factory"] = "SQfp16"
+    elif index_type == "pca":
+        pca_dim = args.pca_dim or dim // 2
+        spec.update(factory=f"PCA{pca_dim},Flat", pcaDim=pca_dim)
+    elif index_type in ("ivf-flat", "ivf-pq"):
+        nlist = args.nlist or default_nlist(count)
+        if nlist > train_count:
+            fitted = default_nlist(train_count)
+            logging.warning("nlist %d exceeds the %d training vectors; using %d", nlist, train_count, fitted)
+            nlist = fitted
+        spec.update(nlist=nlist, nprobe=min(args.nprobe or max(1, nlist // 8), nlist))
+        if index_type == "ivf-flat":
+            spec["factory"] = f"IVF{nlist},Flat"
+        else:
+            m = args.pq_m or dim // 8
+            if dim % m:
+                raise ValueError(f"--pq-m {m} must divide the embedding dimension {dim}")
+            bits = args.pq_bits
+            if train_count < min_training_vectors(nlist, bits):
+                if train_count < min_training_vectors(nlist, MIN_PQ_BITS):
+                    raise ValueError(
+                        f"ivf-pq needs at least {min_training_vectors(nlist, MIN_PQ_BITS)} vectors to train "
+                        f"(--pq-bits {bits} needs {min_training_vectors(nlist, bits)}), got {train_count}; "
+                        "use --index-type flat or ivf-flat for a corpus this small"
+                    )
+                bits = int(math.log2(train_count))
+                logging.warning(
+                    "--pq-bits %d needs %d training vectors, got %d; using %d bits",
+                    args.pq_bits, min_training_vectors(nlist, args.pq_bits), train_count, bits,
+                )
+            spec.update(factory=f"IVF{nlist},PQ{m}x{bits}", M=m, bits=bits)
     else:
-        index = faiss.IndexFlatIP(dim)
+        raise ValueError(f"Unknown index type {index_type}")
+    return spec
+
+
+def create_index(dim: int, spec: Dict[str, Any]) -> faiss.Index:
+    if spec["type"] == "hnsw":
+        # Inner product like every other type: with the default L2 metric the
+        # server would report squared distances as similarity scores.
+        index = faiss.IndexHNSWFlat(dim, spec.get("M", 32), faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = spec.get("efConstruction", 200)
+        return index
+    return faiss.index_factory(dim, spec["factory"], faiss.METRIC_INNER_PRODUCT)
+
+
+def build_index(vectors: np.ndarray, spec: Dict[str, Any], train_vectors: Optional[np.ndarray] = None) -> faiss.Index:
+    index = create_index(vectors.shape[1], spec)
+    if not index.is_trained:
+        index.train(train_vectors if train_vectors is not None else vectors)
     index.add(vectors)
+    apply_search_params(index, spec)
+    return index
+
+
+def measure_recall(index: faiss.Index, queries: np.ndarray, truth: np.ndarray) -> Tuple[float, float]:
+    """Return (recall@k against ``truth``, mean latency in ms per query)."""
+    k = truth.shape[1]
+    started = time.perf_counter()
+    _, found = index.search(queries, k)
+    latency_ms = 1000.0 * (time.perf_counter() - started) / len(queries)
+    hits = sum(len(set(row_found) & set(row_truth)) for row_found, row_truth in zip(found, truth))
+    return hits / truth.size, latency_ms
+
+
+def candidate_specs(count: int, dim: int, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    candidates = [index_spec(name, count, dim, args) for name in ("flat", "fp16", "sq8", "pca")]
+    nlist = args.nlist or default_nlist(count)
+    if nlist >= 2:
+        candidates.append(index_spec("ivf-flat", count, dim, args))
+        for m in sorted({dim // 8, dim // 4}):
+            if m and dim % m == 0 and count >= min_training_vectors(nlist, args.pq_bits):
+                candidates.append(index_spec("ivf-pq", count, dim, argparse.Namespace(**{**vars(args), "pq_m": m})))
+    return candidates
+
+
+def select_index(
+    vectors: np.ndarray, target_recall: float, k: int, args: argparse.Namespace
+) -> Tuple[faiss.Index, Dict[str, Any]]:
+    """Train every candidate, measure recall@k on held-out rows and keep the
+    smallest (then fastest) index that reaches ``target_recall``.
+
+    Candidates are trained on and hold only the other rows while they are
+    measured, so a query never finds itself; the winner is then rebuilt over
+    every vector."""
+    count, dim = vectors.shape
+    rng = np.random.default_rng(0)
+    query_rows = rng.choice(count, size=min(1000, max(1, count // 10)), replace=False)
+    train_mask = np.ones(count, dtype=bool)
+    train_mask[query_rows] = False
+    train_vectors = np.ascontiguousarray(vectors[train_mask]) if train_mask.any() else vectors
+    queries = np.ascontiguousarray(vectors[query_rows])
+
+    k = min(k, len(train_vectors))
+    exact = faiss.IndexFlatIP(dim)
+    exact.add(train_vectors)
+    _, truth = exact.search(queries, k)
+
+    best: Optional[Tuple[Tuple[int, float], Dict[str, Any]]] = None
+    for spec in candidate_specs(len(train_vectors), dim, args):
+        try:
+            index = build_index(train_vectors, spec)
+        except RuntimeError as exc:
+            logging.info("Skipping %s: %s", spec["factory"], exc)
+            continue
+        # IVF candidates sweep nprobe upwards and stop at the first value that
+        # reaches the target; other types are measured once.
+        probes: List[Optional[int]] = [None]
+        if "nlist" in spec:
+            probes = [p for p in (1, 2, 4, 8, 16, 32, 64, 128, 256) if p <= spec["nlist"]] or [spec["nlist"]]
+        for probe in probes:
+            if probe is not None:
+                spec = {**spec, "nprobe": probe}
+                apply_search_params(index, spec)
+            recall, latency_ms = measure_recall(index, queries, truth)
+            if recall >= target_recall:
+                break
+        size = len(faiss.serialize_index(index))
+        logging.info(
+            "Candidate %-18s recall@%d=%.4f latency=%.3fms size=%dB", spec["factory"], k, recall, latency_ms, size
+        )
+        if recall < target_recall:
+            continue
+        spec = {**spec, "recall": round(recall, 4), "recallK": k, "latencyMs": round(latency_ms, 4)}
+        rank = (size, latency_ms)
+        if best is None or rank < best[0]:
+            best = (rank, spec)
+
+    if best is None:
+        raise RuntimeError(f"No candidate index reached recall@{k} >= {target_recall}")
+    spec = best[1]
+    index = build_index(vectors, spec, train_vectors)
+    return index, {**spec, "bytes": len(faiss.serialize_index(index))}
+
+
+def write_generation(
+    out_dir: Path,
+    snippets: List[dict[str, Any]],
+    embeddings: Optional[np.ndarray],
+    index: faiss.Index,
+    spec: Dict[str, Any],
+    info: Dict[str, Any],
+    lexical_corpus: Optional[Iterable[str]] = None,
+    parents: Optional[np.ndarray] = None,
+    generation: Optional[str] = None,
+    blobs: Optional[Union[Path, Iterable[Tuple[str, str]]]] = None,
+) -> str:
+    """Write all artifacts into a generation directory and publish it.
+
+    ``embeddings`` is None when a streaming build already wrote
+    ``snippets_embs.npy`` into ``generation``'s directory. ``blobs`` is
+    either the extractor's blob pack, linked in as is, or ``(id, text)``
+    records to pack here."""
+    generation = generation or new_generation_id()
+    gen_dir = generation_dir(out_dir, generation)
+    gen_dir.mkdir(parents=True, exist_ok=True)
+    index_path = gen_dir / INDEX_FILE
+    meta_path = gen_dir / META_JSON_FILE
+    meta_cols_path = gen_dir / META_COLS_FILE
+    emb_path = gen_dir / EMB_FILE
+
+    logging.info("Writing index to %s", index_path)
+    faiss.write_index(index, str(index_path))
+    with (gen_dir / INDEX_PARAMS_FILE).open("w", encoding="utf-8") as fh:
+        json.dump(spec, fh, indent=2)
+
+    if embeddings is not None:
+        logging.info("Saving embeddings to %s", emb_path)
+        np.save(emb_path, np.ascontiguousarray(embeddings, dtype=np.float32))
+
+    logging.info("Saving metadata to %s", meta_path)
+    with meta_path.open("w", encoding="utf-8") as fh:
+        json.dump(snippets, fh, ensure_ascii=False, separators=(",", ":"))
+
+    logging.info("Saving columnar metadata to %s", meta_cols_path)
+    write_meta_store(meta_cols_path, snippets)
+
+    blob_path = gen_dir / BLOB_PACK_FILE
+    if isinstance(blobs, Path):
+        logging.info("Linking packed blobs %s into %s", blobs, blob_path)
+        link_blob_pack(blobs, blob_path)
+    elif blobs is not None:
+        logging.info("Packing blob text into %s", blob_path)
+        info = {**info, "blobs": write_blob_pack(blob_path, blobs)}
+
+    if parents is not None:
+        logging.info("Saving passage parents to %s", gen_dir / PASSAGES_FILE)
+        np.save(gen_dir / PASSAGES_FILE, parents.astype(np.int32))
+        info = {**info, "snippets": len(snippets), "passages": int(parents.size)}
+
+    if lexical_corpus is not None:
+        lexical_path = gen_dir / LEXICAL_FILE
+        logging.info("Saving BM25 inverted index to %s", lexical_path)
+        info = {**info, "lexical": build_lexical_index(lexical_path, lexical_corpus)}
+
+    publish_generation(
+        out_dir,
+        generation,
+        {**info, "vectors": int(index.ntotal), "dim": int(index.d), "index": spec},
+    )
+    return generation
+
+
+# Per-process state of --stream encoder workers, set by init_stream_worker.
+_worker: Dict[str, Any] = {}
+
+
+def choose_index(embeddings: np.ndarray, args: argparse.Namespace) -> Tuple[faiss.Index, Dict[str, Any]]:
+    if args.target_recall is not None:
+        logging.info("Selecting index type for recall@%d >= %.3f", args.recall_k, args.target_recall)
+        return select_index(embeddings, args.target_recall, args.recall_k, args)
+    index_type = "hnsw" if args.hnsw else args.index_type
+    spec = index_spec(index_type, len(embeddings), embeddings.shape[1], args)
+    return build_index(embeddings, spec), spec
+
+
+def shard_assignments(snippets: List[dict[str, Any]], shards: int, shard_by: str) -> np.ndarray:
+    """Shard number of every snippet.
+
+    ``hash`` spreads snippets by a stable hash of their (content-addressed)
+    id. ``section`` keeps every section on one shard, placing the largest
+    sections first on the least-loaded shard, so section-filtered queries
+    touch a single shard."""
+    if shard_by == "hash":
+        digests = (hashlib.sha1(str(snippet.get("id")).encode("utf-8")).digest() for snippet in snippets)
+        return np.array([int.from_bytes(digest[:8], "big") % shards for digest in digests], dtype=np.int32)
+    sizes: Dict[str, int] = {}
+    for snippet in snippets:
+        section = snippet.get("section") or ""
+        sizes[section] = sizes.get(section, 0) + 1
+    loads = [0] * shards
+    owner: Dict[str, int] = {}
+    for section, size in sorted(sizes.items(), key=lambda item: (-item[1], item[0])):
+        target = loads.index(min(loads))
+        owner[section] = target
+        loads[target] += size
+    return np.array([owner[snippet.get("section") or ""] for snippet in snippets], dtype=np.int32)
+
+
+def write_shards(
+    out_dir: Path,
+    args: argparse.Namespace,
+    snippets: List[dict[str, Any]],
+    corpus: List[str],
+    bodies: List[str],
+    embeddings: np.ndarray,
+    parents: Optional[np.ndarray],
+    info: Dict[str, Any],
+    blobs: Optional[BlobStore],
+    blob_source: Path,
+) -> List[Dict[str, Any]]:
+    """Publish one generation per shard and record them in ``shards.json``.
+
+    Every shard directory is a complete data directory (manifest,
+    generations), so each is served by a plain ``vector_server.py`` with
+    ``VECTOR_DATA_DIR`` pointing at it."""
+    owners = shard_assignments(snippets, args.shards, args.shard_by)
+    offsets = parent_offsets(parents, len(snippets)) if parents is not None else None
+    entries: List[Dict[str, Any]] = []
+    for shard in range(args.shards):
+        name = f"shard-{shard:02d}"
+        rows = np.flatnonzero(owners == shard)
+        if not rows.size:
+            logging.warning("Shard %s received no snippets; skipping it", name)
+            continue
+        shard_parents: Optional[np.ndarray] = None
+        vector_rows = rows
+        if offsets is not None:
+            vector_rows = expand_rows(offsets, rows)
+            shard_parents = np.repeat(np.arange(rows.size, dtype=np.int32), offsets[rows + 1] - offsets[rows])
+        shard_embeddings = np.ascontiguousarray(embeddings[vector_rows])
+        index, spec = choose_index(shard_embeddings, args)
+        shard_snippets = [snippets[row] for row in rows]
+        shard_bodies = [bodies[row] for row in rows]
+        lexical_corpus = (
+            None if args.no_lexical else build_lexical_corpus([corpus[row] for row in rows], shard_bodies)
+        )
+        data_dir = shard_dir(out_dir, name)
+        data_dir.mkdir(parents=True, exist_ok=True)
+        logging.info("Shard %s: %d snippets, %d vectors, %s index", name, rows.size, index.ntotal, spec["type"])
+        generation = write_generation(
+            data_dir,
+            shard_snippets,
+            shard_embeddings,
+            index,
+            spec,
+            {**info, "shard": name},
+            lexical_corpus,
+            shard_parents,
+            blobs=generation_blobs(shard_snippets, blobs, blob_source, shard_bodies),
+        )
+        prune_generations(data_dir, args.keep_generations)
+        entries.append(
+            {
+                "name": name,
+                "path": f"{SHARDS_DIR}/{name}",
+                "generation": generation,
+                "snippets": int(rows.size),
+                "vectors": int(index.ntotal),
+                "sections": sorted({snippet.get("section") or "" for snippet in shard_snippets}),
+            }
+        )
+    write_shard_map(out_dir, args.shard_by, entries)
+    return entries
+
+
+def collapse_duplicates(
+    out_dir: Path,
+    args: argparse.Namespace,
+    snippets: List[dict[str, Any]],
+    corpus: List[str],
+    bodies: List[str],
+    embeddings: np.ndarray,
+    parents: Optional[np.ndarray],
+) -> Tuple[List[dict[str, Any]], List[str], List[str], np.ndarray, Optional[np.ndarray], Dict[str, Any]]:
+    """Drop near-duplicate snippets and their vectors (see ``tools/dedup.py``).
+
+    Every cluster keeps one canonical snippet whose ``metadata`` lists the
+    ids and source paths of the copies; ``<out>/dedup_report.json`` lists
+    the clusters with their similarity scores."""
+    offsets = parent_offsets(parents, len(snippets)) if parents is not None else None
+    result = find_duplicates(
+        snippets,
+        [body or text for text, body in zip(corpus, bodies)],
+        embeddings,
+        offsets,
+        jaccard=args.dedup_jaccard,
+        cosine=args.dedup_cosine,
+        min_words=args.dedup_min_words,
+    )
+    report_path = out_dir / DEDUP_REPORT
+    with report_path.open("w", encoding="utf-8") as fh:
+        json.dump(result.report, fh, ensure_ascii=False, indent=2)
+    summary = {key: result.report[key] for key in ("kept", "removed", "clusters")}
+    logging.info(
+        "Collapsed %d near-duplicate snippets into %d canonical ones (%s)",
+        summary["removed"],
+        summary["clusters"],
+        report_path,
+    )
+    if not summary["removed"]:
+        return snippets, corpus, bodies, embeddings, parents, summary
+
+    keep = result.keep
+    vector_rows = keep
+    if offsets is not None:
+        vector_rows = expand_rows(offsets, keep)
+        parents = np.repeat(np.arange(keep.size, dtype=np.int32), offsets[keep + 1] - offsets[keep])
+    return (
+        result.snippets,
+        [corpus[row] for row in keep],
+        [bodies[row] for row in keep],
+        np.ascontiguousarray(embeddings[vector_rows]),
+        parents,
+        summary,
+    )
+
+
+def init_stream_worker(args: argparse.Namespace, encoder_dir: Path, cache_path: Optional[Path], cores: Any) -> None:
+    """Pin this worker to one core and load its own single-threaded encoder."""
+    core = cores.get()
+    if core is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {core})
+    model = load_encoder(args.encoder, args.model, encoder_dir, threads=1)
+    if args.encoder == "torch":
+        import torch
+
+        torch.set_num_threads(1)
+    _worker.update(
+        model=model,
+        count=token_counter(model),
+        cache=EmbeddingCache(cache_path, encoder_id(args.encoder, args.model)) if cache_path else None,
+        args=args,
+    )
+
+
+def encode_stream_chunk(
+    titles: List[str], heads: List[str], bodies: List[str]
+) -> Tuple[np.ndarray, Optional[np.ndarray], int, int]:
+    """Worker task: ``(embeddings, local parents, reused, encoded)`` for one chunk."""
+    args: argparse.Namespace = _worker["args"]
+    model, count = _worker["model"], _worker["count"]
+    texts, parents = heads, None
+    if not args.no_passages:
+        max_tokens = args.passage_tokens or getattr(model, "max_seq_length", None) or 256
+        texts, parents = build_passages(titles, heads, bodies, count, max_tokens, args.passage_overlap)
+    embeddings, reused, encoded = encode_corpus(model, texts, _worker["cache"], count, args.batch_tokens)
+    return embeddings, parents, reused, encoded
+
+
+def finalize_npy(raw_path: Path, npy_path: Path, rows: int, dim: int) -> None:
+    """Prefix raw little-endian float32 rows with an ``.npy`` header, copying in blocks."""
+    with npy_path.open("wb") as out, raw_path.open("rb") as raw:
+        np.lib.format.write_array_header_1_0(
+            out, {"descr": "<f4", "fortran_order": False, "shape": (rows, dim)}
+        )
+        shutil.copyfileobj(raw, out, 16 * 1024 * 1024)
+    raw_path.unlink()
+
+
+def stream_encode(
+    args: argparse.Namespace,
+    snippets_path: Path,
+    gen_dir: Path,
+    encoder_dir: Path,
+    cache_path: Optional[Path],
+    blobs: Optional[BlobStore],
+) -> Tuple[int, int, Optional[np.ndarray], int, int]:
+    """Encode ``snippets_path`` chunk by chunk on a pinned process pool, appending
+    vectors to ``snippets_embs.npy`` in input order.
+
+    At most two chunks per worker are in flight, so memory is bounded by
+    ``--chunk-size`` rather than the corpus. Returns
+    ``(vectors, dim, parents, reused, encoded)``."""
+    cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    workers = max(1, args.workers or len(cores))
+    ctx = multiprocessing.get_context("spawn")
+    core_queue = ctx.Queue()
+    for worker in range(workers):
+        core_queue.put(cores[worker % len(cores)] if workers <= len(cores) else None)
+
+    raw_path = gen_dir / (EMB_FILE + ".raw")
+    rows = dim = reused = encoded = 0
+    snippet_count = 0
+    parent_chunks: List[np.ndarray] = []
+    pending: "deque[Tuple[int, int, Future]]" = deque()
+
+    def drain_one(raw: Any) -> None:
+        nonlocal rows, dim, reused, encoded
+        base, size, future = pending.popleft()
+        embeddings, parents, chunk_reused, chunk_encoded = future.result()
+        raw.write(np.ascontiguousarray(embeddings, dtype="<f4").tobytes())
+        rows += embeddings.shape[0]
+        dim = embeddings.shape[1]
+        reused += chunk_reused
+        encoded += chunk_encoded
+        parent_chunks.append(base + (parents if parents is not None else np.arange(size, dtype=np.int32)))
+        logging.info("Encoded %d snippets (%d vectors)", base + size, rows)
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=ctx,
+        initializer=init_stream_worker,
+        initargs=(args, encoder_dir, cache_path, core_queue),
+    ) as pool, raw_path.open("wb") as raw:
+        for chunk in iter_snippet_chunks(snippets_path, args.chunk_size):
+            titles = [snippet.get("title") or "" for snippet in chunk]
+            future = pool.submit(
+                encode_stream_chunk, titles, build_corpus(chunk), [read_blob_text(snippet, blobs) for snippet in chunk]
+            )
+            pending.append((snippet_count, len(chunk), future))
+            snippet_count += len(chunk)
+            while len(pending) >= 2 * workers:
+                drain_one(raw)
+        while pending:
+            drain_one(raw)
+
+    if not rows:
+        raw_path.unlink()
+        raise RuntimeError("No snippets found. Run extract_snippets.ts first.")
+    finalize_npy(raw_path, gen_dir / EMB_FILE, rows, dim)
+    parents = None if args.no_passages else np.concatenate(parent_chunks).astype(np.int32)
+    return rows, dim, parents, reused, encoded
+
+
+def stream_build_index(vectors: np.ndarray, spec: Dict[str, Any], chunk_rows: int, train_size: int) -> faiss.Index:
+    """Train on a sample of the mapped ``vectors`` and add them chunk by chunk."""
+    index = create_index(vectors.shape[1], spec)
+    if not index.is_trained:
+        rng = np.random.default_rng(0)
+        sample = np.sort(rng.choice(len(vectors), size=min(train_size, len(vectors)), replace=False))
+        logging.info("Training %s on %d sampled vectors", spec["factory"], sample.size)
+        index.train(np.ascontiguousarray(vectors[sample]))
+    for start in range(0, len(vectors), chunk_rows):
+        index.add(np.ascontiguousarray(vectors[start : start + chunk_rows]))
+    apply_search_params(index, spec)
     return index
 
 
+def stream_main(args: argparse.Namespace, snippets_path: Path, out_dir: Path) -> None:
+    if snippets_path.suffix != ".jsonl":
+        raise ValueError("--stream reads JSONL snippets (one object per line), e.g. data/snippets.jsonl")
+    if args.target_recall is not None:
+        raise ValueError("--target-recall needs every vector in memory; pick --index-type for --stream builds")
+
+    generation = new_generation_id()
+    gen_dir = generation_dir(out_dir, generation)
+    gen_dir.mkdir(parents=True, exist_ok=True)
+    encoder_dir = Path(args.encoder_dir) if args.encoder_dir else default_export_dir(out_dir, args.model)
+    cache_path: Optional[Path] = None
+    if not args.no_embedding_cache:
+        cache_path = Path(args.embedding_cache) if args.embedding_cache else out_dir / "embedding_cache.db"
+        EmbeddingCache(cache_path, encoder_id(args.encoder, args.model)).close()  # create schema once
+
+    blob_source = snippets_path.parent / PACK_FILE
+    blobs = open_blob_pack(blob_source)
+    logging.info("Streaming %s in chunks of %d snippets", snippets_path, args.chunk_size)
+    rows, dim, parents, reused, encoded = stream_encode(args, snippets_path, gen_dir, encoder_dir, cache_path, blobs)
+    logging.info("Reused %d cached vectors, encoded %d new", reused, encoded)
+
+    vectors = np.load(gen_dir / EMB_FILE, mmap_mode="r")
+    index_type = "hnsw" if args.hnsw else args.index_type
+    spec = index_spec(index_type, rows, dim, args, train_count=min(rows, args.train_size))
+    index = stream_build_index(vectors, spec, args.chunk_size, args.train_size)
+    logging.info("Built %s index (%s)", spec["type"], spec["factory"])
+    del vectors
+
+    # Metadata and BM25 postings are still built over the whole corpus, but
+    # only once encoding has finished and its buffers are gone.
+    snippets = load_snippets(snippets_path)
+    lexical_corpus = None
+    if not args.no_lexical:
+        lexical_corpus = (
+            f"{text}\n{read_blob_text(snippet, blobs)}" for snippet, text in zip(snippets, build_corpus(snippets))
+        )
+    write_generation(
+        out_dir,
+        snippets,
+        None,
+        index,
+        spec,
+        {
+            "model": args.model,
+            "encoder": encoder_id(args.encoder, args.model),
+            "reusedVectors": reused,
+            "encodedVectors": encoded,
+        },
+        lexical_corpus,
+        parents,
+        generation,
+        generation_blobs(snippets, blobs, blob_source, (read_blob_text(snippet, blobs) for snippet in snippets)),
+    )
+    if blobs is not None:
+        blobs.close()
+    prune_generations(out_dir, args.keep_generations)
+    logging.info("Published generation %s", generation)
+
+
 def main() -> None:
     args = parse_args()
     logging.basicConfig(level=logging.INFO, format="[build-index] %(message)s")
@@ -77,43 +975,93 @@ def main() -> None:
     out_dir = Path(args.out)
     out_dir.mkdir(parents=True, exist_ok=True)
 
+    if args.stream and args.shards > 1:
+        raise RuntimeError("--shards is not supported with --stream; build each shard's JSONL separately")
+    if args.stream:
+        if not args.no_dedup:
+            logging.info("Near-duplicate collapse is not available with --stream; indexing every snippet")
+        stream_main(args, snippets_path, out_dir)
+        logging.info("Index build complete.")
+        return
+
     logging.info("Loading snippets from %s", snippets_path)
     snippets = load_snippets(snippets_path)
     if not snippets:
         raise RuntimeError("No snippets found. Run extract_snippets.ts first.")
 
     corpus = build_corpus(snippets)
+    blob_source = snippets_path.parent / PACK_FILE
+    blobs = open_blob_pack(blob_source)
+    bodies = [read_blob_text(snippet, blobs) for snippet in snippets]
     logging.info("Loaded %d snippets", len(corpus))
 
-    logging.info("Loading model %s", args.model)
-    model = SentenceTransformer(args.model)
+    logging.info("Loading %s encoder for %s", args.encoder, args.model)
+    encoder_dir = Path(args.encoder_dir) if args.encoder_dir else default_export_dir(out_dir, args.model)
+    model = load_encoder(args.encoder, args.model, encoder_dir)
+    encoder = encoder_id(args.encoder, args.model)
 
-    logging.info("Encoding snippets…")
-    embeddings = model.encode(
-        corpus,
-        batch_size=64,
-        show_progress_bar=True,
-        convert_to_numpy=True,
-        normalize_embeddings=True,
-    )
-    logging.info("Embeddings shape: %s", embeddings.shape)
+    count = token_counter(model)
+    parents: Optional[np.ndarray] = None
+    texts = corpus
+    if not args.no_passages:
+        max_tokens = args.passage_tokens or getattr(model, "max_seq_length", None) or 256
+        texts, parents = build_passages(
+            [snippet.get("title") or "" for snippet in snippets],
+            corpus,
+            bodies,
+            count,
+            max_tokens,
+            args.passage_overlap,
+        )
+        logging.info("Split %d snippets into %d passages of <=%d tokens", len(corpus), len(texts), max_tokens)
 
-    logging.info("Building %s index", "HNSW" if args.hnsw else "FlatIP")
-    index = build_index(embeddings, use_hnsw=args.hnsw)
+    cache: Optional[EmbeddingCache] = None
+    if not args.no_embedding_cache:
+        cache_path = Path(args.embedding_cache) if args.embedding_cache else out_dir / "embedding_cache.db"
+        logging.info("Using embedding cache %s", cache_path)
+        cache = EmbeddingCache(cache_path, encoder)
 
-    index_path = out_dir / "snippets.index"
-    meta_path = out_dir / "snippets_meta.json"
-    emb_path = out_dir / "snippets_embs.npy"
+    logging.info("Encoding snippets…")
+    try:
+        embeddings, reused, encoded = encode_corpus(model, texts, cache, count, args.batch_tokens)
+    finally:
+        if cache:
+            cache.close()
+    logging.info("Reused %d cached vectors, encoded %d new", reused, encoded)
+    logging.info("Embeddings shape: %s", embeddings.shape)
 
-    logging.info("Writing index to %s", index_path)
-    faiss.write_index(index, str(index_path))
+    info = {"model": args.model, "encoder": encoder, "reusedVectors": reused, "encodedVectors": encoded}
+    if not args.no_dedup:
+        snippets, corpus, bodies, embeddings, parents, info["dedup"] = collapse_duplicates(
+            out_dir, args, snippets, corpus, bodies, embeddings, parents
+        )
+    if args.shards > 1:
+        shards = write_shards(out_dir, args, snippets, corpus, bodies, embeddings, parents, info, blobs, blob_source)
+        if blobs is not None:
+            blobs.close()
+        logging.info("Published %d shards to %s", len(shards), out_dir / SHARDS_DIR)
+        logging.info("Index build complete.")
+        return
 
-    logging.info("Saving embeddings to %s", emb_path)
-    np.save(emb_path, embeddings)
+    index, spec = choose_index(embeddings, args)
+    logging.info("Built %s index (%s)", spec["type"], spec["factory"])
 
-    logging.info("Saving metadata to %s", meta_path)
-    with meta_path.open("w", encoding="utf-8") as fh:
-        json.dump(snippets, fh, ensure_ascii=False, indent=2)
+    lexical_corpus = None if args.no_lexical else build_lexical_corpus(corpus, bodies)
+    generation = write_generation(
+        out_dir,
+        snippets,
+        embeddings,
+        index,
+        spec,
+        info,
+        lexical_corpus,
+        parents,
+        blobs=generation_blobs(snippets, blobs, blob_source, bodies),
+    )
+    if blobs is not None:
+        blobs.close()
+    prune_generations(out_dir, args.keep_generations)
+    logging.info("Published generation %s", generation)
 
     logging.info("Index build complete.")
 
@@ -0,0 +1,191 @@
+"""Near-duplicate snippet detection for ``build_index.py``.
+
+The same document often arrives more than once in slightly different forms
+(``placements.docx`` and ``placements.odt``, the mirrored ``college data in
+docs`` folder, a second copy of ``collegeData.ts``). Byte-identical files are
+already skipped by the extractor; this stage catches the copies whose text
+differs only in whitespace, punctuation or conversion artefacts.
+
+Each snippet's text is reduced to a MinHash signature over hashed word
+shingles. Locality-sensitive hashing on bands of the signature proposes
+candidate pairs, which are kept when their estimated Jaccard similarity and
+the cosine similarity of their (mean passage) embeddings both clear a
+threshold. Pairs are only formed within a section, so section filters keep
+working. Connected pairs form a cluster that is collapsed onto one canonical
+snippet, which lists the ids and source paths of the copies it replaces.
+"""
+
+from __future__ import annotations
+
+import re
+import zlib
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+WORD_RE = re.compile(r"\w+")
+# Mersenne prime 2**31 - 1: (a * x + b) stays below 2**63 for a, x < 2**31.
+PRIME = (1 << 31) - 1
+NUM_PERM = 64
+BANDS = 16
+
+
+class DedupResult(NamedTuple):
+    keep: np.ndarray  # ascending rows of the surviving snippets
+    snippets: List[Dict[str, Any]]  # surviving snippets; canonicals carry their aliases
+    report: Dict[str, Any]
+
+
+def shingle_hashes(text: str, size: int) -> np.ndarray:
+    """CRC32 of every ``size``-word shingle of the lower-cased text."""
+    words = WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[pos : pos + size]) for pos in range(len(words) - size + 1)]
+    return np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in set(shingles)), dtype=np.uint64)
+
+
+def minhash_signatures(texts: List[str], shingle_size: int, seed: int = 0) -> np.ndarray:
+    """``(len(texts), NUM_PERM)`` MinHash signatures, one universal hash per permutation."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, PRIME, size=(NUM_PERM, 1), dtype=np.uint64)
+    b = rng.integers(0, PRIME, size=(NUM_PERM, 1), dtype=np.uint64)
+    signatures = np.empty((len(texts), NUM_PERM), dtype=np.uint32)
+    for row, text in enumerate(texts):
+        shingles = shingle_hashes(text, shingle_size) % PRIME
+        signatures[row] = ((a * shingles[None, :] + b) % PRIME).min(axis=1)
+    return signatures
+
+
+def candidate_pairs(signatures: np.ndarray, groups: List[str]) -> np.ndarray:
+    """``(n, 2)`` row pairs sharing at least one LSH band bucket and one group."""
+    rows_per_band = signatures.shape[1] // BANDS
+    pairs: Set[Tuple[int, int]] = set()
+    for band in range(BANDS):
+        buckets: Dict[Tuple[str, bytes], List[int]] = {}
+        chunk = signatures[:, band * rows_per_band : (band + 1) * rows_per_band]
+        for row in range(len(signatures)):
+            buckets.setdefault((groups[row], chunk[row].tobytes()), []).append(row)
+        for members in buckets.values():
+            for pos, first in enumerate(members):
+                for second in members[pos + 1 :]:
+                    pairs.add((first, second))
+    return np.array(sorted(pairs), dtype=np.int64).reshape(-1, 2)
+
+
+def snippet_vectors(embeddings: np.ndarray, offsets: Optional[np.ndarray]) -> np.ndarray:
+    """One unit vector per snippet: the normalized mean of its passage vectors."""
+    if offsets is None:
+        return embeddings
+    sums = np.add.reduceat(embeddings, offsets[:-1], axis=0)
+    norms = np.linalg.norm(sums, axis=1, keepdims=True)
+    return sums / np.maximum(norms, 1e-12)
+
+
+def canonical_order(snippet: Dict[str, Any], text: str) -> Tuple[Any, ...]:
+    """Sort key of cluster members; the first one is kept.
+
+    Curated (non-``incoming``) snippets win, then the shallowest source path
+    (the copies under ``incoming/college data in docs/`` lose to the
+    originals), then the longest text."""
+    source = str(snippet.get("sourcePath") or "")
+    return (snippet.get("section") == "incoming", source.count("/"), -len(text), source, str(snippet.get("id")))
+
+
+def find_duplicates(
+    snippets: List[Dict[str, Any]],
+    texts: List[str],
+    embeddings: np.ndarray,
+    offsets: Optional[np.ndarray] = None,
+    jaccard: float = 0.85,
+    cosine: float = 0.97,
+    min_words: int = 20,
+    shingle_size: int = 5,
+) -> DedupResult:
+    """Cluster near-duplicate snippets and keep one canonical snippet per cluster.
+
+    ``texts[row]`` is the text compared for ``snippets[row]`` and
+    ``embeddings`` holds the snippet (or, with ``offsets``, passage) vectors.
+    Snippets with fewer than ``min_words`` words are never collapsed; short
+    boilerplate such as contact lines is often shared by unrelated snippets."""
+    count = len(snippets)
+    eligible = [row for row, text in enumerate(texts) if len(WORD_RE.findall(text)) >= min_words]
+    vectors = snippet_vectors(embeddings, offsets)
+    parent = list(range(count))
+
+    def find(row: int) -> int:
+        while parent[row] != row:
+            parent[row] = parent[parent[row]]
+            row = parent[row]
+        return row
+
+    scores: Dict[Tuple[int, int], Tuple[Optional[float], float]] = {}
+    if len(eligible) > 1:
+        signatures = minhash_signatures([texts[row] for row in eligible], shingle_size)
+        local = candidate_pairs(signatures, [str(snippets[row].get("section") or "") for row in eligible])
+        if local.size:
+            estimates = (signatures[local[:, 0]] == signatures[local[:, 1]]).mean(axis=1)
+            rows = np.asarray(eligible, dtype=np.int64)[local]
+            similarities = np.einsum("pd,pd->p", vectors[rows[:, 0]], vectors[rows[:, 1]])
+            for (first, second), estimate, similarity in zip(rows.tolist(), estimates, similarities):
+                if estimate >= jaccard and similarity >= cosine:
+                    scores[(first, second)] = (float(estimate), float(similarity))
+                    parent[find(first)] = find(second)
+
+    clusters: Dict[int, List[int]] = {}
+    for row in range(count):
+        clusters.setdefault(find(row), []).append(row)
+
+    keep_rows: List[int] = []
+    canonical_of: Dict[int, List[int]] = {}
+    for members in clusters.values():
+        members.sort(key=lambda row: canonical_order(snippets[row], texts[row]))
+        keep_rows.append(members[0])
+        if len(members) > 1:
+            canonical_of[members[0]] = members[1:]
+    keep_rows.sort()
+
+    def pair_scores(first: int, second: int) -> Dict[str, Optional[float]]:
+        # Members joined through another copy were never compared with the
+        # canonical snippet directly; their Jaccard estimate is unknown.
+        pair = (min(first, second), max(first, second))
+        estimate, similarity = scores.get(pair, (None, float(vectors[first] @ vectors[second])))
+        return {"jaccard": estimate, "cosine": round(similarity, 4)}
+
+    kept: List[Dict[str, Any]] = []
+    report_clusters: List[Dict[str, Any]] = []
+    for row in keep_rows:
+        snippet = snippets[row]
+        duplicates = canonical_of.get(row)
+        if duplicates:
+            aliases = [snippets[dup] for dup in duplicates]
+            snippet = {
+                **snippet,
+                "metadata": {
+                    **(snippet.get("metadata") or {}),
+                    "aliasIds": [alias.get("id") for alias in aliases],
+                    "aliasSourcePaths": sorted({str(alias.get("sourcePath")) for alias in aliases}),
+                },
+            }
+            report_clusters.append(
+                {
+                    "canonical": snippet.get("id"),
+                    "sourcePath": snippet.get("sourcePath"),
+                    "duplicates": [
+                        {"id": alias.get("id"), "sourcePath": alias.get("sourcePath"), **pair_scores(row, dup)}
+                        for dup, alias in zip(duplicates, aliases)
+                    ],
+                }
+            )
+        kept.append(snippet)
+
+    report = {
+        "snippets": count,
+        "kept": len(kept),
+        "removed": count - len(kept),
+        "clusters": len(report_clusters),
+        "thresholds": {"jaccard": jaccard, "cosine": cosine, "minWords": min_words, "shingleSize": shingle_size},
+        "duplicates": report_clusters,
+    }
+    return DedupResult(np.asarray(keep_rows, dtype=np.int64), kept, report)
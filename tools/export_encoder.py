@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Export the embedding model to ONNX (optionally int8) and check parity with torch.
+
+    python tools/export_encoder.py                       # export + parity report
+    python tools/export_encoder.py --skip-export         # re-check an existing export
+
+Parity compares each ONNX backend with the torch encoder on the snippet
+corpus: per-snippet cosine between the two embeddings (drift) and how much
+of the torch top-k each backend retrieves when snippet titles are used as
+queries (recall@k). The report is written next to the export as
+``parity.json``; the exit status is non-zero when a backend falls below
+``--min-cosine`` or ``--min-recall``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from services.encoders import default_export_dir, export_onnx, load_encoder  # noqa: E402
+from tools.build_index import build_corpus, load_snippets  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export the encoder to ONNX and report parity with torch")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="Sentence-Transformers model name")
+    parser.add_argument("--out", default=None, help="Export directory (default: data/encoders/<model>)")
+    parser.add_argument("--snippets", default="data/snippets.json", help="Corpus used for the parity check")
+    parser.add_argument("--no-quantize", action="store_true", help="Skip the dynamic int8 export")
+    parser.add_argument("--skip-export", action="store_true", help="Only run the parity check")
+    parser.add_argument("--skip-parity", action="store_true", help="Only export")
+    parser.add_argument("--k", type=int, default=10, help="k for recall@k")
+    parser.add_argument("--min-cosine", type=float, default=0.99, help="Fail when mean cosine drops below this")
+    parser.add_argument("--min-recall", type=float, default=0.95, help="Fail when recall@k drops below this")
+    return parser.parse_args()
+
+
+def timed_encode(encoder: Any, texts: List[str]) -> Tuple[np.ndarray, float]:
+    started = time.perf_counter()
+    vectors = encoder.encode(texts, batch_size=64, convert_to_numpy=True, normalize_embeddings=True)
+    return np.asarray(vectors, dtype=np.float32), time.perf_counter() - started
+
+
+def top_k(queries: np.ndarray, corpus: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ corpus.T
+    k = min(k, corpus.shape[0])
+    return np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+
+def parity_report(
+    model_name: str, export_dir: Path, snippets_path: Path, backends: List[str], k: int
+) -> Dict[str, Any]:
+    snippets = load_snippets(snippets_path)
+    corpus = build_corpus(snippets)
+    queries = [snippet.get("title") or corpus[row] for row, snippet in enumerate(snippets)]
+
+    reference = load_encoder("torch", model_name)
+    ref_corpus, ref_seconds = timed_encode(reference, corpus)
+    ref_queries, _ = timed_encode(reference, queries)
+    ref_top = top_k(ref_queries, ref_corpus, k)
+
+    report: Dict[str, Any] = {
+        "model": model_name,
+        "snippets": len(corpus),
+        "k": k,
+        "backends": {"torch": {"encodeSeconds": round(ref_seconds, 3)}},
+    }
+    for backend in backends:
+        encoder = load_encoder(backend, model_name, export_dir)
+        cand_corpus, seconds = timed_encode(encoder, corpus)
+        cand_queries, _ = timed_encode(encoder, queries)
+        cosine = np.sum(ref_corpus * cand_corpus, axis=1)
+        cand_top = top_k(cand_queries, cand_corpus, k)
+        overlap = [len(set(a) & set(b)) / len(a) for a, b in zip(ref_top.tolist(), cand_top.tolist())]
+        report["backends"][backend] = {
+            "encodeSeconds": round(seconds, 3),
+            "speedup": round(ref_seconds / seconds, 2) if seconds else None,
+            "cosineMean": float(cosine.mean()),
+            "cosineMin": float(cosine.min()),
+            "cosineP01": float(np.percentile(cosine, 1)),
+            f"recall@{k}": float(np.mean(overlap)),
+        }
+    return report
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="[export-encoder] %(message)s")
+    export_dir = Path(args.out) if args.out else default_export_dir(ROOT / "data", args.model)
+
+    if not args.skip_export:
+        logging.info("Exporting %s to %s", args.model, export_dir)
+        config = export_onnx(args.model, export_dir, quantize=not args.no_quantize)
+        logging.info("Exported %d-dim encoder (max %d tokens)", config["dim"], config["maxSeqLength"])
+    if args.skip_parity:
+        return
+
+    backends = ["onnx"] if args.no_quantize else ["onnx", "onnx-int8"]
+    report = parity_report(args.model, export_dir, Path(args.snippets), backends, args.k)
+    with (export_dir / "parity.json").open("w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(json.dumps(report, indent=2))
+
+    failed = [
+        backend
+        for backend in backends
+        if report["backends"][backend]["cosineMean"] < args.min_cosine
+        or report["backends"][backend][f"recall@{args.k}"] < args.min_recall
+    ]
+    if failed:
+        logging.error("Parity below threshold for: %s", ", ".join(failed))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -98,12 +98,20 @@ interface SnippetOptions {
   sourcePath: string;
 }
 
-const runSeed = Date.now().toString(36);
-let sequence = 0;
-
-function nextId(section: AllowedSection) {
-  sequence += 1;
-  return `${section}-${runSeed}-${sequence}`;
+const issuedIds = new Map<string, number>();
+
+// Content-addressed so unchanged snippets keep their ID across publishes and
+// build_index.py can reuse their cached embeddings.
+function nextId(section: AllowedSection, sourcePath: string, title: string, text: string) {
+  const digest = crypto
+    .createHash('sha256')
+    .update([section, sourcePath, title, text].join('\0'))
+    .digest('hex')
+    .slice(0, 16);
+  const base = `${section}-${digest}`;
+  const count = (issuedIds.get(base) ?? 0) + 1;
+  issuedIds.set(base, count);
+  return count === 1 ? base : `${base}-${count}`;
 }
 
 const logger = new console.Console(process.stdout, process.stderr);
@@ -154,7 +162,7 @@ async function createSnippetFromText(
     throw new Error(`Unsupported section ${section}`);
   }
   const cleaned = text.trim();
-  const id = nextId(section);
+  const id = nextId(section, options.sourcePath, title, cleaned);
   const blobPath = path.join(BLOBS_DIR, `${id}.txt`);
   await fsp.writeFile(blobPath, cleaned + (cleaned.endsWith('\n') ? '' : '\n'), 'utf8');
   return {
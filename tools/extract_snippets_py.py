@@ -1,80 +1,85 @@
 #!/usr/bin/env python3
 """Python-based extractor to produce data/snippets.json and data/snippets.db
 
-This script reads `src/data/collegeData.ts` by running a tiny Node helper
-that strips TypeScript-only annotations and prints JSON. It then creates
-text blob files under `data/blobs/`, writes `data/snippets.json`, and
-writes a SQLite index `data/snippets.db` compatible with the project's
-schema.
+This script reads `src/data/collegeData.ts` with the in-process literal
+parser in `ts_literal.py` (no Node runtime needed), and extracts every
+document under `incoming/` in a process pool (see `ingest_documents.py`).
+It then creates text blob files under `data/blobs/`, writes
+`data/snippets.json`, and writes a SQLite index `data/snippets.db`
+compatible with the project's schema.
+
+Extraction is incremental: `data/ingest_manifest.json` records every source
+file's path, size, mtime and SHA-256 together with the snippets it produced.
+Files whose size and mtime (or, failing that, content hash) are unchanged
+keep their snippets and blobs from the previous run, files whose content
+duplicates another file (the copies under `incoming/college data in docs/`)
+are skipped, and only new or edited files are parsed. `--watch` keeps
+running, polls for changes, waits until they settle and then re-runs the
+incremental extraction plus `build_index.py` (whose embedding cache only
+encodes the new snippets).
 """
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
-import os
+import re
 import sqlite3
 import subprocess
 import sys
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from services.blob_store import PACK_FILE, write_blob_pack  # noqa: E402
+from tools.ingest_documents import extract_all, find_documents  # noqa: E402
+from tools.ts_literal import TsLiteralError, load_binding  # noqa: E402
+
+INCOMING_DIR = ROOT / "incoming"
 DATA_DIR = ROOT / "data"
 BLOBS_DIR = DATA_DIR / "blobs"
 MEDIA_DIR = BLOBS_DIR / "media"
 SNIPPETS_JSON = DATA_DIR / "snippets.json"
+SNIPPETS_JSONL = DATA_DIR / "snippets.jsonl"
 SQLITE_PATH = DATA_DIR / "snippets.db"
-
-
-def node_extract_college_json(ts_path: Path) -> Dict[str, Any]:
-    # Read the TS source here and perform lightweight, targeted transforms
-    import re
-
-    ts_src = ts_path.read_text(encoding='utf8')
-    # Remove import lines
-    ts_src = re.sub(r'^\s*import.*$', '', ts_src, flags=re.M)
-    # Replace `export const collegeDatabase = (` with `const collegeDatabase = (`
-    ts_src = re.sub(r'export\s+const\s+collegeDatabase\s*=\s*\(', 'const collegeDatabase = (', ts_src)
-    # Remove common TypeScript casts like `) as unknown) as CollegeInfo;` -> `);`
-    ts_src = re.sub(r'\)\s*as\s*unknown\)\s*as\s*CollegeInfo\s*;?', ');', ts_src)
-    ts_src = re.sub(r'\s+as\s+CollegeInfo\s*;?', ';', ts_src)
-    ts_src = re.sub(r'\)\s*as\s*unknown\s*;?', ')', ts_src)
-    ts_src = re.sub(r'\}\s*as\s*unknown\s*;?', '}', ts_src)
-    ts_src = re.sub(r'\s+as\s+[A-Za-z0-9_<\>\[\]]+\s*;?', '', ts_src)
-
-    # Build a JS file that inlines the transformed source inside an IIFE and
-    # returns the `collegeDatabase` (or module.exports) so we can print JSON.
-    js_content = (
-        "console.error('TRANSFORMED_SRC_START');\n"
-        "console.error('--- trimmed; not printing full source ---');\n"
-        "console.error('TRANSFORMED_SRC_END');\n"
-        "try {\n"
-        "  const __result = (function() {\n"
-        + ts_src
-        + "\n  return (typeof collegeDatabase !== 'undefined') ? collegeDatabase : (typeof module !== 'undefined' && module.exports && (module.exports.default || module.exports));\n"
-        "  })();\n"
-        "  console.log(JSON.stringify(__result));\n"
-        "} catch (err) {\n"
-        "  console.error('EVAL_ERROR', err && err.stack ? err.stack : String(err));\n"
-        "  process.exit(2);\n"
-        "}\n"
-    )
-
-    import tempfile
-    with tempfile.NamedTemporaryFile('w', delete=False, suffix='.js', encoding='utf8') as fh:
-        fh.write(js_content)
-        tmp_path = fh.name
-    try:
-        proc = subprocess.run(["node", tmp_path], capture_output=True, text=True)
-        if proc.returncode != 0:
-            print("Failed to extract college data via Node:\n", proc.stderr, file=sys.stderr)
-            raise SystemExit(1)
-        return json.loads(proc.stdout)
-    finally:
+BLOB_PACK = DATA_DIR / PACK_FILE
+INGEST_MANIFEST = DATA_DIR / "ingest_manifest.json"
+INGEST_MANIFEST_VERSION = 1
+COLLEGE_TS = ROOT / 'src' / 'data' / 'collegeData.ts'
+COLLEGE_CACHE = DATA_DIR / 'college_data_cache.json'
+# Part of the cache key, so a parser fix re-parses an unchanged collegeData.ts.
+COLLEGE_PARSER = ROOT / 'tools' / 'ts_literal.py'
+
+
+def load_college_data(ts_path: Path) -> Dict[str, Any]:
+    """`collegeDatabase` from `collegeData.ts`, parsed in-process by `ts_literal`
+    and cached in `data/college_data_cache.json` under the SHA-256 of the file
+    and of the parser."""
+    digest = file_sha256(ts_path)
+    parser_digest = file_sha256(COLLEGE_PARSER)
+    if COLLEGE_CACHE.exists():
         try:
-            os.remove(tmp_path)
-        except Exception:
+            with COLLEGE_CACHE.open('r', encoding='utf8') as fh:
+                cached = json.load(fh)
+            if cached.get('sha256') == digest and cached.get('parser') == parser_digest:
+                return cached['data']
+        except (OSError, ValueError, KeyError):
             pass
+    try:
+        college = load_binding(ts_path, 'collegeDatabase')
+    except TsLiteralError as exc:
+        print(f'Failed to parse {ts_path.name}: {exc}', file=sys.stderr)
+        raise SystemExit(1)
+    tmp_path = COLLEGE_CACHE.with_name(COLLEGE_CACHE.name + '.tmp')
+    with tmp_path.open('w', encoding='utf8') as fh:
+        json.dump({'sha256': digest, 'parser': parser_digest, 'data': college}, fh, ensure_ascii=False)
+    tmp_path.replace(COLLEGE_CACHE)
+    return college
 
 
 def ensure_dirs():
@@ -93,25 +98,46 @@ def summarize(text: str, words: int = 60) -> str:
     return " ".join(parts[:words]) + "…"
 
 
-run_seed = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-sequence = 0
+issued_ids: Dict[str, int] = {}
+
+
+ID_RE = re.compile(r'^(.+-[0-9a-f]{16})(?:-(\d+))?$')
 
 
-def next_id(section: str) -> str:
-    global sequence
-    sequence += 1
-    return f"{section}-{run_seed}-{sequence}"
+def reserve_ids(snippets: List[Dict[str, Any]]):
+    """Record the IDs of reused snippets so next_id never hands out one of their suffixes again."""
+    for snippet in snippets:
+        match = ID_RE.match(snippet['id'])
+        if match:
+            base, suffix = match.group(1), int(match.group(2) or 1)
+            issued_ids[base] = max(issued_ids.get(base, 0), suffix)
+
+
+def next_id(section: str, source_path: str, title: str, text: str) -> str:
+    """Content-addressed ID: identical input yields the same ID on every run,
+    so build_index.py can reuse cached embeddings across publishes."""
+    digest = hashlib.sha256("\0".join((section, source_path, title, text)).encode("utf8")).hexdigest()
+    base = f"{section}-{digest[:16]}"
+    issued_ids[base] = issued_ids.get(base, 0) + 1
+    if issued_ids[base] == 1:
+        return base
+    return f"{base}-{issued_ids[base]}"
+
+
+# Blob text by snippet id, packed into data/blobs.pack once extraction finishes.
+blob_texts: Dict[str, str] = {}
 
 
 def write_blob(id_: str, text: str) -> str:
     path = BLOBS_DIR / f"{id_}.txt"
+    blob_texts[id_] = text.rstrip() + "\n"
     with path.open("w", encoding="utf8") as fh:
-        fh.write(text.rstrip() + "\n")
+        fh.write(blob_texts[id_])
     return str(path)
 
 
 def create_snippet(section: str, title: str, text: str, source_path: str, **kwargs) -> Dict[str, Any]:
-    id_ = next_id(section)
+    id_ = next_id(section, source_path, title, text)
     blob_path = write_blob(id_, text)
     snippet = {
         "id": id_,
@@ -201,12 +227,138 @@ def build_snippets_from_college(col: Dict[str, Any]) -> List[Dict[str, Any]]:
     return snippets
 
 
+def load_ingest_manifest(full: bool = False) -> Dict[str, Dict[str, Any]]:
+    """Per-source entries of the previous run (empty with `full` or on a format change)."""
+    if full or not INGEST_MANIFEST.exists():
+        return {}
+    try:
+        with INGEST_MANIFEST.open('r', encoding='utf8') as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('version') != INGEST_MANIFEST_VERSION:
+        return {}
+    return manifest.get('files', {})
+
+
+def write_ingest_manifest(entries: Dict[str, Dict[str, Any]]) -> None:
+    tmp_path = INGEST_MANIFEST.with_name(INGEST_MANIFEST.name + '.tmp')
+    with tmp_path.open('w', encoding='utf8') as fh:
+        json.dump({'version': INGEST_MANIFEST_VERSION, 'files': entries}, fh, ensure_ascii=False)
+    tmp_path.replace(INGEST_MANIFEST)
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open('rb') as fh:
+        for block in iter(lambda: fh.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_state(path: Path, previous: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], bool]:
+    """`({size, mtimeNs, sha256}, changed)`; the file is only hashed when size or mtime moved."""
+    stat = path.stat()
+    if previous and previous.get('size') == stat.st_size and previous.get('mtimeNs') == stat.st_mtime_ns:
+        return {'size': stat.st_size, 'mtimeNs': stat.st_mtime_ns, 'sha256': previous['sha256']}, False
+    digest = file_sha256(path)
+    changed = not previous or previous.get('sha256') != digest
+    return {'size': stat.st_size, 'mtimeNs': stat.st_mtime_ns, 'sha256': digest}, changed
+
+
+def carry_over(snippets: List[Dict[str, Any]]) -> bool:
+    """Reuse snippets from the previous run; False when a blob file has gone missing."""
+    texts: Dict[str, str] = {}
+    for snippet in snippets:
+        path = BLOBS_DIR / f"{snippet['id']}.txt"
+        if not path.exists():
+            return False
+        texts[snippet['id']] = path.read_text(encoding='utf8')
+    blob_texts.update(texts)
+    reserve_ids(snippets)
+    return True
+
+
+def build_snippets_from_incoming(
+    incoming_dir: Path,
+    workers: Optional[int],
+    previous: Dict[str, Dict[str, Any]],
+    entries: Dict[str, Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Snippets for every document under `incoming_dir` plus the number of files
+    that had to be parsed. Manifest entries for the files seen go into `entries`."""
+    if not incoming_dir.exists():
+        print(f'[extract_py] {incoming_dir} does not exist - skipping external content')
+        return [], 0
+    files, skipped = find_documents(incoming_dir)
+    for path in skipped:
+        print(f'[extract_py] Skipping unsupported file type: {path.relative_to(ROOT).as_posix()}', file=sys.stderr)
+
+    states: Dict[str, Tuple[Dict[str, Any], bool]] = {}
+    for path in files:
+        source = path.relative_to(ROOT).as_posix()
+        states[source] = source_state(path, previous.get(source))
+    # Identical files are ingested once, from the shallowest (then first) path.
+    canonical: Dict[str, str] = {}
+    for source in sorted(states, key=lambda src: (src.count('/'), src)):
+        canonical.setdefault(states[source][0]['sha256'], source)
+
+    per_file: Dict[str, List[Dict[str, Any]]] = {}
+    to_parse: List[Path] = []
+    for path in files:
+        source = path.relative_to(ROOT).as_posix()
+        state, changed = states[source]
+        original = canonical[state['sha256']]
+        if original != source:
+            print(f'[extract_py] Skipping {source}: same content as {original}')
+            entries[source] = {**state, 'duplicateOf': original}
+            continue
+        old = previous.get(source) or {}
+        if not changed and 'snippets' in old and carry_over(old['snippets']):
+            per_file[source] = old['snippets']
+            entries[source] = {**state, 'snippets': old['snippets']}
+        else:
+            to_parse.append(path)
+            entries[source] = state
+
+    # Results arrive in file order, so snippet order and IDs do not depend on scheduling.
+    for path, chunks, error in extract_all(to_parse, workers):
+        source = path.relative_to(ROOT).as_posix()
+        if error:
+            print(f'[extract_py] Failed to read {source}: {error}', file=sys.stderr)
+            continue
+        if not chunks:
+            print(f'[extract_py] Empty or unreadable file: {source}', file=sys.stderr)
+        base_title = path.stem
+        file_snippets = []
+        for i, chunk in enumerate(chunks):
+            title = f"{base_title} (Part {i + 1})" if len(chunks) > 1 else base_title
+            file_snippets.append(create_snippet('incoming', title, chunk, source, tags=['incoming', 'document'], metadata={'chunkIndex': i, 'chunkCount': len(chunks), 'fileName': path.name}))
+        per_file[source] = file_snippets
+        entries[source]['snippets'] = file_snippets
+
+    snippets: List[Dict[str, Any]] = []
+    for path in files:
+        snippets.extend(per_file.get(path.relative_to(ROOT).as_posix(), []))
+    return snippets, len(to_parse)
+
+
+def json_or_none(value: Any) -> Optional[str]:
+    return json.dumps(value) if value is not None else None
+
+
+def normalize_tags(snippet: Dict[str, Any]) -> List[str]:
+    """Lower-cased, de-duplicated tags for the `snippet_tags` lookup table."""
+    return list(dict.fromkeys(t.strip().lower() for t in snippet.get('tags') or [] if isinstance(t, str) and t.strip()))
+
+
 def write_sqlite(snippets: List[Dict[str, Any]]):
-    if SQLITE_PATH.exists():
-        SQLITE_PATH.unlink()
+    for path in (SQLITE_PATH, SQLITE_PATH.with_name(SQLITE_PATH.name + '-wal'), SQLITE_PATH.with_name(SQLITE_PATH.name + '-shm')):
+        if path.exists():
+            path.unlink()
     conn = sqlite3.connect(SQLITE_PATH)
     cur = conn.cursor()
-    cur.execute('''
+    cur.executescript('''
     CREATE TABLE IF NOT EXISTS snippets (
       id TEXT PRIMARY KEY,
       section TEXT NOT NULL,
@@ -222,40 +374,188 @@ def write_sqlite(snippets: List[Dict[str, Any]]):
       blobType TEXT,
       metadata TEXT
     );
+    -- One row per (normalized tag, snippet) so tag filters use an index instead of LIKE scans.
+    CREATE TABLE IF NOT EXISTS snippet_tags (
+      tag TEXT NOT NULL,
+      id TEXT NOT NULL REFERENCES snippets(id),
+      PRIMARY KEY (tag, id)
+    ) WITHOUT ROWID;
     ''')
-    cur.execute('DELETE FROM snippets;')
     insert_sql = '''INSERT INTO snippets (id, section, title, shortSummary, fullTextPath, updatedAt, sourcePath, aliases, tags, contact, coords, blobType, metadata)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'''
-    for s in snippets:
-        cur.execute(insert_sql, (
+    rows = [
+        (
             s.get('id'), s.get('section'), s.get('title'), s.get('shortSummary'), s.get('fullTextPath'), s.get('updatedAt'), s.get('sourcePath'),
-            json.dumps(s.get('aliases')) if s.get('aliases') is not None else None,
-            json.dumps(s.get('tags')) if s.get('tags') is not None else None,
-            json.dumps(s.get('contact')) if s.get('contact') is not None else None,
-            json.dumps(s.get('coords')) if s.get('coords') is not None else None,
+            json_or_none(s.get('aliases')),
+            json_or_none(s.get('tags')),
+            json_or_none(s.get('contact')),
+            json_or_none(s.get('coords')),
             s.get('blobType') or 'text',
-            json.dumps(s.get('metadata')) if s.get('metadata') is not None else None,
-        ))
+            json_or_none(s.get('metadata')),
+        )
+        for s in snippets
+    ]
+    tag_rows = [(tag, s.get('id')) for s in snippets for tag in normalize_tags(s)]
+    # Bulk load in one transaction, then build indexes once over the full table.
+    with conn:
+        cur.executemany(insert_sql, rows)
+        cur.executemany('INSERT OR IGNORE INTO snippet_tags (tag, id) VALUES (?, ?)', tag_rows)
+        cur.execute('CREATE INDEX IF NOT EXISTS idx_snippets_section ON snippets(section)')
+        cur.execute('CREATE INDEX IF NOT EXISTS idx_snippets_updated_at ON snippets(updatedAt)')
+        cur.execute('CREATE INDEX IF NOT EXISTS idx_snippet_tags_id ON snippet_tags(id)')
+    try:
+        with conn:
+            cur.execute('CREATE VIRTUAL TABLE snippets_fts USING fts5(id UNINDEXED, title, shortSummary, fullText)')
+            cur.executemany(
+                'INSERT INTO snippets_fts (id, title, shortSummary, fullText) VALUES (?, ?, ?, ?)',
+                [(s.get('id'), s.get('title'), s.get('shortSummary'), blob_texts.get(s.get('id'), '')) for s in snippets],
+            )
+    except sqlite3.OperationalError as exc:
+        print(f'[extract_py] SQLite build lacks FTS5, skipping snippets_fts: {exc}', file=sys.stderr)
+    cur.execute('ANALYZE')
     conn.commit()
     conn.close()
 
 
-def main():
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Extract kiosk snippets with Python")
+    parser.add_argument("--incoming", default=str(INCOMING_DIR), help="Directory of documents to ingest")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction processes (default: CPU count)")
+    parser.add_argument("--no-incoming", action="store_true", help="Only extract src/data/collegeData.ts")
+    parser.add_argument("--no-blob-compression", action="store_true", help="Store packed blob records uncompressed")
+    parser.add_argument("--full", action="store_true", help="Ignore the ingestion manifest and re-extract every file")
+    parser.add_argument("--watch", action="store_true", help="Keep running; re-extract and rebuild on changes")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between --watch scans")
+    parser.add_argument("--debounce", type=float, default=2.0, help="Quiet seconds before --watch acts on a change")
+    return parser.parse_args()
+
+
+def run_extraction(args: argparse.Namespace) -> bool:
+    """One incremental extraction pass; returns whether snippets.json changed."""
+    issued_ids.clear()
+    blob_texts.clear()
     ensure_dirs()
-    ts_path = ROOT / 'src' / 'data' / 'collegeData.ts'
-    if not ts_path.exists():
+    if not COLLEGE_TS.exists():
         print('Missing src/data/collegeData.ts', file=sys.stderr)
         raise SystemExit(1)
-    print('[extract_py] Extracting college data via Node')
-    college = node_extract_college_json(ts_path)
-    print('[extract_py] Building snippets from college data')
-    snippets = build_snippets_from_college(college)
+    previous = load_ingest_manifest(args.full)
+    entries: Dict[str, Dict[str, Any]] = {}
+
+    college_source = COLLEGE_TS.relative_to(ROOT).as_posix()
+    state, changed = source_state(COLLEGE_TS, previous.get(college_source))
+    old = previous.get(college_source) or {}
+    if not changed and 'snippets' in old and carry_over(old['snippets']):
+        print('[extract_py] collegeData.ts unchanged - reusing its snippets')
+        snippets = list(old['snippets'])
+        parsed = 0
+    else:
+        print('[extract_py] Parsing college data from collegeData.ts')
+        college = load_college_data(COLLEGE_TS)
+        print('[extract_py] Building snippets from college data')
+        snippets = build_snippets_from_college(college)
+        parsed = 1
+    entries[college_source] = {**state, 'snippets': list(snippets)}
+
+    if not args.no_incoming:
+        print(f'[extract_py] Extracting documents from {args.incoming}')
+        incoming, parsed_files = build_snippets_from_incoming(
+            Path(args.incoming).resolve(), args.workers, previous, entries
+        )
+        snippets.extend(incoming)
+        parsed += parsed_files
+    removed = set(previous) - set(entries)
+    print(
+        f'[extract_py] Parsed {parsed} new or changed sources, '
+        f'kept {len(entries) - parsed} unchanged or duplicate, dropped {len(removed)} removed'
+    )
+
+    live_ids = {s['id'] for s in snippets}
+    previous_ids = {snippet['id'] for entry in previous.values() for snippet in entry.get('snippets', [])}
+    # Blob files of snippets that no longer exist (edited or deleted sources).
+    for stale_id in previous_ids - live_ids:
+        (BLOBS_DIR / f"{stale_id}.txt").unlink(missing_ok=True)
+
     print(f'[extract_py] Writing {len(snippets)} snippets to {SNIPPETS_JSON}')
-    with SNIPPETS_JSON.open('w', encoding='utf8') as fh:
-        json.dump(snippets, fh, ensure_ascii=False, indent=2)
+    # IDs only cover section, source, title and text; tags, aliases and metadata
+    # also reach the index, so compare the whole serialized snippet list.
+    serialized = json.dumps(snippets, ensure_ascii=False, indent=2).encode('utf8')
+    previous_digest = file_sha256(SNIPPETS_JSON) if SNIPPETS_JSON.exists() else None
+    SNIPPETS_JSON.write_bytes(serialized)
+    # One snippet per line for `build_index.py --stream`.
+    with SNIPPETS_JSONL.open('w', encoding='utf8') as fh:
+        for snippet in snippets:
+            fh.write(json.dumps(snippet, ensure_ascii=False) + '\n')
+    print(f'[extract_py] Packing blob text into {BLOB_PACK}')
+    stats = write_blob_pack(BLOB_PACK, ((s['id'], blob_texts[s['id']]) for s in snippets), compress=not args.no_blob_compression)
+    print(f"[extract_py] Packed {stats['records']} blobs: {stats['rawBytes']} -> {stats['packedBytes']} bytes")
     print('[extract_py] Persisting SQLite index')
     write_sqlite(snippets)
+    write_ingest_manifest(entries)
     print('[extract_py] Done')
+    return not previous or hashlib.sha256(serialized).hexdigest() != previous_digest
+
+
+def watched_state(args: argparse.Namespace) -> Dict[str, Tuple[int, int]]:
+    """`(size, mtime_ns)` of every watched file; comparing two scans detects changes."""
+    paths = [COLLEGE_TS]
+    incoming = Path(args.incoming)
+    if not args.no_incoming and incoming.exists():
+        paths.extend(p for p in incoming.rglob('*') if p.is_file())
+    state: Dict[str, Tuple[int, int]] = {}
+    for path in paths:
+        try:
+            stat = path.stat()
+        except OSError:  # removed between listing and stat
+            continue
+        state[str(path)] = (stat.st_size, stat.st_mtime_ns)
+    return state
+
+
+def publish(args: argparse.Namespace) -> None:
+    started = time.perf_counter()
+    if not run_extraction(args):
+        print('[extract_py] No source changes - index left as is')
+        return
+    result = subprocess.run([sys.executable, str(ROOT / 'tools' / 'build_index.py')], cwd=ROOT)
+    if result.returncode != 0:
+        print(f'[extract_py] build_index.py failed with exit code {result.returncode}', file=sys.stderr)
+        return
+    print(f'[extract_py] Published in {time.perf_counter() - started:.1f}s')
+
+
+def watch(args: argparse.Namespace) -> None:
+    """Poll `incoming/` and collegeData.ts; once a change has been quiet for
+    `--debounce` seconds (copies finished), run one incremental publish."""
+    print(f'[extract_py] Watching {args.incoming} (poll {args.poll_interval}s, debounce {args.debounce}s)')
+    publish(args)
+    last = watched_state(args)
+    while True:
+        time.sleep(args.poll_interval)
+        current = watched_state(args)
+        if current == last:
+            continue
+        quiet_since = time.monotonic()
+        while time.monotonic() - quiet_since < args.debounce:
+            time.sleep(args.poll_interval)
+            newer = watched_state(args)
+            if newer != current:
+                current, quiet_since = newer, time.monotonic()
+        last = current
+        try:
+            publish(args)
+        except (Exception, SystemExit) as exc:  # keep the daemon alive; the next change retries
+            print(f'[extract_py] Publish failed: {exc}', file=sys.stderr)
+
+
+def main():
+    args = parse_args()
+    if args.watch:
+        try:
+            watch(args)
+        except KeyboardInterrupt:
+            print('[extract_py] Stopped watching')
+        return
+    run_extraction(args)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""Streaming text extraction for documents dropped into `incoming/`.
+
+Replaces the one-off `extract_docx*.py` scripts. DOCX and ODT bodies are
+read with `iterparse` straight from the zip member and every finished
+paragraph is cleared, so memory stays flat however long a handbook is; PDFs
+are read page by page. Paragraphs are grouped into 200-400 word chunks (the
+same rule as `chunkText` in `extract_snippets.ts`) and files are processed
+in a process pool by `extract_snippets_py.py`.
+
+Run directly to dump the extracted text of one or more files:
+
+    python tools/ingest_documents.py "MECHANICAL DEPARTMENT.docx"
+"""
+from __future__ import annotations
+
+import io
+import os
+import sys
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+ODF_OFFICE_NS = "{urn:oasis:names:tc:opendocument:xmlns:office:1.0}"
+ODF_TEXT_NS = "{urn:oasis:names:tc:opendocument:xmlns:text:1.0}"
+
+W_BODY, W_P, W_T, W_TAB, W_BR, W_CR = (W_NS + tag for tag in ("body", "p", "t", "tab", "br", "cr"))
+ODF_BODY = ODF_OFFICE_NS + "text"
+ODF_PARAGRAPHS = {ODF_TEXT_NS + "p", ODF_TEXT_NS + "h"}
+ODF_SPACE, ODF_TAB, ODF_LINE_BREAK = (ODF_TEXT_NS + tag for tag in ("s", "tab", "line-break"))
+
+TEXT_EXTENSIONS = {".docx", ".odt", ".pdf", ".txt", ".md"}
+MIN_CHUNK_WORDS = 200
+MAX_CHUNK_WORDS = 400
+
+
+def docx_paragraph_text(paragraph: ET.Element) -> str:
+    parts: List[str] = []
+    for node in paragraph.iter():
+        if node.tag == W_T:
+            parts.append(node.text or "")
+        elif node.tag == W_TAB:
+            parts.append("\t")
+        elif node.tag in (W_BR, W_CR):
+            parts.append("\n")
+    return "".join(parts)
+
+
+def odf_paragraph_text(element: ET.Element) -> str:
+    parts: List[str] = [element.text or ""]
+    for child in element:
+        if child.tag == ODF_SPACE:
+            parts.append(" " * int(child.get(ODF_TEXT_NS + "c", "1")))
+        elif child.tag == ODF_TAB:
+            parts.append("\t")
+        elif child.tag == ODF_LINE_BREAK:
+            parts.append("\n")
+        elif child.tag not in ODF_PARAGRAPHS:
+            parts.append(odf_paragraph_text(child))
+        parts.append(child.tail or "")
+    return "".join(parts)
+
+
+def iter_xml_paragraphs(
+    stream: io.BufferedIOBase, body_tag: str, paragraph_tags: Iterable[str], paragraph_text
+) -> Iterator[str]:
+    """Yield paragraph text in document order while discarding parsed elements.
+
+    Each paragraph is cleared once read, and the body is emptied whenever one
+    of its direct children (paragraph, table, list) ends, so only the block
+    currently being parsed is held in memory."""
+    paragraph_tags = set(paragraph_tags)
+    body: Optional[ET.Element] = None
+    depth = body_depth = 0
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if elem.tag == body_tag and body is None:
+                body, body_depth = elem, depth
+            continue
+        depth -= 1
+        if elem.tag in paragraph_tags:
+            yield paragraph_text(elem)
+            elem.clear()
+        if body is not None and depth == body_depth:
+            body.clear()
+
+
+def iter_docx_paragraphs(path: Path) -> Iterator[str]:
+    with zipfile.ZipFile(path) as archive, archive.open("word/document.xml") as stream:
+        yield from iter_xml_paragraphs(stream, W_BODY, (W_P,), docx_paragraph_text)
+
+
+def iter_odt_paragraphs(path: Path) -> Iterator[str]:
+    with zipfile.ZipFile(path) as archive, archive.open("content.xml") as stream:
+        yield from iter_xml_paragraphs(stream, ODF_BODY, ODF_PARAGRAPHS, odf_paragraph_text)
+
+
+def split_blank_lines(lines: Iterable[str]) -> Iterator[str]:
+    current: List[str] = []
+    for line in lines:
+        if line.strip():
+            current.append(line.rstrip())
+        elif current:
+            yield "\n".join(current)
+            current = []
+    if current:
+        yield "\n".join(current)
+
+
+def iter_pdf_paragraphs(path: Path) -> Iterator[str]:
+    try:
+        from pypdf import PdfReader  # type: ignore
+    except ImportError as exc:  # pragma: no cover
+        raise RuntimeError("pypdf is required for PDF ingestion (pip install -r requirements.txt)") from exc
+    reader = PdfReader(path)
+    for page in reader.pages:
+        yield from split_blank_lines((page.extract_text() or "").splitlines())
+
+
+def iter_text_paragraphs(path: Path) -> Iterator[str]:
+    with path.open("r", encoding="utf-8", errors="replace") as fh:
+        yield from split_blank_lines(fh)
+
+
+def iter_paragraphs(path: Path) -> Iterator[str]:
+    ext = path.suffix.lower()
+    if ext == ".docx":
+        return iter_docx_paragraphs(path)
+    if ext == ".odt":
+        return iter_odt_paragraphs(path)
+    if ext == ".pdf":
+        return iter_pdf_paragraphs(path)
+    return iter_text_paragraphs(path)
+
+
+def chunk_paragraphs(
+    paragraphs: Iterable[str], min_words: int = MIN_CHUNK_WORDS, max_words: int = MAX_CHUNK_WORDS
+) -> Iterator[str]:
+    """Group paragraphs into chunks of roughly ``min_words``-``max_words`` words."""
+    current: List[str] = []
+    word_count = 0
+    for paragraph in paragraphs:
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        words = len(paragraph.split())
+        if word_count + words > max_words and word_count >= min_words:
+            yield "\n\n".join(current)
+            current, word_count = [], 0
+        current.append(paragraph)
+        word_count += words
+        if word_count >= max_words:
+            yield "\n\n".join(current)
+            current, word_count = [], 0
+    if current:
+        yield "\n\n".join(current)
+
+
+def extract_chunks(path: Path) -> Tuple[Path, List[str], Optional[str]]:
+    """Process-pool task: ``(path, chunks, error)`` for one file."""
+    try:
+        return path, list(chunk_paragraphs(iter_paragraphs(path))), None
+    except Exception as exc:  # corrupt archives, encrypted PDFs, ...
+        return path, [], f"{type(exc).__name__}: {exc}"
+
+
+def find_documents(incoming_dir: Path) -> Tuple[List[Path], List[Path]]:
+    """Return ``(supported, skipped)`` files under ``incoming_dir`` in a stable order."""
+    supported: List[Path] = []
+    skipped: List[Path] = []
+    for path in sorted(p for p in incoming_dir.rglob("*") if p.is_file()):
+        (supported if path.suffix.lower() in TEXT_EXTENSIONS else skipped).append(path)
+    return supported, skipped
+
+
+def extract_all(paths: List[Path], workers: Optional[int] = None) -> Iterator[Tuple[Path, List[str], Optional[str]]]:
+    """Yield ``extract_chunks`` results in input order, spreading files over ``workers`` processes."""
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers <= 1:
+        yield from map(extract_chunks, paths)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(extract_chunks, paths)
+
+
+def main() -> None:
+    if len(sys.argv) < 2:
+        print("Usage: ingest_documents.py <file> [<file> ...]", file=sys.stderr)
+        raise SystemExit(1)
+    for path in map(Path, sys.argv[1:]):
+        if not path.exists():
+            print(f"Missing file: {path}", file=sys.stderr)
+            raise SystemExit(2)
+        for paragraph in iter_paragraphs(path):
+            if paragraph.strip():
+                print(paragraph)
+
+
+if __name__ == "__main__":
+    main()
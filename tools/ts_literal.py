@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""In-process reader for the TypeScript data modules under `src/data/`.
+
+`collegeData.ts` is a typed object literal: imports, `const` bindings of
+strings and object/array literals, references to those bindings, comments,
+trailing commas and `as`/`satisfies` casts. This module tokenizes and
+evaluates exactly that subset and returns the bindings as plain Python
+values, matching what `JSON.parse(JSON.stringify(value))` yields in Node
+(`undefined` properties are dropped, integral numbers stay ints). Anything
+outside the subset (function calls, operators, computed keys) raises
+`TsLiteralError` with the line and column, rather than being guessed at.
+
+Run directly to print a binding as JSON:
+
+    python tools/ts_literal.py src/data/collegeData.ts collegeDatabase
+"""
+from __future__ import annotations
+
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# Sentinel for `undefined`: dropped from objects, null inside arrays (as JSON.stringify does).
+UNDEFINED = object()
+
+TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<number>-?(?:0[xX][0-9a-fA-F_]+|(?:\d[\d_]*\.?[\d_]*|\.\d[\d_]*)(?:[eE][+-]?\d+)?))
+  | (?P<string>"(?:[^"\\\n]|\\.|\\\n)*"|'(?:[^'\\\n]|\\.|\\\n)*')
+  | (?P<template>`(?:[^`\\]|\\.)*`)
+  | (?P<name>[A-Za-z_$][\w$]*)
+  | (?P<punct>\.\.\.|=>|[{}\[\]():;,.=<>|&?!*@])
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+SIMPLE_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "v": "\v", "0": "\0"}
+ESCAPE_RE = re.compile(r"\\(u\{[0-9a-fA-F]+\}|u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|\r\n|[\s\S])")
+TEMPLATE_SUB_RE = re.compile(r"\$\{\s*([A-Za-z_$][\w$]*)\s*\}")
+DECLARATIONS = {"const", "let", "var"}
+CLOSERS = {"(": ")", "[": "]", "{": "}", "<": ">"}
+ARRAY_INDEX_RE = re.compile(r"0|[1-9]\d*")
+
+
+class TsLiteralError(ValueError):
+    """Source outside the supported literal subset."""
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+    pos: int
+
+
+def tokenize(source: str) -> List[Token]:
+    tokens: List[Token] = []
+    pos = 0
+    while pos < len(source):
+        match = TOKEN_RE.match(source, pos)
+        if match is None:
+            raise TsLiteralError(f"Unexpected character {source[pos]!r} at {location(source, pos)}")
+        kind = match.lastgroup or ""
+        if kind not in ("ws", "comment"):
+            tokens.append(Token(kind, match.group(), pos))
+        pos = match.end()
+    tokens.append(Token("eof", "", len(source)))
+    return tokens
+
+
+def location(source: str, pos: int) -> str:
+    line = source.count("\n", 0, pos) + 1
+    return f"line {line}, column {pos - (source.rfind(chr(10), 0, pos) + 1) + 1}"
+
+
+def unescape(body: str) -> str:
+    def replace(match: "re.Match[str]") -> str:
+        escape = match.group(1)
+        if escape.startswith("u{"):
+            return chr(int(escape[2:-1], 16))
+        if escape[0] in "ux" and len(escape) > 1:
+            return chr(int(escape[1:], 16))
+        if escape in ("\n", "\r\n", "\r", "\u2028", "\u2029"):  # line continuation
+            return ""
+        return SIMPLE_ESCAPES.get(escape, escape)
+
+    return ESCAPE_RE.sub(replace, body)
+
+
+def js_property_order(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop `undefined` values and put array-index keys first in ascending order,
+    which is the order JavaScript enumerates (and JSON.stringify emits) them."""
+    indices = sorted((key for key in result if ARRAY_INDEX_RE.fullmatch(key) and int(key) < 2**32 - 1), key=int)
+    ordered = {key: result[key] for key in indices}
+    ordered.update((key, value) for key, value in result.items() if key not in ordered)
+    return {key: value for key, value in ordered.items() if value is not UNDEFINED}
+
+
+def parse_number(text: str) -> Any:
+    text = text.replace("_", "")
+    value = float(int(text, 16)) if text.lstrip("-")[:2] in ("0x", "0X") else float(text)
+    return int(value) if value.is_integer() and abs(value) < 2**53 else value
+
+
+class Parser:
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.tokens = tokenize(source)
+        self.index = 0
+        self.bindings: Dict[str, Any] = {}
+
+    # -- token helpers -------------------------------------------------
+    def peek(self, offset: int = 0) -> Token:
+        return self.tokens[min(self.index + offset, len(self.tokens) - 1)]
+
+    def advance(self) -> Token:
+        token = self.peek()
+        self.index += 1
+        return token
+
+    def at(self, text: str) -> bool:
+        token = self.peek()
+        return token.text == text and token.kind in ("punct", "name")
+
+    def accept(self, text: str) -> bool:
+        if self.at(text):
+            self.index += 1
+            return True
+        return False
+
+    def expect(self, text: str) -> Token:
+        if not self.at(text):
+            self.fail(f"expected {text!r}")
+        return self.advance()
+
+    def fail(self, message: str) -> None:
+        token = self.peek()
+        found = token.text[:40] or "end of file"
+        raise TsLiteralError(f"{message}, found {found!r} at {location(self.source, token.pos)}")
+
+    # -- module level ----------------------------------------------------
+    def parse_module(self) -> Dict[str, Any]:
+        while self.peek().kind != "eof":
+            if self.accept(";"):
+                continue
+            if self.at("import"):
+                self.skip_statement()
+                continue
+            if self.accept("export"):
+                if self.accept("default"):
+                    self.bindings["default"] = self.parse_expression()
+                    continue
+                if self.at("interface") or self.at("type"):
+                    self.skip_statement()
+                    continue
+            if self.peek().text in DECLARATIONS:
+                self.parse_declaration()
+                continue
+            if self.at("interface") or self.at("type"):
+                self.skip_statement()
+                continue
+            self.fail("expected a declaration")
+        return self.bindings
+
+    def parse_declaration(self) -> None:
+        self.advance()  # const / let / var
+        while True:
+            name = self.advance()
+            if name.kind != "name":
+                self.fail("expected a binding name")
+            if self.accept(":"):
+                self.skip_type()
+            self.expect("=")
+            self.bindings[name.text] = self.parse_expression()
+            if not self.accept(","):
+                break
+        self.accept(";")
+
+    def skip_statement(self) -> None:
+        """Skip to the end of an import/type statement (balanced braces, then `;` or newline)."""
+        depth = 0
+        start_line = self.source.count("\n", 0, self.peek().pos)
+        while self.peek().kind != "eof":
+            token = self.advance()
+            if token.text in ("{", "(", "["):
+                depth += 1
+            elif token.text in ("}", ")", "]"):
+                depth -= 1
+            elif token.text == ";" and depth == 0:
+                return
+            following = self.peek()
+            if depth == 0 and following.kind == "name" and following.text in DECLARATIONS | {"export", "import"}:
+                if self.source.count("\n", 0, following.pos) > start_line:
+                    return
+
+    def skip_type(self) -> None:
+        """Skip a type annotation or cast target up to the next delimiter at depth 0."""
+        stack: List[str] = []
+        while self.peek().kind != "eof":
+            token = self.peek()
+            if not stack and token.text in (",", ";", ")", "]", "}", "=") and token.kind == "punct":
+                return
+            if token.text == "=>" and not stack:
+                self.advance()
+                continue
+            if token.text in CLOSERS and token.kind == "punct":
+                stack.append(CLOSERS[token.text])
+            elif stack and token.text == stack[-1]:
+                stack.pop()
+            self.advance()
+
+    # -- expressions -----------------------------------------------------
+    def parse_expression(self) -> Any:
+        value = self.parse_primary()
+        while True:
+            if self.at("as") or self.at("satisfies"):
+                self.advance()
+                self.skip_type()
+            elif self.at("!") and self.peek(1).text != "=":
+                self.advance()  # non-null assertion
+            else:
+                return value
+
+    def parse_primary(self) -> Any:
+        token = self.peek()
+        if token.kind == "punct":
+            if token.text == "{":
+                return self.parse_object()
+            if token.text == "[":
+                return self.parse_array()
+            if token.text == "(":
+                self.advance()
+                value = self.parse_expression()
+                self.expect(")")
+                return value
+            if token.text == "<":  # legacy `<Type>value` cast
+                self.skip_angle_cast()
+                return self.parse_primary()
+        self.advance()
+        if token.kind == "string":
+            return unescape(token.text[1:-1])
+        if token.kind == "template":
+            return self.template_value(token)
+        if token.kind == "number":
+            return parse_number(token.text)
+        if token.kind == "name":
+            if token.text in ("true", "false"):
+                return token.text == "true"
+            if token.text == "null":
+                return None
+            if token.text == "undefined":
+                return UNDEFINED
+            if token.text in self.bindings:
+                return self.bindings[token.text]
+            self.index -= 1
+            self.fail(f"unknown identifier {token.text!r}")
+        self.index -= 1
+        self.fail("expected a value")
+
+    def skip_angle_cast(self) -> None:
+        depth = 0
+        while self.peek().kind != "eof":
+            token = self.advance()
+            if token.text == "<":
+                depth += 1
+            elif token.text == ">":
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def template_value(self, token: Token) -> str:
+        def substitute(match: "re.Match[str]") -> str:
+            name = match.group(1)
+            if name not in self.bindings:
+                raise TsLiteralError(f"unknown identifier {name!r} in template at {location(self.source, token.pos)}")
+            value = self.bindings[name]
+            return value if isinstance(value, str) else json.dumps(value)
+
+        body = token.text[1:-1]
+        if "${" in TEMPLATE_SUB_RE.sub("", body):
+            raise TsLiteralError(f"unsupported template expression at {location(self.source, token.pos)}")
+        return unescape(TEMPLATE_SUB_RE.sub(substitute, body))
+
+    def parse_object(self) -> Dict[str, Any]:
+        self.expect("{")
+        result: Dict[str, Any] = {}
+        while not self.accept("}"):
+            if self.accept("..."):
+                spread = self.parse_expression()
+                if isinstance(spread, dict):
+                    result.update(spread)
+                elif spread is not None and spread is not UNDEFINED:
+                    self.fail("can only spread objects into an object")
+            else:
+                key_token = self.advance()
+                if key_token.kind in ("name", "number"):
+                    key = key_token.text if key_token.kind == "name" else str(parse_number(key_token.text))
+                elif key_token.kind == "string":
+                    key = unescape(key_token.text[1:-1])
+                else:
+                    self.index -= 1
+                    self.fail("expected a property name")
+                if self.accept(":"):
+                    value = self.parse_expression()
+                elif key_token.kind == "name" and key in self.bindings:  # shorthand `{ name }`
+                    value = self.bindings[key]
+                else:
+                    self.fail(f"expected ':' after property {key!r}")
+                result.pop(key, None)  # a redefined key moves to the end, as in JS
+                result[key] = value
+            if not self.accept(","):
+                self.expect("}")
+                break
+        return js_property_order(result)
+
+    def parse_array(self) -> List[Any]:
+        self.expect("[")
+        items: List[Any] = []
+        while not self.accept("]"):
+            if self.at(","):  # hole
+                self.advance()
+                items.append(None)
+                continue
+            if self.accept("..."):
+                spread = self.parse_expression()
+                if not isinstance(spread, (list, str)):
+                    self.fail("can only spread arrays into an array")
+                items.extend(spread)
+            else:
+                value = self.parse_expression()
+                items.append(None if value is UNDEFINED else value)
+            if not self.accept(","):
+                self.expect("]")
+                break
+        return items
+
+
+def parse_module(source: str) -> Dict[str, Any]:
+    """All top-level bindings of a data module (`default` for `export default`)."""
+    return Parser(source).parse_module()
+
+
+def load_binding(path: Path, name: str) -> Any:
+    bindings = parse_module(path.read_text(encoding="utf-8"))
+    if name not in bindings:
+        raise TsLiteralError(f"{path} has no top-level binding {name!r}")
+    return bindings[name]
+
+
+def main() -> None:
+    if len(sys.argv) != 3:
+        print("Usage: ts_literal.py <file.ts> <binding>", file=sys.stderr)
+        raise SystemExit(1)
+    value: Optional[Any] = load_binding(Path(sys.argv[1]), sys.argv[2])
+    json.dump(value, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()